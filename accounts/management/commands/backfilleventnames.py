@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from database.database import backfill_event_names
+
+
+class Command(BaseCommand):
+    help = ("Fill the event_speakers/event_organizers side tables from the events' JSON columns, "
+            "in batches of events ordered by id. Safe to re-run; --after resumes an interrupted run.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Events per transaction (default 500)')
+        parser.add_argument('--after', type=int, default=0, help='Start after this event id (default: from the first)')
+
+    def handle(self, *args, **options):
+        last_id, total = options['after'], 0
+        while True:
+            batch_last, count = backfill_event_names(after_id=last_id, limit=options['batch_size'])
+            if batch_last is None:
+                break
+            last_id, total = batch_last, total + count
+            if options['verbosity'] > 1:
+                self.stdout.write(f"  ... {total} event(s), up to id {last_id}")
+        self.stdout.write(self.style.SUCCESS(f"Backfilled speakers and organizers of {total} event(s)"))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from database.migrations import MIGRATIONS, applied_versions, migrate
+
+
+class Command(BaseCommand):
+    help = "Apply pending schema migrations to the SQLModel database (database/migrations.py)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--list', action='store_true', help='Show migrations and whether they are applied')
+        parser.add_argument('--target', type=int, help='Stop after this migration version')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            done = applied_versions()
+            for m in MIGRATIONS:
+                mark = 'x' if m.version in done else ' '
+                self.stdout.write(f"[{mark}] {m.version:04d} {m.description}")
+            return
+
+        applied = migrate(target=options.get('target'))
+        if not applied:
+            self.stdout.write("Database schema is up to date.")
+            return
+        for m in applied:
+            self.stdout.write(f"Applied {m.version:04d} {m.description}")
+        self.stdout.write(self.style.SUCCESS(f"Applied {len(applied)} migration(s)"))
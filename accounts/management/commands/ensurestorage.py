@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+from backend.storage import StorageError, get_storage
+
+
+class Command(BaseCommand):
+    help = "Provision the image storage bucket/directory (run once at deploy time)."
+
+    def handle(self, *args, **options):
+        storage = get_storage()
+        if storage is None:
+            raise CommandError("Image storage is not configured (set SUPABASE_URL/SUPABASE_SERVICE_ROLE_KEY or STORAGE_BACKEND=local).")
+        try:
+            storage.ensure_ready()
+        except StorageError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(f"{storage.name} storage is ready"))
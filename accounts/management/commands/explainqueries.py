@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+from sqlalchemy import text
+from sqlmodel import select
+
+from database.database import created_by_matches, event_now, get_engine
+from database.tables import EventOrganizers, Events, EventSpeakers, UserEventLink
+
+
+def hot_queries(sample_email: str, sample_category: str):
+    """The statements behind the listing, filtering, creator and registration endpoints."""
+    now = event_now()
+    live = select(Events).where(Events.deleted_at.is_(None))
+    return [
+        ("list events by date", live.order_by(Events.date, Events.id)),
+        ("upcoming events (default listing)", live.where(Events.date >= now).order_by(Events.date, Events.id)),
+        ("filter by category", live.where(Events.category == sample_category).order_by(Events.date, Events.id)),
+        ("events created by admin", select(Events).where(created_by_matches(sample_email))),
+        ("events of a speaker", select(Events).where(Events.id.in_(
+            select(EventSpeakers.event_id).where(EventSpeakers.name == "lina haddad"))).order_by(Events.date, Events.id)),
+        ("events of an organizer", select(EventOrganizers.event_id).where(EventOrganizers.name == "cs society")),
+        ("registrations of a user", select(UserEventLink.event_id).where(UserEventLink.user_email == sample_email)),
+        ("registrants of an event", select(UserEventLink.user_email).where(UserEventLink.event_id == 1)),
+        ("soft-deleted events to purge", select(Events.id).where(Events.deleted_at.is_not(None), Events.deleted_at < datetime.utcnow())),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Print EXPLAIN plans for the hot event queries to check that indexes are used."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', default='admin@aub.edu.lb', help='Sample email used in creator/registration queries')
+        parser.add_argument('--category', default='Academic', help='Sample category used in the filter query')
+
+    def handle(self, *args, **options):
+        engine = get_engine()
+        dialect = engine.dialect
+        prefix = "EXPLAIN QUERY PLAN " if dialect.name == "sqlite" else "EXPLAIN "
+
+        with engine.connect() as connection:
+            for label, stmt in hot_queries(options['email'], options['category']):
+                sql = str(stmt.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+                self.stdout.write(self.style.NOTICE(f"=== {label} ==="))
+                self.stdout.write(" ".join(sql.split()))
+                result = connection.execute(text(prefix + sql))
+                columns = list(result.keys())
+                for row in result:
+                    self.stdout.write("  " + " | ".join(f"{c}={v}" for c, v in zip(columns, row)))
+                self.stdout.write("")
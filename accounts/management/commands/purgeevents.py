@@ -0,0 +1,36 @@
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+from database.database import purge_deleted_events
+
+
+class Command(BaseCommand):
+    help = ("Remove soft-deleted events for good: their registrations first, then the event rows, "
+            "in bounded transactions. Run it from cron, or keep it running with --interval.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows deleted per transaction (default 1000)')
+        parser.add_argument('--older-than-hours', type=float, default=0,
+                            help='Only purge events deleted at least this long ago (default 0)')
+        parser.add_argument('--interval', type=float, help='Repeat every N seconds instead of exiting')
+
+    def handle(self, *args, **options):
+        while True:
+            self.purge(options['batch_size'], options['older_than_hours'])
+            if not options.get('interval'):
+                return
+            time.sleep(options['interval'])
+
+    def purge(self, batch_size: int, older_than_hours: float):
+        deleted_before = datetime.utcnow() - timedelta(hours=older_than_hours)
+        events = registrations = 0
+        while True:
+            purged_events, purged_registrations = purge_deleted_events(deleted_before, limit=batch_size)
+            if not purged_events and not purged_registrations:
+                break
+            events += purged_events
+            registrations += purged_registrations
+        self.stdout.write(self.style.SUCCESS(
+            f"Purged {events} deleted event(s) and {registrations} registration(s)"
+        ))
@@ -1,29 +1,37 @@
 from django.core.management.base import BaseCommand
-from database.database import get_engine
-from sqlmodel import Session, select
-from database.tables import Users
+from database.database import count_users_to_purge, delete_users_batch
+
 
 class Command(BaseCommand):
     help = "Delete all users (CAUTION). Optionally filter by domain."
 
     def add_arguments(self, parser):
         parser.add_argument('--domain', help='Only delete users with this email domain')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be deleted')
+        parser.add_argument('--batch-size', type=int, default=500, help='Users deleted per transaction (default 500)')
         parser.add_argument('--yes-i-am-sure', action='store_true', help='Confirm destructive action')
 
     def handle(self, *args, **options):
+        domain = options.get('domain')
+        counts = count_users_to_purge(domain)
+        scope = f"with @{domain} emails" if domain else "(all domains)"
+        summary = (f"{counts['users']} users {scope}, {counts['registrations']} registrations, "
+                   f"{counts['codes']} codes; {counts['events_created']} events would lose their creator")
+        if options['dry_run']:
+            self.stdout.write(f"Dry run: {summary}")
+            return
         if not options['yes_i_am_sure']:
             self.stderr.write('Refusing to proceed without --yes-i-am-sure')
             return
-        domain = options.get('domain')
-        engine = get_engine()
-        deleted = 0
-        with Session(engine) as session:
-            stmt = select(Users)
-            users = session.exec(stmt).all()
-            for user in users:
-                if domain and not user.email.lower().endswith('@'+domain.lower()):
-                    continue
-                session.delete(user)
-                deleted += 1
-            session.commit()
+
+        total, deleted = counts['users'], 0
+        batch_size = max(1, options['batch_size'])
+        # Short transactions: locks are held for one batch, never for the whole purge
+        while True:
+            batch = delete_users_batch(domain, limit=batch_size)
+            deleted += batch
+            if batch:
+                self.stdout.write(f"Deleted {deleted}/{max(total, deleted)} users")
+            if batch < batch_size:
+                break
         self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} users'))
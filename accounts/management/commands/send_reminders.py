@@ -0,0 +1,40 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from backend.mailer import MAX_RECIPIENTS
+from backend.reminders import send_reminders
+
+
+class Command(BaseCommand):
+    help = ("Email a reminder to everyone registered for an event starting within the window. "
+            "Safe to run from cron as often as you like: each reminder is sent once.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--window-hours', type=float, default=24,
+                            help='Remind about events starting within this many hours (default 24)')
+        parser.add_argument('--batch-size', type=int, default=MAX_RECIPIENTS,
+                            help=f'Recipients per send call (default and maximum {MAX_RECIPIENTS})')
+        parser.add_argument('--concurrency', type=int, help='Send calls in flight (default MAIL_CONCURRENCY)')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the reminders that are due')
+        parser.add_argument('--interval', type=float, help='Repeat every N seconds instead of exiting')
+
+    def handle(self, *args, **options):
+        while True:
+            summary = send_reminders(
+                window=timedelta(hours=options['window_hours']),
+                concurrency=options['concurrency'],
+                batch_size=options['batch_size'],
+                dry_run=options['dry_run'],
+            )
+            if options['dry_run']:
+                self.stdout.write(f"{summary['due']} reminder(s) due")
+            else:
+                style = self.style.SUCCESS if not summary['failed'] else self.style.WARNING
+                self.stdout.write(style(
+                    f"Sent {summary['sent']} of {summary['due']} due reminder(s); "
+                    f"{summary['failed']} failed (retried next run), {summary['skipped']} claimed by another run"
+                ))
+            if not options.get('interval'):
+                return
+            time.sleep(options['interval'])
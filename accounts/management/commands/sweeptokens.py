@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from database.database import delete_expired_auth_tokens, delete_rate_limit_buckets
+
+
+class Command(BaseCommand):
+    help = ("Delete expired verification/reset codes (and idle rate limit buckets) in batches. "
+            "Run it from cron, or keep it running with --interval.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows deleted per transaction (default 1000)')
+        parser.add_argument('--rate-limit-idle', type=float, default=86400,
+                            help='Also delete rate limit buckets idle for this many seconds (default 1 day, 0 to skip)')
+        parser.add_argument('--interval', type=float, help='Repeat every N seconds instead of exiting')
+
+    def handle(self, *args, **options):
+        while True:
+            self.sweep(options['batch_size'], options['rate_limit_idle'])
+            if not options.get('interval'):
+                return
+            time.sleep(options['interval'])
+
+    def sweep(self, batch_size: int, rate_limit_idle: float):
+        tokens = self._drain(lambda: delete_expired_auth_tokens(limit=batch_size), batch_size)
+        buckets = 0
+        if rate_limit_idle > 0:
+            # A bucket idle for longer than its period is full again, so dropping it changes nothing
+            buckets = self._drain(
+                lambda: delete_rate_limit_buckets(idle_for=rate_limit_idle, limit=batch_size), batch_size
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {tokens} expired code(s) and {buckets} idle rate limit bucket(s)"
+        ))
+
+    @staticmethod
+    def _drain(delete_batch, batch_size: int) -> int:
+        total = 0
+        while True:
+            deleted = delete_batch()
+            total += deleted
+            if deleted < batch_size:
+                return total
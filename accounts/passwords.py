@@ -0,0 +1,122 @@
+"""Password hashing off the request thread.
+
+bcrypt is deliberately slow (~250 ms of CPU at cost 12). Running it inline lets a login burst
+pin every CPU with as many concurrent hashes as there are request threads. Here every
+hash/check runs on a bounded process pool instead:
+
+- PASSWORD_HASH_WORKERS processes do the hashing (0 runs bcrypt inline, e.g. for tests)
+- at most PASSWORD_HASH_QUEUE hashes may be queued or running; beyond that callers get
+  ``HashingBusy`` right away and the views answer 429 with Retry-After, instead of piling up
+- BCRYPT_ROUNDS sets the cost of new hashes; ``needs_rehash()`` spots hashes made at another
+  cost so login can transparently upgrade (or downgrade) them
+- a worker that dies (killed for memory, crashed) breaks the whole pool; it is replaced with a
+  fresh one and the hash is retried once, so one dead worker does not fail every later login
+"""
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+
+import bcrypt
+from django.conf import settings
+
+
+class HashingBusy(Exception):
+    """The hashing queue is full; the client should retry later."""
+
+
+def _hash(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+
+
+def _check(password: bytes, hashed: bytes) -> bool:
+    try:
+        return bcrypt.checkpw(password, hashed)
+    except ValueError:  # malformed stored hash
+        return False
+
+
+def bcrypt_rounds() -> int:
+    return int(getattr(settings, "BCRYPT_ROUNDS", 12))
+
+
+def hash_cost(hashed: str) -> int:
+    """Cost factor of a ``$2b$12$...`` hash (0 when it cannot be parsed)."""
+    try:
+        return int(hashed.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return 0
+
+
+def needs_rehash(hashed: str) -> bool:
+    return hash_cost(hashed) != bcrypt_rounds()
+
+
+@lru_cache(maxsize=1)
+def _pool():
+    workers = int(getattr(settings, "PASSWORD_HASH_WORKERS", 2))
+    if workers <= 0:
+        return None
+    # spawn, not fork: forking a multi-threaded server process can deadlock the child
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+@lru_cache(maxsize=1)
+def _slots() -> threading.BoundedSemaphore:
+    return threading.BoundedSemaphore(int(getattr(settings, "PASSWORD_HASH_QUEUE", 16)))
+
+
+_replace_lock = threading.Lock()
+
+
+def _replace_broken(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken `pool` from the cache (once, however many callers saw it break)."""
+    with _replace_lock:
+        if _pool() is pool:
+            _pool.cache_clear()
+    pool.shutdown(wait=False)
+
+
+def _submit(pool: ProcessPoolExecutor, func, *args):
+    slots = _slots()
+    if not slots.acquire(blocking=False):
+        raise HashingBusy()
+    try:
+        future = pool.submit(func, *args)
+    except BaseException:
+        slots.release()
+        raise
+    # The slot is freed when the job is really over, not when this caller stops waiting for it:
+    # a hash that timed out still occupies a worker and must keep counting against the queue
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        return future.result(timeout=float(getattr(settings, "PASSWORD_HASH_TIMEOUT", 10)))
+    except FutureTimeout:
+        future.cancel()  # frees the slot now if the job has not started yet
+        raise HashingBusy()
+
+
+def _run(func, *args):
+    for _ in range(2):
+        pool = _pool()
+        if pool is None:
+            return func(*args)
+        try:
+            return _submit(pool, func, *args)
+        except BrokenProcessPool:
+            _replace_broken(pool)
+    raise HashingBusy()  # the fresh pool broke as well
+
+
+def hash_password(password: str) -> str:
+    """bcrypt hash of `password` at the configured cost. Raises HashingBusy under overload."""
+    return _run(_hash, password.encode("utf-8"), bcrypt_rounds()).decode("utf-8")
+
+
+def check_password(password: str, hashed: str) -> bool:
+    """Constant-time bcrypt verification. Raises HashingBusy under overload."""
+    if not hashed:
+        return False
+    return _run(_check, password.encode("utf-8"), hashed.encode("utf-8"))
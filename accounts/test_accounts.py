@@ -12,13 +12,13 @@ class PasswordResetTests(TestCase):
         self.password = "TestPass123!"
         pw_hash = bcrypt.hashpw(self.password.encode(), bcrypt.gensalt()).decode()
         from database.database import delete_user
-        from django.core.cache import cache
+        from backend.ratelimit import reset_rate_limits
         try:
             delete_user(self.email)
         except Exception:
             pass
-        # Clear rate limit cache for this email
-        cache.delete(f"reset-rl-{self.email}")
+        # Clear rate limit buckets left by earlier tests
+        reset_rate_limits()
         create_user(self.email, pw_hash)
         update_is_verified(self.email, True)
 
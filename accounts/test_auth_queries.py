@@ -0,0 +1,78 @@
+import re
+from datetime import datetime, timedelta
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from sqlmodel import SQLModel
+
+from accounts import passwords
+from database.database import TOKEN_RESET, create_user, delete_user, get_engine, set_auth_token
+
+
+def _db_queries(response) -> int:
+    """Statement count reported by backend.instrumentation in the Server-Timing header."""
+    return int(re.search(r'desc="(\d+) queries"', response["Server-Timing"]).group(1))
+
+
+@override_settings(PASSWORD_HASH_WORKERS=0, BCRYPT_ROUNDS=4, SERVER_TIMING_HEADER=True, RATE_LIMIT_ENABLED=False)
+class AuthQueryCountTests(TestCase):
+    """Each auth endpoint reads the user once and writes in at most one transaction.
+
+    Counts are for the default engine; with SQLMODEL_USE_DJANGO_CONNECTION the transaction
+    statements Django issues (BEGIN/SAVEPOINT) are counted as well.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        SQLModel.metadata.create_all(get_engine())
+
+    def setUp(self):
+        passwords._pool.cache_clear()
+        self.client = APIClient()
+        self.email = "queries@aub.edu.lb"
+        self.password = "TestPass123!"
+        delete_user(self.email)
+        with self.settings(BCRYPT_ROUNDS=4):
+            create_user(self.email, passwords.hash_password(self.password), is_verified=True)
+
+    def tearDown(self):
+        delete_user(self.email)
+
+    def test_login_is_one_read(self):
+        response = self.client.post("/auth/login/", {"email": self.email, "password": self.password}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(_db_queries(response), 1)
+
+    def test_login_rehash_adds_one_write(self):
+        with self.settings(BCRYPT_ROUNDS=5):
+            response = self.client.post("/auth/login/", {"email": self.email, "password": self.password}, format="json")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(_db_queries(response), 2)
+            response = self.client.post("/auth/login/", {"email": self.email, "password": self.password}, format="json")
+            self.assertEqual(_db_queries(response), 1)  # already upgraded
+
+    def test_signup_and_verify_are_one_read_and_one_transaction(self):
+        email = "newqueries@aub.edu.lb"
+        delete_user(email)
+        response = self.client.post("/auth/signup/", {"email": email, "password": self.password}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(_db_queries(response), 3)  # snapshot + user and code INSERTs (one transaction)
+        response = self.client.post("/auth/verify/", {"email": email, "token": response.data["verification_token"]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(_db_queries(response), 3)  # snapshot with codes + UPDATE + spent code DELETE
+        response = self.client.post("/auth/verify/", {"email": email, "token": "000000"}, format="json")
+        self.assertEqual(response.data["message"], "Account already verified.")
+        delete_user(email)
+
+    def test_password_reset_confirm_is_one_read_and_one_transaction(self):
+        set_auth_token(self.email, TOKEN_RESET, "123456", datetime.utcnow() + timedelta(minutes=5))
+        response = self.client.post("/auth/password-reset-confirm/", {
+            "email": self.email, "reset_code": "123456", "new_password": "NewPass123!",
+        }, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(_db_queries(response), 3)  # snapshot with codes + UPDATE + spent code DELETE
+        response = self.client.post("/auth/password-reset-confirm/", {
+            "email": self.email, "reset_code": "123456", "new_password": "Other123!x",
+        }, format="json")
+        self.assertEqual(response.status_code, 400)  # the code was consumed
@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta, timezone
+
+import jwt
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase
+from sqlmodel import SQLModel
+
+from backend import calendar_feed
+from backend.crud import create_event, delete_event_by_id, update_event
+from backend.schemas import EventCreate, EventUpdate
+from database.database import create_user, delete_user, get_engine, register_user_to_event, unregister_user_from_event
+
+
+class CalendarFeedTests(TestCase):
+    """/api/my/calendar.ics: signed token, per-user cache keyed on data versions, ETag/304."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        SQLModel.metadata.create_all(get_engine())
+
+    def setUp(self):
+        cache.clear()
+        self.email = "calendar@aub.edu.lb"
+        delete_user(self.email)
+        create_user(self.email, "hash", fullname="Calendar Student", is_verified=True)
+        start = datetime(2031, 3, 4, 16, 30)
+        self.events = [
+            create_event(EventCreate(title=title, description="Bring a laptop; snacks, drinks\nand ideas",
+                                     date=start + timedelta(days=i), location="West Hall", capacity=5,
+                                     organizers=["CS Society"], speakers=["Dr. Lina"], category="Talks",
+                                     image_url="https://cdn.example.com/calendar.png"))
+            for i, title in enumerate(["Calendar talk", "Calendar workshop"])
+        ]
+        register_user_to_event(self.email, self.events[0].id)
+        self.token = self._token_url()
+
+    def tearDown(self):
+        delete_user(self.email)
+        for event in self.events:
+            delete_event_by_id(event.id)
+
+    def _token_url(self):
+        bearer = jwt.encode({"email": self.email}, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+        response = self.client.get("/api/my/calendar", HTTP_AUTHORIZATION=f"Bearer {bearer}")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("/api/my/calendar.ics?token=", response.json()["url"])
+        return response.json()["token"]
+
+    def _feed(self, **headers):
+        return self.client.get("/api/my/calendar.ics", {"token": self.token}, **headers)
+
+    def test_feed_lists_registered_events(self):
+        response = self._feed()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/calendar; charset=utf-8")
+        body = b"".join(response.streaming_content).decode()
+        self.assertTrue(body.startswith("BEGIN:VCALENDAR\r\n") and body.endswith("END:VCALENDAR\r\n"))
+        self.assertIn(f"UID:event-{self.events[0].id}@aubevents\r\n", body)
+        # 16:30 in Beirut (UTC+2 in March)
+        self.assertIn("DTSTART:20310304T143000Z\r\nDTEND:20310304T153000Z\r\n", body)
+        self.assertIn("DESCRIPTION:Bring a laptop\\; snacks\\, drinks\\nand ideas\r\n", body)
+        self.assertNotIn("Calendar workshop", body)
+
+    def test_unchanged_feed_answers_304_and_registrations_change_the_etag(self):
+        first = self._feed()
+        etag = first["ETag"]
+        b"".join(first.streaming_content)
+        self.assertEqual(self._feed(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        register_user_to_event(self.email, self.events[1].id)
+        response = self._feed(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Calendar workshop", b"".join(response.streaming_content).decode())
+
+        unregister_user_from_event(self.email, self.events[1].id)
+        update_event(self.events[0].id, EventUpdate(title="Calendar talk, renamed"))
+        body = b"".join(self._feed().streaming_content).decode()
+        self.assertIn("SUMMARY:Calendar talk\\, renamed", body)
+        self.assertNotIn("Calendar workshop", body)
+
+    def test_rendered_feed_is_served_from_the_cache(self):
+        versions = calendar_feed.feed_versions(self.email)
+        b"".join(self._feed().streaming_content)
+        cached = cache.get(calendar_feed._cache_key(self.email, versions))
+        self.assertTrue(cached.startswith(b"BEGIN:VCALENDAR"))
+        cache.set(calendar_feed._cache_key(self.email, versions), b"CACHED")
+        self.assertEqual(b"".join(self._feed().streaming_content), b"CACHED")
+
+    def test_bad_token_is_rejected(self):
+        response = self.client.get("/api/my/calendar.ics", {"token": self.token[:-2] + "xx"})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.client.get("/api/my/calendar").status_code, 401)
+
+    def test_long_lines_are_folded_without_splitting_characters(self):
+        line = "SUMMARY:" + "é" * 60
+        folded = calendar_feed.fold(line)
+        self.assertTrue(all(len(part.encode()) <= 75 for part in folded[:-2].split("\r\n")))
+        self.assertEqual(folded[:-2].replace("\r\n ", ""), line)
+
+    def test_local_event_times_round_trip_through_utc(self):
+        from zoneinfo import ZoneInfo
+
+        beirut = ZoneInfo("Asia/Beirut")
+        for local in (datetime(2031, 3, 4, 16, 30), datetime(2031, 7, 4, 9, 15)):  # EET and EEST
+            stamp = calendar_feed.format_utc(local)
+            parsed = datetime.strptime(stamp, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+            self.assertEqual(parsed.astimezone(beirut).replace(tzinfo=None), local)
+        self.assertEqual(calendar_feed.format_utc(datetime(2031, 7, 4, 9, 15)), "20310704T061500Z")
@@ -0,0 +1,184 @@
+import json
+from datetime import datetime, timedelta
+
+import jwt
+from django.conf import settings
+from django.test import TestCase, override_settings
+from sqlmodel import Session, SQLModel
+
+from backend import catalog, search
+from backend.crud import create_event, delete_event_by_id, update_event
+from backend.schemas import EventCreate, EventUpdate
+from database.database import (
+    DATA_EVENTS, bump_data_version, count_facets, create_user, delete_user, event_now, facet_week, facets_from_counts,
+    get_engine, register_user_to_event,
+)
+from database.tables import Events
+
+
+@override_settings(EVENT_CATALOG_RECHECK_SECONDS=60)
+class CatalogSnapshotTests(TestCase):
+    """Public list/detail served from backend/catalog.py must match the SQL path."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        SQLModel.metadata.create_all(get_engine())
+
+    def setUp(self):
+        catalog.invalidate()
+        search._index = None
+        self.email = "catalog@aub.edu.lb"
+        delete_user(self.email)
+        create_user(self.email, "hash", is_verified=True)
+        soon = datetime.utcnow().replace(microsecond=0) + timedelta(days=3)
+        self.events = [
+            create_event(EventCreate(title=f"Catalog {name}", description="Snapshot test", date=soon + timedelta(hours=i),
+                                     location="West Hall", capacity=2, organizers=["CS Society"], speakers=["Dr. Lina"],
+                                     category=category, image_url="https://cdn.example.com/catalog.png"))
+            for i, (name, category) in enumerate([("talk", "Talks"), ("workshop", "Workshops")])
+        ]
+
+    def tearDown(self):
+        delete_user(self.email)
+        for event in self.events:
+            delete_event_by_id(event.id)
+        catalog.invalidate()
+
+    def _list(self, **params):
+        response = self.client.get("/api/events", {"q": "catalog", **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_list_and_detail_match_the_sql_path(self):
+        with self.settings(EVENT_CATALOG_SNAPSHOT=False):
+            expected_list = self._list()
+            expected_detail = self.client.get(f"/api/events/{self.events[0].id}").json()
+        self.assertEqual(self._list(), expected_list)
+        self.assertEqual(self.client.get(f"/api/events/{self.events[0].id}").json(), expected_detail)
+        self.assertEqual([e["title"] for e in self._list(category="Workshops")["events"]], ["Catalog workshop"])
+        update_event(self.events[1].id, EventUpdate(speakers=["Rami Khoury"]))
+        for snapshot in (True, False):
+            with self.settings(EVENT_CATALOG_SNAPSHOT=snapshot):
+                self.assertEqual([e["title"] for e in self._list(speaker="rami khoury")["events"]], ["Catalog workshop"])
+                self.assertEqual(len(self._list(organizer="CS Society")["events"]), 2)
+        self.assertEqual(self.client.get("/api/events/999999").status_code, 404)
+
+    def test_upcoming_means_after_now_in_the_event_time_zone(self):
+        # Started an hour ago in local time, which is still ahead of UTC in Beirut
+        started = event_now().replace(microsecond=0) - timedelta(hours=1)
+        self.assertGreater(started, datetime.utcnow())
+        update_event(self.events[0].id, EventUpdate(date=started))
+        for snapshot in (True, False):
+            with self.settings(EVENT_CATALOG_SNAPSHOT=snapshot):
+                self.assertEqual([e["title"] for e in self._list()["events"]], ["Catalog workshop"])
+
+    def test_facet_counts_agree_with_the_default_list(self):
+        past = datetime.utcnow().replace(microsecond=0) - timedelta(days=30)
+        self.events.append(create_event(EventCreate(
+            title="Catalog past", date=past, location="West Hall", capacity=2, organizers=["CS Society"],
+            speakers=["Dr. Lina"], category="Talks", image_url="https://cdn.example.com/catalog.png")))
+        for snapshot in (True, False):
+            with self.settings(EVENT_CATALOG_SNAPSHOT=snapshot):
+                body = self.client.get("/api/events").json()
+                listed = [(e["category"], datetime.fromisoformat(e["time"]) if e["time"] else None)
+                          for e in body["events"]]
+                self.assertEqual(body["facets"], facets_from_counts(count_facets(listed)))
+                self.assertNotIn(facet_week(past), body["facets"]["weeks"])
+
+    def test_seat_counts_are_fresh_without_a_rebuild(self):
+        snapshot = catalog.current_snapshot()
+        register_user_to_event(self.email, self.events[0].id)
+        detail = self.client.get(f"/api/events/{self.events[0].id}").json()
+        self.assertEqual(detail["available_seats"], 1)
+        self.assertIs(catalog.current_snapshot(), snapshot)
+
+        with Session(get_engine()) as session:
+            session.get(Events, self.events[1].id).available_seats = 0
+            session.commit()
+        self.assertEqual([e["title"] for e in self._list(has_seats="true")["events"]], ["Catalog talk"])
+
+    def test_crud_writes_swap_the_snapshot(self):
+        before = catalog.current_snapshot()
+        update_event(self.events[0].id, EventUpdate(title="Catalog renamed"))
+        self.assertEqual(self.client.get(f"/api/events/{self.events[0].id}").json()["title"], "Catalog renamed")
+        self.assertGreater(catalog.current_snapshot().version, before.version)
+
+    def test_other_workers_writes_are_picked_up_on_recheck(self):
+        snapshot = catalog.current_snapshot()
+        with Session(get_engine()) as session:
+            session.get(Events, self.events[0].id).title = "Catalog edited elsewhere"
+            session.commit()
+        bump_data_version(DATA_EVENTS)  # what the other worker's crud call does
+        self.assertIs(catalog.current_snapshot(), snapshot)  # within the recheck window
+        with self.settings(EVENT_CATALOG_RECHECK_SECONDS=0):
+            titles = [e["title"] for e in self._list()["events"]]
+        self.assertIn("Catalog edited elsewhere", titles)
+
+    def test_records_prebuild_json(self):
+        record = catalog.current_snapshot().by_id[self.events[0].id]
+        self.assertFalse(hasattr(record, "__dict__"))
+        data = json.loads(record.to_json(7))
+        self.assertEqual(data["available_seats"], 7)
+        self.assertEqual(data["time"], self.events[0].date.isoformat(timespec="seconds"))
+
+    def test_typo_search_falls_back_to_the_trigram_index(self):
+        for snapshot in (True, False):
+            with self.settings(EVENT_CATALOG_SNAPSHOT=snapshot):
+                events = self.client.get("/api/events", {"q": "Catalog wrkshop"}).json()["events"]
+                self.assertEqual(events[0]["title"], "Catalog workshop")
+
+        index = search.current_index()
+        update_event(self.events[1].id, EventUpdate(speakers=["Issam Fares"]))
+        self.assertIs(search.current_index(), index)  # applied in place, no rebuild
+        events = self.client.get("/api/events", {"q": "Isam Fares"}).json()["events"]
+        self.assertEqual(events[0]["id"], self.events[1].id)
+
+    def test_fuzzy_matches_are_limited_after_the_filters(self):
+        # 60 past near-duplicates, all newer (so ahead on ties) than the one upcoming match
+        upcoming = self.events[0]
+        update_event(upcoming.id, EventUpdate(title="Catalog seminar"))
+        past = datetime.utcnow().replace(microsecond=0) - timedelta(days=30)
+        self.events += [
+            create_event(EventCreate(title="Catalog seminar", date=past - timedelta(hours=i), location="West Hall",
+                                     capacity=2, organizers=["CS Society"], speakers=["Dr. Lina"],
+                                     image_url="https://cdn.example.com/catalog.png"))
+            for i in range(60)
+        ]
+        for snapshot in (True, False):
+            with self.settings(EVENT_CATALOG_SNAPSHOT=snapshot):
+                events = self.client.get("/api/events", {"q": "Catalog seminr"}).json()["events"]
+                self.assertEqual([e["id"] for e in events], [upcoming.id])
+
+
+class AdminListTests(TestCase):
+    """Admins list their own events, whatever the case their email was stored in."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        SQLModel.metadata.create_all(get_engine())
+
+    def setUp(self):
+        self.email = "list.admin@aub.edu.lb"
+        delete_user(self.email)
+        create_user(self.email, "hash", is_verified=True, is_admin=True)
+        bearer = jwt.encode({"email": self.email}, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {bearer}"}
+        soon = datetime.utcnow().replace(microsecond=0) + timedelta(days=3)
+        self.events = [
+            create_event(EventCreate(title=f"Admin list {i}", date=soon, location="West Hall", capacity=2,
+                                     organizers=["CS Society"], speakers=["Dr. Lina"], category="Talks",
+                                     image_url="https://cdn.example.com/admin.png"), created_by=created_by)
+            for i, created_by in enumerate(["List.Admin@AUB.edu.lb", self.email, "other.admin@aub.edu.lb"])
+        ]
+
+    def tearDown(self):
+        for event in self.events:
+            delete_event_by_id(event.id)
+        delete_user(self.email)
+
+    def test_mixed_case_creator_emails_match(self):
+        body = self.client.get("/api/events", {"q": "admin list"}, **self.auth).json()
+        self.assertEqual([e["title"] for e in body["events"]], ["Admin list 0", "Admin list 1"])
+        self.assertEqual(body["facets"]["categories"].get("Talks"), 2)
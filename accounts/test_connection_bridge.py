@@ -0,0 +1,64 @@
+from contextlib import nullcontext
+
+from django.db import connection, transaction
+from django.test import TestCase
+from sqlalchemy import create_engine
+from sqlmodel import Session, SQLModel, select
+
+from database.django_bridge import atomic, create_bridged_engine, is_bridged
+from database.tables import Users
+
+
+class ConnectionBridgeTests(TestCase):
+    """SQLModel on Django's connection: one connection, and Django's atomic() decides what commits."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # The URL only picks the dialect; connections come from Django's test database
+        cls.engine = create_bridged_engine("sqlite://")
+        SQLModel.metadata.create_all(cls.engine)
+
+    def _emails(self):
+        with Session(self.engine) as session:
+            return set(session.exec(select(Users.email).where(Users.email.like("bridge%"))).all())
+
+    def _django_count(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM users WHERE email LIKE 'bridge%%'")
+            return cursor.fetchone()[0]
+
+    def test_sqlmodel_writes_are_visible_to_django_in_the_same_transaction(self):
+        with atomic(self.engine):
+            with Session(self.engine) as session:
+                session.add(Users(email="bridge1@aub.edu.lb", fullname="b", password_hash="h"))
+                session.commit()
+            self.assertEqual(self._django_count(), 1)
+
+    def test_outer_rollback_undoes_sqlmodel_commits(self):
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                with Session(self.engine) as session:
+                    session.add(Users(email="bridge2@aub.edu.lb", fullname="b", password_hash="h"))
+                    session.commit()  # only releases a savepoint
+                self.assertEqual(self._emails(), {"bridge2@aub.edu.lb"})
+                raise ValueError
+        self.assertEqual(self._emails(), set())
+
+    def test_failed_sqlmodel_transaction_rolls_back_its_savepoint_only(self):
+        with transaction.atomic():
+            with Session(self.engine) as session:
+                session.add(Users(email="bridge3@aub.edu.lb", fullname="b", password_hash="h"))
+                session.commit()
+            with self.assertRaises(Exception):
+                with Session(self.engine) as session:
+                    session.add(Users(email="bridge3@aub.edu.lb", fullname="dup", password_hash="h"))
+                    session.commit()
+            self.assertEqual(self._emails(), {"bridge3@aub.edu.lb"})
+            self.assertFalse(connection.needs_rollback)
+
+    def test_atomic_is_a_no_op_without_the_bridge(self):
+        engine = create_engine("sqlite://")
+        self.assertFalse(is_bridged(engine))
+        self.assertTrue(is_bridged(self.engine))
+        self.assertIsInstance(atomic(engine), nullcontext)
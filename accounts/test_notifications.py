@@ -0,0 +1,83 @@
+import threading
+from datetime import datetime, timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from sqlmodel import SQLModel
+
+from backend import notifications
+from backend.crud import create_event, delete_event_by_id, update_event
+from backend.mailer import FakeTransport, format_event_date
+from backend.schemas import EventCreate, EventUpdate
+from database.database import create_user, delete_user, event_now, get_engine, register_user_to_event
+
+
+@override_settings(MAIL_TRANSPORT="fake")
+class ChangeNotificationTests(TestCase):
+    """Registrants hear about date/location/title changes and cancellations, sent off the request path."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        SQLModel.metadata.create_all(get_engine())
+
+    def setUp(self):
+        FakeTransport.outbox.clear()
+        self.emails = ["notify0@aub.edu.lb", "notify1@aub.edu.lb"]
+        for i, email in enumerate(self.emails):
+            delete_user(email)
+            create_user(email, "hash", fullname=f"Student {i}", is_verified=True)
+        self.event = create_event(EventCreate(
+            title="Notify talk", date=datetime(2031, 6, 2, 17, 0), location="West Hall", capacity=10,
+            organizers=["CS Society"], speakers=["Dr. Lina"], image_url="https://cdn.example.com/notify.png",
+        ))
+        for email in self.emails:
+            register_user_to_event(email, self.event.id)
+
+    def tearDown(self):
+        notifications.wait_for_pending(timeout=5)
+        for email in self.emails:
+            delete_user(email)
+        delete_event_by_id(self.event.id)
+
+    def test_date_and_location_changes_are_sent_to_the_roster(self):
+        update_event(self.event.id, EventUpdate(description="Now with pizza"))
+        update_event(self.event.id, EventUpdate(date=datetime(2031, 6, 3, 17, 0), location="College Hall"))
+        self.assertTrue(notifications.wait_for_pending(timeout=5))
+
+        [batch] = FakeTransport.outbox
+        self.assertEqual(batch.subject, "Event update: Notify talk")
+        self.assertIn("- Date: Tuesday 03 June 2031 at 17:00 EEST (was Monday 02 June 2031 at 17:00 EEST)", batch.body)
+        self.assertIn("- Location: College Hall (was West Hall)", batch.body)
+        self.assertNotIn("Title", batch.body)
+        self.assertEqual([(r.email, r.substitutions[notifications.NAME_TAG]) for r in batch.recipients],
+                         [(self.emails[0], "Student 0"), (self.emails[1], "Student 1")])
+
+    def test_cancellation_uses_the_roster_from_before_the_delete(self):
+        self.assertTrue(delete_event_by_id(self.event.id))
+        self.assertTrue(notifications.wait_for_pending(timeout=5))
+        [batch] = FakeTransport.outbox
+        self.assertEqual(batch.subject, "Event cancelled: Notify talk")
+        self.assertIn('"Notify talk" on Monday 02 June 2031 at 17:00 EEST, which', batch.body)
+        self.assertEqual({r.email for r in batch.recipients}, set(self.emails))
+
+    def test_dates_are_labelled_with_the_event_time_zone(self):
+        # One formatter for reminders and notifications; Beirut is EET in winter, EEST in summer
+        self.assertEqual(format_event_date(datetime(2031, 1, 14, 9, 30)), "Tuesday 14 January 2031 at 09:30 EET")
+        self.assertEqual(notifications._format("date", datetime(2031, 6, 2, 17, 0)),
+                         "Monday 02 June 2031 at 17:00 EEST")
+
+    def test_update_returns_before_the_mail_is_sent(self):
+        release = threading.Event()
+        with mock.patch.object(notifications, "send_batches", side_effect=lambda batches: release.wait(5) and []):
+            update_event(self.event.id, EventUpdate(location="Assembly Hall"))
+            self.assertFalse(notifications.wait_for_pending(timeout=0.05))  # still sending
+            release.set()
+            self.assertTrue(notifications.wait_for_pending(timeout=5))
+
+    def test_past_events_and_disabled_setting_notify_nobody(self):
+        with self.settings(EVENT_CHANGE_NOTIFICATIONS=False):
+            update_event(self.event.id, EventUpdate(location="Assembly Hall"))
+        update_event(self.event.id, EventUpdate(date=event_now() - timedelta(hours=1)))
+        notifications.wait_for_pending(timeout=5)
+        self.assertEqual(FakeTransport.outbox, [])
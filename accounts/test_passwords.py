@@ -0,0 +1,68 @@
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+from django.test import SimpleTestCase, override_settings
+
+from accounts import passwords
+
+
+class PasswordHashingTests(SimpleTestCase):
+    def setUp(self):
+        passwords._pool.cache_clear()
+        passwords._slots.cache_clear()
+
+    tearDown = setUp
+
+    @override_settings(PASSWORD_HASH_WORKERS=0, BCRYPT_ROUNDS=4)
+    def test_inline_hash_and_check(self):
+        hashed = passwords.hash_password("Secret123!")
+        self.assertEqual(passwords.hash_cost(hashed), 4)
+        self.assertTrue(passwords.check_password("Secret123!", hashed))
+        self.assertFalse(passwords.check_password("wrong", hashed))
+        self.assertFalse(passwords.check_password("Secret123!", "not-a-bcrypt-hash"))
+        self.assertFalse(passwords.check_password("Secret123!", None))
+
+    @override_settings(PASSWORD_HASH_WORKERS=0, BCRYPT_ROUNDS=5)
+    def test_needs_rehash_when_cost_changes(self):
+        with self.settings(BCRYPT_ROUNDS=4):
+            old = passwords.hash_password("Secret123!")
+        self.assertTrue(passwords.needs_rehash(old))
+        self.assertFalse(passwords.needs_rehash(passwords.hash_password("Secret123!")))
+
+    @override_settings(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_QUEUE=1, BCRYPT_ROUNDS=4)
+    def test_pool_rejects_when_queue_is_full(self):
+        hashed = passwords.hash_password("Secret123!")  # runs on the process pool
+        self.assertTrue(passwords.check_password("Secret123!", hashed))
+
+        slots = passwords._slots()
+        slots.acquire()  # another request holds the only slot
+        try:
+            with self.assertRaises(passwords.HashingBusy):
+                passwords.check_password("Secret123!", hashed)
+        finally:
+            slots.release()
+        passwords._pool().shutdown()
+
+    @override_settings(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_QUEUE=1, BCRYPT_ROUNDS=4)
+    def test_timed_out_hash_keeps_its_slot_until_it_finishes(self):
+        passwords.hash_password("warm-up")  # start the worker process
+        with self.settings(BCRYPT_ROUNDS=13, PASSWORD_HASH_TIMEOUT=0.01):
+            with self.assertRaises(passwords.HashingBusy):
+                passwords.hash_password("Secret123!")
+        # The slow hash is still running, so the queue is still full
+        with self.assertRaises(passwords.HashingBusy):
+            passwords.check_password("Secret123!", "$2b$04$" + "a" * 53)
+        slots = passwords._slots()
+        self.assertTrue(slots.acquire(timeout=10))  # released once the worker is done
+        slots.release()
+        passwords._pool().shutdown()
+
+    @override_settings(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_QUEUE=1, BCRYPT_ROUNDS=4)
+    def test_broken_pool_is_replaced(self):
+        broken = passwords._pool()
+        with self.assertRaises(BrokenProcessPool):
+            broken.submit(os._exit, 1).result(timeout=10)  # the worker dies, the pool is unusable
+        hashed = passwords.hash_password("Secret123!")
+        self.assertIsNot(passwords._pool(), broken)
+        self.assertTrue(passwords.check_password("Secret123!", hashed))
+        passwords._pool().shutdown()
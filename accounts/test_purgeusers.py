@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from sqlmodel import Session, SQLModel
+
+from database.database import (
+    TOKEN_RESET, create_event, create_user, delete_event, delete_user, get_auth_token, get_available_seats,
+    get_engine, get_user, register_user_to_event, set_auth_token,
+)
+from database.tables import Events
+
+
+class PurgeUsersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        SQLModel.metadata.create_all(get_engine())
+
+    def setUp(self):
+        self.purged = [f"purge{i}@purge_test.edu" for i in range(5)]
+        self.kept = "keep@purgextest.edu"  # '_' in the domain must not act as a LIKE wildcard
+        for email in self.purged + [self.kept]:
+            delete_user(email)
+            create_user(email, "hash", is_verified=True)
+        self.event = create_event("Purge test", capacity=10, available_seats=10, created_by=self.purged[0])
+        for email in self.purged[:3] + [self.kept]:
+            register_user_to_event(email, self.event.id)
+        set_auth_token(self.purged[1], TOKEN_RESET, "123456", datetime.utcnow() + timedelta(minutes=5))
+
+    def tearDown(self):
+        delete_user(self.kept)
+        for email in self.purged:
+            delete_user(email)
+        delete_event(self.event.id)
+
+    def test_dry_run_only_counts(self):
+        out = StringIO()
+        call_command("purgeusers", "--domain", "purge_test.edu", "--dry-run", stdout=out)
+        self.assertIn("5 users with @purge_test.edu emails, 3 registrations, 1 codes", out.getvalue())
+        self.assertIsNotNone(get_user(self.purged[0]))
+
+    def test_purge_deletes_in_batches_and_gives_seats_back(self):
+        out = StringIO()
+        call_command("purgeusers", "--domain", "PURGE_TEST.edu", "--batch-size", "2", "--yes-i-am-sure", stdout=out)
+        self.assertIn("Deleted 2/5 users", out.getvalue())
+        self.assertIn("Deleted 5 users", out.getvalue())
+        self.assertTrue(all(get_user(email) is None for email in self.purged))
+        self.assertIsNotNone(get_user(self.kept))
+        self.assertIsNone(get_auth_token(self.purged[1], TOKEN_RESET))
+        self.assertEqual(get_available_seats(self.event.id), 9)  # only the kept user's seat stays taken
+        with Session(get_engine()) as session:
+            self.assertIsNone(session.get(Events, self.event.id).created_by)  # the event itself is kept
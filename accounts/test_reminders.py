@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+
+from django.test import TestCase, override_settings
+from sqlmodel import Session, SQLModel, select
+
+from backend.crud import create_event, delete_event_by_id
+from backend.mailer import Batch, FakeTransport, Recipient, sendgrid_payload, send_batches, split_batch
+from backend.reminders import NAME_TAG, send_reminders
+from backend.schemas import EventCreate
+from database.database import create_user, delete_user, get_engine, register_user_to_event
+from database.tables import SentReminders
+
+
+class MailerTests(TestCase):
+    def setUp(self):
+        FakeTransport.outbox.clear()
+
+    def test_batches_are_split_at_the_personalization_limit(self):
+        batch = Batch("Hi", "Body", tuple(Recipient(f"u{i}@aub.edu.lb") for i in range(2500)))
+        self.assertEqual([len(part.recipients) for part in split_batch(batch)], [1000, 1000, 500])
+        results = send_batches([batch], FakeTransport(fail_for={"u1500@aub.edu.lb"}), concurrency=3)
+        self.assertEqual([sent for _, sent in results], [True, False, True])
+        self.assertEqual(len(FakeTransport.outbox), 2)
+
+    def test_sendgrid_payload_has_one_personalization_per_recipient(self):
+        batch = Batch("Reminder", f"Hi {NAME_TAG}", (Recipient("a@aub.edu.lb", {NAME_TAG: "Lina"}), Recipient("b@aub.edu.lb")))
+        payload = sendgrid_payload(batch, "noreply@aubevents.com")
+        self.assertEqual(payload["personalizations"], [
+            {"to": [{"email": "a@aub.edu.lb"}], "substitutions": {NAME_TAG: "Lina"}},
+            {"to": [{"email": "b@aub.edu.lb"}]},
+        ])
+        self.assertEqual(payload["content"], [{"type": "text/plain", "value": f"Hi {NAME_TAG}"}])
+
+    @override_settings(MAIL_TRANSPORT="django", EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+    def test_django_transport_renders_each_copy(self):
+        from django.core import mail
+
+        batch = Batch(f"For {NAME_TAG}", f"Hi {NAME_TAG}", (Recipient("a@aub.edu.lb", {NAME_TAG: "Lina"}),))
+        self.assertEqual(send_batches([batch])[0][1], True)
+        self.assertEqual((mail.outbox[0].subject, mail.outbox[0].body, mail.outbox[0].to),
+                         ("For Lina", "Hi Lina", ["a@aub.edu.lb"]))
+
+
+class SendRemindersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        SQLModel.metadata.create_all(get_engine())
+
+    def setUp(self):
+        FakeTransport.outbox.clear()
+        self.now = datetime(2031, 5, 1, 9, 0)
+        self.emails = [f"reminder{i}@aub.edu.lb" for i in range(3)]
+        for i, email in enumerate(self.emails):
+            delete_user(email)
+            create_user(email, "hash", fullname=f"Student {i}", is_verified=True)
+        self.events = [
+            create_event(EventCreate(title=title, date=self.now + offset, location="West Hall", capacity=10,
+                                     organizers=["CS Society"], speakers=["Dr. Lina"],
+                                     image_url="https://cdn.example.com/reminder.png"))
+            for title, offset in [("Soon", timedelta(hours=5)), ("Later", timedelta(days=3))]
+        ]
+        for email in self.emails:
+            register_user_to_event(email, self.events[0].id)
+        register_user_to_event(self.emails[0], self.events[1].id)
+
+    def tearDown(self):
+        with Session(get_engine()) as session:
+            for marker in session.exec(select(SentReminders).where(SentReminders.user_email.in_(self.emails))):
+                session.delete(marker)
+            session.commit()
+        for email in self.emails:
+            delete_user(email)
+        for event in self.events:
+            delete_event_by_id(event.id)
+
+    def test_due_registrations_are_sent_once_in_one_batch(self):
+        summary = send_reminders(now=self.now, transport=FakeTransport())
+        self.assertEqual(summary, {"due": 3, "sent": 3, "failed": 0, "skipped": 0})
+        [batch] = FakeTransport.outbox
+        self.assertEqual(batch.subject, "Reminder: Soon")
+        self.assertIn('"Soon" starts on Thursday 01 May 2031 at 14:00 EEST at West Hall', batch.body)
+        self.assertEqual([(r.email, r.substitutions[NAME_TAG]) for r in batch.recipients],
+                         [(email, f"Student {i}") for i, email in enumerate(self.emails)])
+
+        # Rerun: every reminder is marked as sent
+        self.assertEqual(send_reminders(now=self.now, transport=FakeTransport())["due"], 0)
+        # A wider window is a different reminder kind and reaches the later event too
+        self.assertEqual(send_reminders(window=timedelta(days=7), now=self.now, dry_run=True)["due"], 4)
+
+    def test_failed_batches_are_released_for_the_next_run(self):
+        summary = send_reminders(now=self.now, transport=FakeTransport(fail_for={self.emails[1]}), batch_size=2)
+        self.assertEqual(summary, {"due": 3, "sent": 1, "failed": 2, "skipped": 0})
+        summary = send_reminders(now=self.now, transport=FakeTransport())
+        self.assertEqual(summary, {"due": 2, "sent": 2, "failed": 0, "skipped": 0})
+        self.assertEqual(sorted(r.email for b in FakeTransport.outbox for r in b.recipients), self.emails)
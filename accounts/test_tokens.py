@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from sqlmodel import SQLModel
+
+from database.database import (
+    TOKEN_RESET, TOKEN_VERIFY, create_user, delete_user, get_auth_token, get_engine, get_user_snapshot,
+    set_auth_token,
+)
+
+
+class AuthTokenTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        SQLModel.metadata.create_all(get_engine())
+
+    def setUp(self):
+        self.email = "tokens@aub.edu.lb"
+        delete_user(self.email)
+        create_user(self.email, "hash")
+
+    def tearDown(self):
+        delete_user(self.email)
+
+    def test_set_replaces_code_and_requires_user(self):
+        expiry = datetime.utcnow() + timedelta(minutes=5)
+        self.assertTrue(set_auth_token(self.email, TOKEN_RESET, "111111", expiry))
+        self.assertTrue(set_auth_token(self.email, TOKEN_RESET, "222222", expiry))
+        self.assertEqual(get_auth_token(self.email, TOKEN_RESET)[0], "222222")
+        self.assertIsNone(get_auth_token(self.email, TOKEN_VERIFY))
+        self.assertFalse(set_auth_token("nobody@aub.edu.lb", TOKEN_RESET, "333333", expiry))
+
+    def test_snapshot_joins_codes_only_on_request(self):
+        set_auth_token(self.email, TOKEN_VERIFY, "444444", datetime.utcnow() + timedelta(minutes=5))
+        self.assertIsNone(get_user_snapshot(self.email).verification_token)
+        snapshot = get_user_snapshot(self.email, with_tokens=True)
+        self.assertEqual(snapshot.verification_token, "444444")
+        self.assertIsNone(snapshot.reset_code)
+
+    def test_sweeptokens_deletes_only_expired_codes(self):
+        set_auth_token(self.email, TOKEN_VERIFY, "555555", datetime.utcnow() - timedelta(minutes=1))
+        set_auth_token(self.email, TOKEN_RESET, "666666", datetime.utcnow() + timedelta(minutes=5))
+        out = StringIO()
+        call_command("sweeptokens", "--batch-size", "1", stdout=out)
+        self.assertIn("Deleted 1 expired code(s)", out.getvalue())
+        self.assertIsNone(get_auth_token(self.email, TOKEN_VERIFY))
+        self.assertIsNotNone(get_auth_token(self.email, TOKEN_RESET))
+
+    def test_delete_user_removes_codes(self):
+        set_auth_token(self.email, TOKEN_RESET, "777777", datetime.utcnow() + timedelta(minutes=5))
+        delete_user(self.email)
+        self.assertIsNone(get_auth_token(self.email, TOKEN_RESET))
@@ -0,0 +1,100 @@
+import io
+import shutil
+import tempfile
+
+import jwt
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from backend.storage import get_storage
+from database.database import create_user, delete_user
+
+
+def _png(color=(20, 120, 200)) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (900, 600), color=color).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+class ImageUploadTests(TestCase):
+    """Event image uploads against the local storage backend."""
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.override = override_settings(STORAGE_BACKEND="local", LOCAL_STORAGE_DIR=self.media)
+        self.override.enable()
+        get_storage.cache_clear()
+        self.email = "uploads@aub.edu.lb"
+        delete_user(self.email)
+        create_user(self.email, "hash", fullname="Upload Admin", is_verified=True, is_admin=True)
+        bearer = jwt.encode({"email": self.email}, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {bearer}"}
+
+    def tearDown(self):
+        delete_user(self.email)
+        self.override.disable()
+        get_storage.cache_clear()
+        shutil.rmtree(self.media, ignore_errors=True)
+
+    def _upload(self, data: bytes, name="poster.png"):
+        return self.client.post("/api/events/upload-image", {"image": SimpleUploadedFile(name, data)}, **self.auth)
+
+    def test_proxied_upload_is_transcoded_from_the_spooled_file_and_deduplicated(self):
+        response = self._upload(_png())
+        self.assertEqual(response.status_code, 201)
+        body = response.json()
+        self.assertTrue(body["path"].endswith("/full.webp"))
+        self.assertFalse(body["deduplicated"])
+        self.assertEqual(set(body["image_variants"]), {"thumb", "card", "full"})
+        self.assertEqual(get_storage().stat(body["path"])["content_type"], "image/webp")
+
+        again = self._upload(_png(), name="copy.png").json()
+        self.assertTrue(again["deduplicated"])
+        self.assertEqual(again["path"], body["path"])
+
+    def _direct_upload(self, content_type="image/png"):
+        response = self.client.post("/api/events/upload-url", {"content_type": content_type},
+                                    content_type="application/json", **self.auth)
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+
+    def _confirm(self, ticket):
+        return self.client.post("/api/events/upload-url/confirm", {"upload_token": ticket["upload_token"]},
+                                content_type="application/json", **self.auth)
+
+    def test_direct_upload_is_confirmed_after_checking_its_magic_bytes(self):
+        ticket = self._direct_upload()
+        put = self.client.generic("PUT", ticket["upload_url"], _png(), content_type="image/png")
+        self.assertEqual(put.status_code, 201)
+        response = self._confirm(ticket)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["image_url"].endswith(ticket["path"]))
+
+    def test_rejected_direct_uploads_are_deleted(self):
+        storage = get_storage()
+        for content_type, data in [("image/png", b"<?php echo 1; ?>" * 4), ("image/png", b"\xff\xd8\xff\xe0" + b"\0" * 32)]:
+            ticket = self._direct_upload(content_type)
+            storage.upload(ticket["path"], data, content_type)  # e.g. PUT straight to the storage server
+            response = self._confirm(ticket)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json()["error"], "Unsupported file type.")
+            self.assertIsNone(storage.stat(ticket["path"]))
+
+    def test_processing_errors_are_told_apart(self):
+        from unittest import mock
+        from backend import events_views, images
+
+        # A corrupt file is the client's fault ...
+        truncated = _png()[:200]
+        response = self._upload(truncated)
+        self.assertEqual(response.status_code, 400)
+        # ... an overloaded pool or a bug is not
+        with mock.patch.object(events_views, "process_in_pool", side_effect=images.ImageBusy()):
+            response = self._upload(_png(color=(1, 2, 3)))
+        self.assertEqual((response.status_code, response["Retry-After"]), (503, "5"))
+        with mock.patch.object(events_views, "process_in_pool", side_effect=RuntimeError("boom")):
+            with self.assertLogs("backend.events_views", "ERROR"):
+                response = self._upload(_png(color=(4, 5, 6)))
+        self.assertEqual(response.status_code, 500)
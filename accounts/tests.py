@@ -17,10 +17,10 @@ class PasswordResetTests(TestCase):
         self.client = APIClient()
         self.email = "test@aub.edu.lb"
         self.password = "TestPass123!"
-        from django.core.cache import cache
+        from backend.ratelimit import reset_rate_limits
         delete_user(self.email)  # Remove any existing user before each test
-        # Clear rate limit cache for this email
-        cache.delete(f"reset-rl-{self.email}")
+        # Clear rate limit buckets left by earlier tests
+        reset_rate_limits()
         pw_hash = bcrypt.hashpw(self.password.encode(), bcrypt.gensalt()).decode()
         create_user(self.email, pw_hash)
         update_is_verified(self.email, True)
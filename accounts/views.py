@@ -1,6 +1,5 @@
 # All imports at the top
 import re
-import bcrypt
 import secrets
 import random
 import jwt
@@ -8,20 +7,21 @@ import logging
 from datetime import datetime, timedelta
 from django.conf import settings
 from django.core.mail import send_mail
-from django.core.cache import cache
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
 import json
-import requests
+import time
+# Auth flows read a user once (get_user_snapshot) and write in at most one transaction
 from database.database import (
-    create_user, get_user, update_verification_token,
-    get_verification_token, get_verification_token_expiry,
-    update_is_verified,  get_password, get_is_verified,
-    update_reset_code, get_reset_code, get_reset_code_expiry
+    TOKEN_RESET, TOKEN_VERIFY, create_user, get_user_snapshot, set_auth_token, update_user_fields,
 )
 
+from backend.metrics import EMAILS_SENT, EMAIL_SEND_SECONDS, LOGINS, SIGNUPS
+from accounts.passwords import HashingBusy, check_password, hash_password, needs_rehash
+from backend.ratelimit import rate_limit
+
 logger = logging.getLogger(__name__)
 
 
@@ -37,7 +37,9 @@ def safe_send_mail(*args, **kwargs):
     recipient_list = kwargs.get('recipient_list') or (len(args) > 3 and args[3]) or []
 
     if settings.SENDGRID_API_KEY:
+        import requests  # only the email path needs it; keeps it out of worker/CLI startup
         logger.debug("Attempting SendGrid REST send from %s to %s", from_email, recipient_list)
+        started = time.perf_counter()
         try:
             resp = requests.post(
                 'https://api.sendgrid.com/v3/mail/send',
@@ -53,20 +55,27 @@ def safe_send_mail(*args, **kwargs):
                 }),
                 timeout=10
             )
+            EMAIL_SEND_SECONDS.observe(time.perf_counter() - started, transport="sendgrid")
             if 200 <= resp.status_code < 300:
                 logger.debug("SendGrid accepted message for %s", recipient_list)
+                EMAILS_SENT.inc(transport="sendgrid", result="success")
                 return 1
             else:
                 logger.warning("SendGrid API failure %s: %s", resp.status_code, resp.text[:300])
         except Exception as exc:
             logger.warning("SendGrid API exception: %s", exc)
+        EMAILS_SENT.inc(transport="sendgrid", result="failure")
         # fallback to Django backend if API attempt failed
+    started = time.perf_counter()
     try:
         logger.debug("Falling back to Django send_mail backend from %s", from_email)
-        return send_mail(*args, **kwargs)
+        sent = send_mail(*args, **kwargs)
     except Exception as exc:
         logger.warning("Django send_mail failed: %s", exc)
-        return 0
+        sent = 0
+    EMAIL_SEND_SECONDS.observe(time.perf_counter() - started, transport="django")
+    EMAILS_SENT.inc(transport="django", result="success" if sent else "failure")
+    return sent
 
 
 @csrf_exempt
@@ -90,6 +99,15 @@ def api_index(request):
         "notes": "Use POST for all except 'me' (GET). All bodies JSON."}, status=status.HTTP_200_OK)
 
 
+def _hashing_busy_response():
+    """429 returned when the password hashing queue is full (see accounts/passwords.py)."""
+    return Response(
+        {"error": "Server is busy, please try again in a moment."},
+        status=status.HTTP_429_TOO_MANY_REQUESTS,
+        headers={"Retry-After": "1"},
+    )
+
+
 def _auth_from_request(request):
     """Return user (or None) from Authorization: Bearer <jwt> header."""
     auth = request.headers.get("Authorization", "")
@@ -103,7 +121,7 @@ def _auth_from_request(request):
     email = payload.get("email")
     if not email:
         return None
-    return get_user(email)
+    return get_user_snapshot(email)
 
 
 @csrf_exempt
@@ -122,24 +140,19 @@ def me(request):
 
 @csrf_exempt
 @api_view(["POST"])
+# Max 3 requests per hour per email, shared by all workers (backend/ratelimit.py)
+@rate_limit("password_reset", ip="20/h", email="3/h",
+            message="Too many password reset requests. Please try again later.")
 def password_reset_request(request):
     # Extract email first
     email = request.data.get("email")
     if not email:
         return Response({"error": "Email is required."}, status=status.HTTP_400_BAD_REQUEST)
-    # Rate limit: max 3 requests per hour per email
-    key = f"reset-rl-{email}"
-    count = cache.get(key, 0)
-    if count >= 3:
-        return Response({"error": "Too many password reset requests. Please try again later."}, status=status.HTTP_429_TOO_MANY_REQUESTS)
-    cache.set(key, count + 1, timeout=3600)  # 1 hour
-    user = get_user(email)
-    if not user:
-        return Response({"error": "User not found."}, status=status.HTTP_404_NOT_FOUND)
-    # Generate a secure reset code (6-digit)
+    # Generate a secure reset code (6-digit) and store it; the write doubles as the existence check
     reset_code = str(random.randint(100000, 999999))
     expiry = datetime.utcnow() + timedelta(minutes=15)
-    update_reset_code(email, reset_code, expiry)
+    if not set_auth_token(email, TOKEN_RESET, reset_code, expiry):
+        return Response({"error": "User not found."}, status=status.HTTP_404_NOT_FOUND)
     # Send email with reset code
     safe_send_mail(
         subject="AUBEvents Password Reset",
@@ -181,37 +194,47 @@ def check_password_strength(password: str) -> tuple[bool, str]:
 
 @csrf_exempt
 @api_view(["POST"])
+@rate_limit("signup", ip="30/h", email="5/h")
 def signup(request):
     email = request.data.get("email")
     password = request.data.get("password")
 
     # 1. Validate input
     if not email or not password:
+        SIGNUPS.inc(result="invalid")
         return Response({"error": "Email and password are required."}, status=status.HTTP_400_BAD_REQUEST)
 
     # 2. Check domain
     if not is_aub_email(email):
+        SIGNUPS.inc(result="invalid")
         return Response({"error": "Only AUB (aub.edu.lb / mail.aub.edu) emails are allowed."}, status=status.HTTP_400_BAD_REQUEST)
 
     # 3. Enforce password strength
     ok, msg = check_password_strength(password)
     if not ok:
+        SIGNUPS.inc(result="weak_password")
         return Response({"error": msg}, status=status.HTTP_400_BAD_REQUEST)
 
     # 4. Check duplicate
-    if get_user(email):  # DB lookup
+    if get_user_snapshot(email):  # DB lookup
+        SIGNUPS.inc(result="conflict")
         return Response({"error": "Email already registered."}, status=status.HTTP_409_CONFLICT)
 
-    # 5. Hash password
-    pw_hash = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
-
-    # 6. Create user (inactive by default)
-    create_user(email, pw_hash)
+    # 5. Hash password (on the bounded hashing pool)
+    try:
+        pw_hash = hash_password(password)
+    except HashingBusy:
+        SIGNUPS.inc(result="busy")
+        return _hashing_busy_response()
 
-    # 7. Generate verification token
+    # 6. Generate verification token
     token = str(random.randint(100000, 999999))
     expiry = datetime.utcnow() + timedelta(hours=0.2)
-    update_verification_token(email, token, expiry)
+
+    # 7. Create user (inactive by default) together with its token in one transaction
+    if not create_user(email, pw_hash, auth_token=(TOKEN_VERIFY, token, expiry)):
+        SIGNUPS.inc(result="conflict")  # lost a race with a concurrent signup
+        return Response({"error": "Email already registered."}, status=status.HTTP_409_CONFLICT)
 
     # 8. Send verification email
     safe_send_mail(
@@ -222,6 +245,7 @@ def signup(request):
     )
 
     # 9. Respond (we'll change this to email verification)
+    SIGNUPS.inc(result="success")
     return Response(
         {"message": "Signup successful. Please verify your email.", "verification_token": token},
         status=status.HTTP_201_CREATED
@@ -229,6 +253,8 @@ def signup(request):
 
 @csrf_exempt
 @api_view(["POST"])
+# Verification codes are 6 digits: the per-email limit is what stops guessing
+@rate_limit("verify", ip="60/m", email="10/h")
 def verify(request):
     email = request.data.get("email")
     token = request.data.get("token")
@@ -237,17 +263,17 @@ def verify(request):
     if not email or not token:
         return Response({"error": "Email and token are required."}, status=status.HTTP_400_BAD_REQUEST)
 
-    # 2. Find user
-    user = get_user(email)
+    # 2. Find user (and its codes, in the same SELECT)
+    user = get_user_snapshot(email, with_tokens=True)
     if not user:
         return Response({"error": "User not found."}, status=status.HTTP_404_NOT_FOUND)
     # 3. Check if already verified
-    if get_is_verified(email):  # assuming Khalil’s Users model has `is_verified`
+    if user.is_verified:
        return Response({"message": "Account already verified."}, status=status.HTTP_200_OK)
 
     # 4. Get stored token + expiry
-    stored_token = get_verification_token(email)
-    expiry = get_verification_token_expiry(email)
+    stored_token = user.verification_token
+    expiry = user.verification_token_expiry
 
     if not stored_token or not expiry:
         return Response({"error": "No verification token found."}, status=status.HTTP_400_BAD_REQUEST)
@@ -259,48 +285,66 @@ def verify(request):
     if datetime.utcnow() > expiry:
         return Response({"error": "Token has expired."}, status=status.HTTP_400_BAD_REQUEST)
 
-    # 7.mark as verified
-    update_is_verified(email, True)
+    # 7.mark as verified (the code is spent)
+    update_user_fields(email, is_verified=True, clear_tokens=(TOKEN_VERIFY,))
 
     return Response({"message": "Account verified successfully."}, status=status.HTTP_200_OK)
 
     
 @csrf_exempt
 @api_view(["POST"])
+# Per-IP limits stay generous: campus NAT puts many students behind one address
+@rate_limit("login", ip="120/m", email="10/m")
 def login(request):
     email = request.data.get("email")
     password = request.data.get("password")
 
     # 1. Input validation
     if not email or not password:
+        LOGINS.inc(result="invalid")
         return Response(
             {"error": "Email and password are required."},
             status=status.HTTP_400_BAD_REQUEST
         )
 
     # 2. Check user exists
-    user = get_user(email)
+    user = get_user_snapshot(email)
     if not user:
+        LOGINS.inc(result="bad_credentials")
         return Response(
             {"error": "Invalid email or password."},
             status=status.HTTP_401_UNAUTHORIZED
         )
 
     # 3. Check if verified
-    if not get_is_verified(email):
+    if not user.is_verified:
+        LOGINS.inc(result="unverified")
         return Response(
             {"error": "Please verify your account first."},
             status=status.HTTP_403_FORBIDDEN
         )
 
-    # 4. Check password
-    stored_pw = get_password(email)
-    if not stored_pw or not bcrypt.checkpw(password.encode("utf-8"), stored_pw.encode("utf-8")):
+    # 4. Check password (on the bounded hashing pool)
+    stored_pw = user.password_hash
+    try:
+        password_ok = check_password(password, stored_pw)
+    except HashingBusy:
+        LOGINS.inc(result="busy")
+        return _hashing_busy_response()
+    if not password_ok:
+        LOGINS.inc(result="bad_credentials")
         return Response(
             {"error": "Invalid email or password."},
             status=status.HTTP_401_UNAUTHORIZED
         )
 
+    # Transparently move the stored hash to the current BCRYPT_ROUNDS
+    if needs_rehash(stored_pw):
+        try:
+            update_user_fields(email, password_hash=hash_password(password))
+        except HashingBusy:
+            pass  # try again on a later login
+
     # 5. Generate JWT
     payload = {
         "email": email,
@@ -308,6 +352,7 @@ def login(request):
         "iat": datetime.utcnow()
     }
     token = jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    LOGINS.inc(result="success")
 
     return Response(
         {
@@ -319,17 +364,18 @@ def login(request):
 
 @csrf_exempt
 @api_view(["POST"])
+@rate_limit("password_reset_confirm", ip="60/m", email="10/h")
 def password_reset_confirm(request):
     email = request.data.get("email")
     reset_code = request.data.get("reset_code")
     new_password = request.data.get("new_password")
     if not email or not reset_code or not new_password:
         return Response({"error": "Email, reset code, and new password are required."}, status=status.HTTP_400_BAD_REQUEST)
-    user = get_user(email)
+    user = get_user_snapshot(email, with_tokens=True)
     if not user:
         return Response({"error": "User not found."}, status=status.HTTP_404_NOT_FOUND)
-    stored_code = get_reset_code(email)
-    expiry = get_reset_code_expiry(email)
+    stored_code = user.reset_code
+    expiry = user.reset_code_expiry
     if not stored_code or not expiry:
         return Response({"error": "No reset code found. Please request a new one."}, status=status.HTTP_400_BAD_REQUEST)
     if stored_code != reset_code:
@@ -339,9 +385,10 @@ def password_reset_confirm(request):
     ok, msg = check_password_strength(new_password)
     if not ok:
         return Response({"error": msg}, status=status.HTTP_400_BAD_REQUEST)
-    pw_hash = bcrypt.hashpw(new_password.encode(), bcrypt.gensalt()).decode()
-    from database.database import update_password, update_reset_code
-    update_password(email, pw_hash)
-    # Clear reset code and expiry
-    update_reset_code(email, None, None)
+    try:
+        pw_hash = hash_password(new_password)
+    except HashingBusy:
+        return _hashing_busy_response()
+    # New password and spent reset code in a single transaction
+    update_user_fields(email, password_hash=pw_hash, clear_tokens=(TOKEN_RESET,))
     return Response({"message": "Password has been reset successfully."}, status=status.HTTP_200_OK)
\ No newline at end of file
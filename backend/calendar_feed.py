@@ -0,0 +1,161 @@
+"""
+calendar_feed.py
+----------------
+iCalendar (RFC 5545) feed of a user's registered events, for calendar apps subscribed to
+``GET /api/my/calendar.ics?token=...``.
+
+- Calendar apps cannot send a Bearer token, so the URL carries a signed token bound to the
+  user's email (``feed_token`` / ``email_from_token``); ``GET /api/my/calendar`` hands it out
+- A feed depends on two data versions: the user's registrations (bumped by
+  ``database.register_user_to_event`` / ``unregister_user_from_event``) and the "events" catalog
+  version (bumped by backend/crud.py on every event write). Both are read with one query and make
+  up the ETag, so a poll that changed nothing is answered 304 without touching any event row
+- Rendered feeds are cached (Django cache, CALENDAR_CACHE_SECONDS) under a key holding those
+  versions: a registration or an event edit moves the key, nothing has to be deleted
+- The body is rendered while it is streamed, in chunks of about CHUNK_SIZE bytes
+- Event dates are local times in EVENT_TIME_ZONE; the feed converts them to UTC, so every
+  calendar app shows them at the right time whatever its own time zone
+"""
+
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+
+from database.database import (
+    DATA_EVENTS, event_timezone, get_data_versions, get_user_events, registrations_key, use_primary,
+)
+
+FEED_SALT = "backend.calendar_feed"
+PRODID = "-//AUBEVENTS//Registered events//EN"
+CHUNK_SIZE = 16 * 1024
+
+
+def feed_token(email: str) -> str:
+    """Token for the feed URL of `email`; it stays valid until SECRET_KEY changes."""
+    return signing.dumps({"email": email}, salt=FEED_SALT)
+
+
+def email_from_token(token: str) -> Optional[str]:
+    try:
+        return signing.loads(token, salt=FEED_SALT).get("email")
+    except (signing.BadSignature, AttributeError):
+        return None
+
+
+def feed_versions(email: str) -> Tuple[int, int]:
+    """(registrations version of `email`, events version), in one query."""
+    names = [registrations_key(email), DATA_EVENTS]
+    versions = get_data_versions(names)
+    return versions[names[0]], versions[names[1]]
+
+
+def _email_digest(email: str) -> str:
+    return hashlib.sha256(email.lower().encode()).hexdigest()[:16]
+
+
+def feed_etag(email: str, versions: Tuple[int, int]) -> str:
+    return f'"{_email_digest(email)}-{versions[0]}-{versions[1]}"'
+
+
+def _cache_key(email: str, versions: Tuple[int, int]) -> str:
+    return f"calendar-feed:{_email_digest(email)}:{versions[0]}:{versions[1]}"
+
+
+# --- Rendering ---
+
+def escape_text(value: str) -> str:
+    """TEXT value escaping (RFC 5545 3.3.11)."""
+    return (value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n").replace("\r", "\\n"))
+
+
+def fold(line: str) -> str:
+    """`line` with CRLF, folded so that no physical line exceeds 75 octets (never inside a UTF-8 sequence)."""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts, limit = [], 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        while cut < len(encoded) and encoded[cut] & 0xC0 == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode("utf-8"))
+        encoded = encoded[cut:]
+        limit = 74  # continuation lines start with a space
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def format_utc(value: datetime) -> str:
+    """UTC DATE-TIME; naive datetimes are event dates, i.e. local times in EVENT_TIME_ZONE."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=event_timezone())
+    return value.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def render_feed(events: Iterable[dict], now: Optional[datetime] = None) -> Iterator[str]:
+    """Lines (CRLF-terminated) of a VCALENDAR holding `events` (dicts from get_user_events)."""
+    stamp = format_utc(now or datetime.now(timezone.utc))
+    duration = timedelta(minutes=int(getattr(settings, "CALENDAR_EVENT_MINUTES", 60)))
+    yield from ("BEGIN:VCALENDAR\r\n", "VERSION:2.0\r\n", fold(f"PRODID:{PRODID}"), "CALSCALE:GREGORIAN\r\n",
+                "METHOD:PUBLISH\r\n", "X-WR-CALNAME:AUBEVENTS\r\n", "X-PUBLISHED-TTL:PT1H\r\n")
+    for event in events:
+        start = event.get("date")
+        if start is None:
+            continue  # nothing to put in a calendar
+        lines = [
+            "BEGIN:VEVENT",
+            f"UID:event-{event['id']}@aubevents",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART:{format_utc(start)}",
+            f"DTEND:{format_utc(start + duration)}",
+            f"SUMMARY:{escape_text(event.get('title') or '')}",
+        ]
+        if event.get("location"):
+            lines.append(f"LOCATION:{escape_text(event['location'])}")
+        if event.get("description"):
+            lines.append(f"DESCRIPTION:{escape_text(event['description'])}")
+        if event.get("category"):
+            lines.append(f"CATEGORIES:{escape_text(event['category'])}")
+        lines.append("END:VEVENT")
+        yield from map(fold, lines)
+    yield "END:VCALENDAR\r\n"
+
+
+def _chunked(lines: Iterable[str]) -> Iterator[bytes]:
+    buffer: List[bytes] = []
+    size = 0
+    for line in lines:
+        data = line.encode("utf-8")
+        buffer.append(data)
+        size += len(data)
+        if size >= CHUNK_SIZE:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def feed_chunks(email: str, versions: Tuple[int, int]) -> Iterator[bytes]:
+    """The feed body of `email` at `versions`, from the cache or rendered (and cached) while streamed."""
+    key = _cache_key(email, versions)
+    body = cache.get(key)
+    if body is not None:
+        return iter((body,))
+    # From the primary: a lagging replica would get a stale feed cached under the new versions
+    with use_primary():
+        events = get_user_events(email)
+    return _render_and_cache(key, events)
+
+
+def _render_and_cache(key: str, events: List[dict]) -> Iterator[bytes]:
+    parts = []
+    for chunk in _chunked(render_feed(events)):
+        parts.append(chunk)
+        yield chunk
+    cache.set(key, b"".join(parts), int(getattr(settings, "CALENDAR_CACHE_SECONDS", 86400)))
@@ -0,0 +1,193 @@
+"""
+catalog.py
+----------
+Per-process, immutable snapshot of the event catalog for the public list, search and detail endpoints.
+
+- Built from one query (``database.get_catalog_rows``) into ``__slots__`` records that hold the
+  filter fields, the lowercased search text and a prebuilt JSON fragment with every field the API
+  returns except the seat count (dates are formatted once, at build time)
+- Tagged with the "events" data version, which backend/crud.py bumps on every create, update and
+  delete. A worker that sees a newer version builds a new snapshot and swaps it in with a single
+  assignment; requests keep using the snapshot they started with
+- The version is re-read at most every EVENT_CATALOG_RECHECK_SECONDS, so other workers' edits show
+  up within that window; writes made through this process invalidate the snapshot at once
+- Speaker/organizer filters compare ``database.name_key`` forms, as the SQL side tables do
+- available_seats changes on every registration, so it is never cached: each request overlays it
+  from one narrow ``(id, available_seats)`` query, which also drops events deleted in the meantime
+- A search with no substring match falls back to the ranked trigram index in backend/search.py
+
+Switched off with EVENT_CATALOG_SNAPSHOT=False (events_views then queries SQL as before).
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+
+from backend import search as fuzzy
+from database.database import (
+    DATA_EVENTS, count_facets, event_now, facets_from_counts, get_catalog_rows, get_data_version, get_seat_counts,
+    name_key,
+)
+
+# Above this many matches the seat overlay reads every event instead of an IN (...) list
+OVERLAY_ALL_THRESHOLD = 500
+_MISSING = object()
+
+
+class EventRecord:
+    """One event, reduced to what filtering needs plus its JSON without available_seats."""
+
+    __slots__ = ("id", "date", "category", "created_by", "speakers", "organizers", "search_text", "fragment")
+
+    def __init__(self, row):
+        self.id = row.id
+        self.date = row.date
+        self.category = row.category
+        self.created_by = row.created_by
+        self.speakers = frozenset(map(name_key, row.speakers or ()))
+        self.organizers = frozenset(map(name_key, row.organizers or ()))
+        self.search_text = "\0".join(v or "" for v in (row.title, row.description, row.location)).lower()
+        # Same fields and formatting as events_views._eventout_to_json
+        fields = {
+            "id": row.id,
+            "title": row.title,
+            "description": row.description,
+            "time": row.date.isoformat(timespec="seconds") if row.date else None,
+            "location": row.location,
+            "capacity": row.capacity,
+            "organizers": row.organizers or [],
+            "speakers": row.speakers or [],
+            "category": row.category,
+            "image_url": row.image_url,
+            "image_variants": row.image_variants or {},
+        }
+        self.fragment = json.dumps(fields)[:-1]  # left open for available_seats
+
+    def to_json(self, available_seats: Optional[int]) -> str:
+        return f'{self.fragment}, "available_seats": {json.dumps(available_seats)}}}'
+
+
+class Snapshot:
+    __slots__ = ("version", "records", "by_id")
+
+    def __init__(self, version: int, records: Iterable[EventRecord]):
+        self.version = version
+        self.records = tuple(records)  # listing order: date, then id
+        self.by_id = {record.id: record for record in self.records}
+
+
+_snapshot: Optional[Snapshot] = None
+_checked_at = 0.0
+_build_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return bool(getattr(settings, "EVENT_CATALOG_SNAPSHOT", True))
+
+
+def _recheck_seconds() -> float:
+    return float(getattr(settings, "EVENT_CATALOG_RECHECK_SECONDS", 1.0))
+
+
+def build_snapshot(version: int) -> Snapshot:
+    return Snapshot(version, (EventRecord(row) for row in get_catalog_rows()))
+
+
+def current_snapshot() -> Snapshot:
+    """The snapshot for the latest catalog version, rebuilt (by one thread) when it is stale."""
+    global _snapshot, _checked_at
+    snapshot = _snapshot
+    now = time.monotonic()
+    if snapshot is not None and now - _checked_at < _recheck_seconds():
+        return snapshot
+    # Read the version before the rows: a write racing the build leaves a newer version behind,
+    # so the next check rebuilds rather than keeping a snapshot that missed it
+    version = get_data_version(DATA_EVENTS)
+    if snapshot is None or snapshot.version != version:
+        with _build_lock:
+            snapshot = _snapshot
+            if snapshot is None or snapshot.version != version:
+                snapshot = build_snapshot(version)
+                _snapshot = snapshot
+    _checked_at = now
+    return snapshot
+
+
+def invalidate() -> None:
+    """Drop this process's snapshot (called by backend/crud.py after a catalog write)."""
+    global _snapshot
+    _snapshot = None
+
+
+def list_events_json(
+    search: Optional[str] = None,
+    category: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    has_seats: bool = False,
+    upcoming_only: bool = False,
+    speaker: Optional[str] = None,
+    organizer: Optional[str] = None,
+) -> List[str]:
+    """JSON objects of the matching events, with the same filters and order as crud.list_all_events."""
+    records = current_snapshot().records
+    if upcoming_only:
+        now = event_now()
+        records = [r for r in records if r.date is not None and r.date >= now]
+    if category:
+        records = [r for r in records if r.category == category]
+    if date_from is not None:
+        records = [r for r in records if r.date is not None and r.date >= date_from]
+    if date_to is not None:
+        records = [r for r in records if r.date is not None and r.date < date_to]
+    if speaker:
+        key = name_key(speaker)
+        records = [r for r in records if key in r.speakers]
+    if organizer:
+        key = name_key(organizer)
+        records = [r for r in records if key in r.organizers]
+    if search:
+        needle = search.lower()
+        matched = [r for r in records if needle in r.search_text]
+        if not matched and fuzzy.enabled():
+            # No substring match (typo?): ranked trigram matches instead, best first
+            by_id = {r.id: r for r in records}
+            matched = [by_id[event_id] for event_id in fuzzy.search_event_ids(search, candidates=set(by_id))]
+        records = matched
+
+    seats = get_seat_counts(None if len(records) > OVERLAY_ALL_THRESHOLD else [r.id for r in records])
+    out = []
+    for record in records:
+        available = seats.get(record.id, _MISSING)
+        if available is _MISSING:
+            continue  # deleted by another worker since the snapshot was built
+        if has_seats and not (available is not None and available > 0):
+            continue
+        out.append(record.to_json(available))
+    return out
+
+
+def facet_counts(upcoming_only: bool = False) -> dict:
+    """Category and week counts over the snapshot, scoped like list_events_json(upcoming_only=...)."""
+    records = current_snapshot().records
+    if upcoming_only:
+        now = event_now()
+        records = [r for r in records if r.date is not None and r.date >= now]
+    return facets_from_counts(count_facets((r.category, r.date) for r in records))
+
+
+def event_json(event_id: int) -> Optional[str]:
+    """JSON object of one event, or None if it does not exist."""
+    record = current_snapshot().by_id.get(event_id)
+    if record is None:
+        return None
+    available = get_seat_counts([event_id]).get(event_id, _MISSING)
+    if available is _MISSING:
+        return None
+    return record.to_json(available)
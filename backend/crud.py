@@ -26,16 +26,10 @@ from database.database import (
     register_user_to_event as db_register_user_to_event,
     unregister_user_from_event as db_unregister_user_from_event,
     get_user_events as db_get_user_events,
-    get_title,
-    get_description,
-    get_date,
-    get_location,
-    get_image_url,
+    get_event_record,
+    get_event_roster,
     get_capacity,
     get_available_seats,
-    get_speakers,
-    get_category,
-    get_organizer,
     update_title,
     update_description,
     update_date,
@@ -47,8 +41,19 @@ from database.database import (
     update_organizer,
     update_category,
     delete_event,
+    adjust_facet_counts,
+    get_facet_counts,
+    facet_week,
+    use_primary,
+    mark_written,
+    bump_data_version,
+    DATA_EVENTS,
 )
 from database.tables import Events
+from backend import catalog
+from backend import notifications
+from backend import search as fuzzy
+from backend.images import variant_urls
 
 
 # ------------------------
@@ -72,9 +77,17 @@ def _row_to_eventout(r: Any) -> EventOut:
         speakers=getattr(r, "speakers", []) or [],
         category=getattr(r, "category", None),
         image_url=getattr(r, "image_url", None),
+        image_variants=getattr(r, "image_variants", None) or {},
     )
 
 
+def _catalog_changed(event_id: int) -> None:
+    """Tell every worker's catalog snapshot (backend/catalog.py) and search index that events changed."""
+    version = bump_data_version(DATA_EVENTS)
+    catalog.invalidate()
+    fuzzy.event_changed(version, event_id)
+
+
 # ------------------------
 # Create
 # ------------------------
@@ -82,6 +95,8 @@ def create_event(event_in: EventCreate, created_by: Optional[str] = None) -> Eve
     """
     Create a new event in the DB.
     Sets available_seats = capacity initially.
+    Organizers and speakers are written with the row (and their side tables) in one insert.
+    WebP variant URLs are recorded when image_url points at a processed upload.
     """
     event = db_create_event(
         title=event_in.title,
@@ -93,13 +108,13 @@ def create_event(event_in: EventCreate, created_by: Optional[str] = None) -> Eve
         category=event_in.category if hasattr(event_in, 'category') else None,
         created_by=created_by,
         image_url=getattr(event_in, "image_url", None),
+        image_variants=variant_urls(getattr(event_in, "image_url", None)),
+        speakers=event_in.speakers,
+        organizers=event_in.organizers,
     )
-    # organizers & speakers (lists) handled if DB supports JSON/text arrays
-    if event_in.organizers:
-        update_organizer(event.id, event_in.organizers)
-    if event_in.speakers:
-        update_speakers(event.id, event_in.speakers)
 
+    adjust_facet_counts(event.category, event.date, +1)
+    _catalog_changed(event.id)
     return event
 
 
@@ -109,35 +124,37 @@ def create_event(event_in: EventCreate, created_by: Optional[str] = None) -> Eve
 def get_event(event_id: int) -> Optional[EventOut]:
     """
     Return a full event as EventOut for the frontend; None if not found.
-    (Pulls scalar fields using your DB accessors.)
+    (One primary-key lookup; served by a read replica when DATABASE_REPLICA_URLS is set.)
     """
-    title = get_title(event_id)
-    if title is None:
+    row = get_event_record(event_id)
+    if row is None:
         return None
-
-    return EventOut(
-        id=event_id,
-        title=title,
-        description=get_description(event_id),
-        date=get_date(event_id),
-        location=get_location(event_id),
-        capacity=get_capacity(event_id),
-        available_seats=get_available_seats(event_id),
-        organizers=get_organizer(event_id) or [],
-        speakers=get_speakers(event_id) or [],
-        category=get_category(event_id),
-        image_url=get_image_url(event_id),
-    )
+    return _row_to_eventout(row)
 
 
-def list_all_events(search: Optional[str] = None) -> List[EventOut]:
+def list_all_events(search: Optional[str] = None, **filters) -> List[EventOut]:
     """
     Return events as EventOut; if `search` provided, filter by title/location/description.
+    Extra `filters` (category, date_from, date_to, has_seats, upcoming_only, speaker, organizer)
+    are applied in SQL.
+    A search without substring matches falls back to the fuzzy trigram index (backend/search.py).
     """
-    rows = db_list_events(search)
+    rows = db_list_events(search, **filters)
+    if search and not rows and fuzzy.enabled():
+        # Ranked among the events that pass the filters, so excluded ones never take a slot
+        by_id = {r.id: r for r in db_list_events(None, **filters)}
+        rows = [by_id[event_id] for event_id in fuzzy.search_event_ids(search, candidates=set(by_id))]
     return [_row_to_eventout(r) for r in rows]
 
 
+def list_facets(upcoming_only: bool = False, created_by: Optional[str] = None) -> dict:
+    """
+    Return facet counts per category and per week over the events the matching listing covers:
+    precomputed (see EventFacets) for the whole catalog, counted for upcoming_only / created_by.
+    """
+    return get_facet_counts(upcoming_only=upcoming_only, created_by=created_by)
+
+
 # ------------------------
 # Update (PATCH)
 # ------------------------
@@ -146,7 +163,16 @@ def update_event(event_id: int, event_in: EventUpdate) -> Optional[EventOut]:
     Partially update an event (PATCH). Only apply provided fields.
     Adjust available seats logically when capacity changes.
     Returns the updated EventOut, or None if the event no longer exists.
+    Registrants are notified in the background when the title, date or location changed.
     """
+    # Remember the event before the write, so facet counts can follow it and registrants see the diff
+    moves_facets = event_in.date is not None or getattr(event_in, "category", None) is not None
+    notifies = any(getattr(event_in, field, None) is not None for field in notifications.NOTIFIED_FIELDS)
+    before = None
+    if moves_facets or notifies:
+        with use_primary():
+            before = get_event_record(event_id)
+
     # title, desc, date, etc.
     if event_in.title is not None:
         update_title(event_id, event_in.title)
@@ -157,7 +183,7 @@ def update_event(event_id: int, event_in: EventUpdate) -> Optional[EventOut]:
     if event_in.location is not None:
         update_location(event_id, event_in.location)
     if getattr(event_in, "image_url", None) is not None:
-        update_image_url(event_id, event_in.image_url)
+        update_image_url(event_id, event_in.image_url, variant_urls(event_in.image_url))
     if event_in.organizers is not None:
         update_organizer(event_id, event_in.organizers)
     if event_in.speakers is not None:
@@ -182,7 +208,31 @@ def update_event(event_id: int, event_in: EventUpdate) -> Optional[EventOut]:
                 new_available = min(old_available, event_in.capacity)
             update_available_seats(event_id, new_available)
 
-    return get_event(event_id)
+    # Read back from the primary: a replica may not have the update yet
+    with use_primary():
+        row = get_event_record(event_id)
+    updated = _row_to_eventout(row) if row is not None else None
+    if row is not None:
+        mark_written(row.created_by)  # the creator's admin list reads the primary for a while
+    if updated and moves_facets and before is not None:
+        _move_facets(before.category, before.date, updated.category, updated.date)
+    if updated:
+        _catalog_changed(event_id)
+    if updated and notifies and before is not None:
+        notifications.event_updated(event_id, before, updated)
+    return updated
+
+
+def _move_facets(old_category, old_date, new_category, new_date) -> None:
+    """Shift facet counts of one event from its old buckets to its new ones."""
+    if old_category != new_category:
+        adjust_facet_counts(old_category, None, -1)
+        adjust_facet_counts(new_category, None, +1)
+    old_week = facet_week(old_date) if old_date else None
+    new_week = facet_week(new_date) if new_date else None
+    if old_week != new_week:
+        adjust_facet_counts(None, old_date, -1)
+        adjust_facet_counts(None, new_date, +1)
 
 
 # ------------------------
@@ -190,9 +240,21 @@ def update_event(event_id: int, event_in: EventUpdate) -> Optional[EventOut]:
 # ------------------------
 def delete_event_by_id(event_id: int) -> bool:
     """
-    Delete event and return True if successful.
+    Delete event (soft delete, see database.delete_event) and return True if successful.
+    Registrants (snapshotted before the delete) are told of the cancellation in the background.
     """
-    return delete_event(event_id)
+    with use_primary():
+        before = get_event_record(event_id)
+    if before is None:
+        return False
+    roster = get_event_roster(event_id) if notifications.enabled() else []
+    deleted = delete_event(event_id)
+    if deleted:
+        mark_written(before.created_by)
+        adjust_facet_counts(before.category, before.date, -1)
+        _catalog_changed(event_id)
+        notifications.event_cancelled(before, roster)
+    return deleted
 
 
 # -----------------------------------------------
@@ -253,6 +315,8 @@ def list_user_events(user_email: str, search: Optional[str] = None) -> List[Even
                 organizers=r.get('organizers') or [],
                 speakers=r.get('speakers') or [],
                 category=r.get('category'),
+                image_url=r.get('image_url'),
+                image_variants=r.get('image_variants') or {},
             ))
         else:
             out.append(_row_to_eventout(r))
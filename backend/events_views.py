@@ -1,19 +1,21 @@
 from __future__ import annotations
 
 import json
-import mimetypes
-import os
-from datetime import datetime
+import logging
+from datetime import datetime, timedelta
 from typing import Any, Dict
 from uuid import uuid4
 
-from django.http import JsonResponse, HttpRequest
+from django.http import HttpResponse, JsonResponse, HttpRequest, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings
+from django.core import signing
 from django.utils import timezone
+from django.utils.http import parse_etags
 
 import jwt
 
+from backend import calendar_feed, catalog
 from backend.schemas import EventCreate, EventUpdate, UserEventAction
 from backend.crud import (
     create_event,
@@ -21,13 +23,30 @@ from backend.crud import (
     update_event,
     delete_event_by_id,
     list_all_events,
+    list_facets,
     register_user,
     unregister_user,
     list_user_events,
 )
-from database.database import get_user
-from backend.supabase_client import get_supabase_client
-from storage3.types import CreateOrUpdateBucketOptions
+from database.database import get_user_snapshot
+from backend.metrics import EVENT_REGISTRATIONS, EVENT_UNREGISTRATIONS
+from backend.storage import StorageError, get_storage
+from backend.uploads import install_hashing_handler, upload_digest
+from backend.images import (
+    FORMAT_CONTENT_TYPES,
+    FORMAT_EXTENSIONS,
+    MAX_IMAGE_BYTES,
+    WEBP_CONTENT_TYPE,
+    ImageBusy,
+    InvalidImage,
+    can_transcode,
+    process_in_pool,
+    sniff_image_format,
+    variant_path,
+    variant_urls,
+)
+
+logger = logging.getLogger(__name__)
 
 
 def _auth_from_request(request: HttpRequest):
@@ -42,7 +61,7 @@ def _auth_from_request(request: HttpRequest):
     email = payload.get("email")
     if not email:
         return None
-    return get_user(email)
+    return get_user_snapshot(email)
 
 
 def _emails_match(a: str | None, b: str | None) -> bool:
@@ -72,6 +91,47 @@ def _parse_json(request: HttpRequest) -> Dict[str, Any]:
         return {}
 
 
+_TRUTHY = {"1", "true", "yes", "on"}
+
+
+def _parse_list_filters(request: HttpRequest, default_include_past: bool = False):
+    """Read the list filters from the query string.
+
+    Supports ?category=, ?from= and ?to= (ISO 8601; a date-only `to` includes that whole day),
+    ?has_seats=true, ?speaker= / ?organizer= (one exact name, case-insensitive) and ?include_past=1. Past events are left out unless include_past is set;
+    `default_include_past` decides when the parameter is absent. Returns (filters, error_message).
+    """
+    filters: Dict[str, Any] = {}
+    category = (request.GET.get("category") or "").strip()
+    if category and category.lower() != "all":
+        filters["category"] = category
+    for param, key in (("from", "date_from"), ("to", "date_to")):
+        raw = (request.GET.get(param) or "").strip()
+        if not raw:
+            continue
+        try:
+            value = datetime.fromisoformat(raw)
+        except ValueError:
+            return None, f"Invalid '{param}' date (expected ISO 8601)"
+        if key == "date_to" and len(raw) == 10:
+            value += timedelta(days=1)
+        filters[key] = value
+    for param in ("speaker", "organizer"):
+        name = (request.GET.get(param) or "").strip()
+        if name:
+            filters[param] = name
+    if (request.GET.get("has_seats") or "").strip().lower() in _TRUTHY:
+        filters["has_seats"] = True
+    include_past = request.GET.get("include_past")
+    if include_past is None:
+        include_past = default_include_past
+    else:
+        include_past = include_past.strip().lower() in _TRUTHY
+    if not include_past:
+        filters["upcoming_only"] = True
+    return filters, None
+
+
 def _eventout_to_json(evt) -> Dict[str, Any]:
     if not evt:
         return None
@@ -88,6 +148,7 @@ def _eventout_to_json(evt) -> Dict[str, Any]:
         "speakers": getattr(evt, "speakers", []) or [],
         "category": getattr(evt, "category", None),
         "image_url": getattr(evt, "image_url", None),
+        "image_variants": getattr(evt, "image_variants", None) or {},
     }
 
 
@@ -96,13 +157,18 @@ def events_create(request: HttpRequest):
     if request.method == "GET":
         # Check if user is an admin - if so, show only their events
         user = _auth_from_request(request)
-        if user and getattr(user, "is_admin", False):
+        is_admin = bool(user and getattr(user, "is_admin", False))
+        # Students only see upcoming events by default; admins manage their whole history
+        filters, error = _parse_list_filters(request, default_include_past=is_admin)
+        if error:
+            return JsonResponse({"error": error}, status=400)
+        if is_admin:
             # Admin user - show only events created by this admin
             q = request.GET.get('q') or request.GET.get('search') or None
             
-            # Get raw database rows and filter by created_by before converting to EventOut
+            # Get raw database rows filtered by created_by in SQL (case-insensitive, like _emails_match)
             from backend.crud import db_list_events
-            raw_events = db_list_events(q)
+            raw_events = db_list_events(q, created_by=user.email, **filters)
             
             # Filter events by creator
             filtered_events = [
@@ -124,14 +190,23 @@ def events_create(request: HttpRequest):
                     "speakers": getattr(e, "speakers", []) or [],
                     "category": getattr(e, "category", None),
                     "image_url": getattr(e, "image_url", None),
+                    "image_variants": getattr(e, "image_variants", None) or {},
                 }
                 for e in filtered_events
             ]
-            return JsonResponse({"events": items})
+            facets = list_facets(upcoming_only=filters.get("upcoming_only", False), created_by=user.email)
+            return JsonResponse({"events": items, "facets": facets})
         else:
             # Public list of events (for regular users and non-authenticated)
             # Support optional search query param 'q' to filter by title/location/description
+            # plus category/from/to/has_seats filters (see _parse_list_filters)
             q = request.GET.get('q') or request.GET.get('search') or None
+            if catalog.enabled():
+                # Served from the in-memory snapshot, with fresh seat counts (backend/catalog.py)
+                events = ", ".join(catalog.list_events_json(q, **filters))
+                facets = catalog.facet_counts(filters.get("upcoming_only", False))
+                body = f'{{"events": [{events}], "facets": {json.dumps(facets)}}}'
+                return HttpResponse(body, content_type="application/json")
             items = [
                 {
                     "id": e.id,
@@ -145,10 +220,12 @@ def events_create(request: HttpRequest):
                     "speakers": getattr(e, "speakers", []) or [],
                     "category": getattr(e, "category", None),
                     "image_url": getattr(e, "image_url", None),
+                    "image_variants": getattr(e, "image_variants", None) or {},
                 }
-                for e in list_all_events(q)
+                for e in list_all_events(q, **filters)
             ]
-            return JsonResponse({"events": items})
+            facets = list_facets(upcoming_only=filters.get("upcoming_only", False))
+            return JsonResponse({"events": items, "facets": facets})
     if request.method != "POST":
         return JsonResponse({"error": "Method not allowed"}, status=405)
     
@@ -190,6 +267,10 @@ def events_detail(request: HttpRequest, event_id: int):
     method = request.method.upper()
 
     if method == "GET":
+        body = catalog.event_json(event_id) if catalog.enabled() else None
+        if body is not None:
+            return HttpResponse(body, content_type="application/json")
+        # Not in the snapshot (disabled, or created by another worker since it was built)
         evt = get_event(event_id)
         if not evt:
             return JsonResponse({"error": "Not found"}, status=404)
@@ -212,7 +293,7 @@ def events_detail(request: HttpRequest, event_id: int):
         
         with Session(get_engine()) as session:
             db_event = session.get(Events, event_id)
-            if not db_event:
+            if not db_event or db_event.deleted_at is not None:
                 return JsonResponse({"error": "Not found"}, status=404)
             if not _emails_match(db_event.created_by, admin_user.email):
                 return JsonResponse({"error": "You can only edit events you created"}, status=403)
@@ -248,7 +329,7 @@ def events_detail(request: HttpRequest, event_id: int):
         
         with Session(get_engine()) as session:
             db_event = session.get(Events, event_id)
-            if not db_event:
+            if not db_event or db_event.deleted_at is not None:
                 return JsonResponse({"error": "Not found"}, status=404)
             if not _emails_match(db_event.created_by, admin_user.email):
                 return JsonResponse({"error": "You can only delete events you created"}, status=403)
@@ -270,85 +351,257 @@ def events_upload_image(request: HttpRequest):
     if not admin_user:
         return JsonResponse({"error": "Admin privileges required"}, status=403)
 
-    client = get_supabase_client()
-    if client is None:
-        return JsonResponse({"error": "Supabase storage is not configured."}, status=503)
+    # Hash the file while Django spools it to disk (before request.FILES is touched)
+    install_hashing_handler(request)
+
+    storage = get_storage()
+    if storage is None:
+        return JsonResponse({"error": "Image storage is not configured."}, status=503)
 
     uploaded = request.FILES.get("image")
     if not uploaded:
         return JsonResponse({"error": "Missing file field 'image'."}, status=400)
 
-    allowed_ext = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
-    _, ext = os.path.splitext(uploaded.name or "upload")
-    ext = ext.lower()
-    if ext not in allowed_ext:
-        guessed_ext = mimetypes.guess_extension(uploaded.content_type or "")
-        if guessed_ext in allowed_ext:
-            ext = guessed_ext
-        else:
-            return JsonResponse({"error": "Unsupported file type."}, status=400)
-
-    if uploaded.size and uploaded.size > 8 * 1024 * 1024:
+    if uploaded.size and uploaded.size > MAX_IMAGE_BYTES:
         return JsonResponse({"error": "Image exceeds 8 MB limit."}, status=400)
 
-    bucket = getattr(settings, "SUPABASE_BUCKET", "event-images")
-    storage_client = client.storage
+    # Trust the file's magic bytes, not its name or the browser-supplied Content-Type
+    image_format = sniff_image_format(uploaded.read(16))
+    uploaded.seek(0)
+    if image_format is None:
+        return JsonResponse({"error": "Unsupported file type."}, status=400)
+
+    # Bucket provisioning runs once per process (cached); every later upload skips it
+    try:
+        storage.ensure_ready()
+    except StorageError as exc:
+        return JsonResponse({"error": str(exc)}, status=500)
+
+    # Content-addressed object paths: identical images map to the same objects
+    digest = upload_digest(request, "image")
+    prefix = f"events/{digest[:2]}/{digest}" if digest else f"events/{timezone.now():%Y/%m/%d}/{uuid4().hex}"
+    transcode = can_transcode()
+    if transcode:
+        content_type = WEBP_CONTENT_TYPE
+        object_path = variant_path(prefix, "full")  # written last, so it marks a complete set
+    else:
+        content_type = f"image/{image_format}"
+        object_path = prefix + FORMAT_EXTENSIONS[image_format]
+
     try:
-        existing_buckets = {bucket_info.name for bucket_info in storage_client.list_buckets()}
-    except Exception as exc:
-        return JsonResponse({"error": f"Failed to list Supabase buckets: {exc}"}, status=500)
+        deduplicated = bool(digest) and storage.exists(object_path)
+    except StorageError:
+        deduplicated = False
 
-    if bucket not in existing_buckets:
+    if not deduplicated:
         try:
-            options = CreateOrUpdateBucketOptions(public=getattr(settings, "SUPABASE_BUCKET_PUBLIC", True))
-            storage_client.create_bucket(bucket, options=options)
-        except Exception as exc:
-            return JsonResponse({"error": f"Failed to create Supabase bucket '{bucket}': {exc}"}, status=500)
+            if transcode:
+                # Resize + WebP re-encode (strips metadata) on the image worker pool, reading the
+                # spooled temp file; the original is not kept, as it still carries EXIF/GPS data
+                try:
+                    variants = process_in_pool(uploaded.temporary_file_path())
+                except InvalidImage as exc:
+                    return JsonResponse({"error": f"Could not process image: {exc}"}, status=400)
+                except ImageBusy:
+                    # Server-side overload, not the client's fault
+                    response = JsonResponse({"error": "Image processing is busy, please try again in a moment."},
+                                            status=503)
+                    response["Retry-After"] = "5"
+                    return response
+                except Exception:
+                    logger.exception("Image processing failed")
+                    return JsonResponse({"error": "Could not process image."}, status=500)
+                for name, data in variants.items():
+                    storage.upload(variant_path(prefix, name), data, content_type)
+            else:
+                # Stream the spooled upload to storage (resumable, chunk by chunk) instead of reading it into memory
+                storage.upload_file(object_path, uploaded, content_type)
+        except StorageError as exc:
+            return JsonResponse({"error": str(exc)}, status=500)
+
+    public_url = storage.public_url(object_path)
+    return JsonResponse({
+        "image_url": public_url,
+        "image_variants": variant_urls(public_url),
+        "path": object_path,
+        "content_type": content_type,
+        "content_hash": digest,
+        "deduplicated": deduplicated,
+    }, status=201)
 
-    storage = storage_client.from_(bucket)
 
-    timestamp = timezone.now()
-    object_path = f"events/{timestamp:%Y/%m/%d}/{uuid4().hex}{ext}"
-    content_type = uploaded.content_type or mimetypes.guess_type(uploaded.name or "")[0] or "application/octet-stream"
+# Direct uploads: the browser PUTs the file straight to storage with a signed URL, then confirms.
+# Confirm tokens are bound to the admin and path that were issued, so only those objects can be recorded.
+DIRECT_UPLOAD_SALT = "backend.events_views.direct-upload"
 
-    try:
-        upload_response = storage.upload(
-            object_path,
-            uploaded.read(),
-            {"contentType": content_type}
-        )
-    except Exception as exc:
-        return JsonResponse({"error": f"Supabase upload failed: {exc}"}, status=400)
-
-    error = getattr(upload_response, "error", None)
-    if error:
-        return JsonResponse({"error": str(error)}, status=500)
-
-    public_response = storage.get_public_url(object_path)
-    public_url = None
-    if isinstance(public_response, dict):
-        public_url = public_response.get("publicUrl") or public_response.get("public_url")
-        if not public_url and isinstance(public_response.get("data"), dict):
-            public_url = public_response["data"].get("publicUrl")
-    elif hasattr(public_response, "data"):
-        data_attr = public_response.data
-        if isinstance(data_attr, dict):
-            public_url = data_attr.get("publicUrl")
-        else:
-            public_url = data_attr
 
-    if not public_url:
-        # Fallback to manual construction (bucket must be public)
-        base_url = getattr(settings, "SUPABASE_URL", "").rstrip("/")
-        public_url = f"{base_url}/storage/v1/object/public/{bucket}/{object_path}" if base_url else object_path
+def _signed_upload_ttl() -> int:
+    return int(getattr(settings, "SIGNED_UPLOAD_TTL", 300))
 
+
+@csrf_exempt
+def events_upload_url(request: HttpRequest):
+    """Issue a short-lived signed URL for uploading an event image directly to storage.
+
+    POST body: { "content_type": "image/jpeg" | "image/png" | "image/gif" | "image/webp" }
+    Returns { upload_url, method, headers, path, upload_token, expires_in }.
+    Images uploaded this way are stored as-is (no WebP variants are generated).
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+    admin_user = _require_admin(request)
+    if not admin_user:
+        return JsonResponse({"error": "Admin privileges required"}, status=403)
+
+    storage = get_storage()
+    if storage is None:
+        return JsonResponse({"error": "Image storage is not configured."}, status=503)
+
+    content_type = str(_parse_json(request).get("content_type") or "").lower()
+    image_format = next((f for f, ct in FORMAT_CONTENT_TYPES.items() if ct == content_type), None)
+    if image_format is None:
+        return JsonResponse({"error": "Unsupported file type."}, status=400)
+
+    try:
+        storage.ensure_ready()
+        object_path = f"events/direct/{timezone.now():%Y/%m/%d}/{uuid4().hex}{FORMAT_EXTENSIONS[image_format]}"
+        signed = storage.create_signed_upload(object_path, content_type)
+    except StorageError as exc:
+        return JsonResponse({"error": str(exc)}, status=500)
+
+    upload_token = signing.dumps({"path": object_path, "email": admin_user.email}, salt=DIRECT_UPLOAD_SALT)
     return JsonResponse({
-        "image_url": public_url,
+        "upload_url": signed["url"],
+        "method": signed["method"],
+        "headers": signed["headers"],
         "path": object_path,
-        "content_type": content_type,
+        "upload_token": upload_token,
+        "expires_in": _signed_upload_ttl(),
+        "max_bytes": MAX_IMAGE_BYTES,
     }, status=201)
 
 
+@csrf_exempt
+def events_upload_confirm(request: HttpRequest):
+    """Verify a direct upload and return (and optionally record) its public URL.
+
+    POST body: { "upload_token": str, "event_id"?: number }
+    With event_id, the image becomes that event's image_url (admin must be the event's creator).
+    The object's size and magic bytes are checked; an upload that fails confirmation is deleted.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+    admin_user = _require_admin(request)
+    if not admin_user:
+        return JsonResponse({"error": "Admin privileges required"}, status=403)
+
+    storage = get_storage()
+    if storage is None:
+        return JsonResponse({"error": "Image storage is not configured."}, status=503)
+
+    data = _parse_json(request)
+    try:
+        # Twice the upload window, so an upload started just before expiry can still be confirmed
+        claims = signing.loads(str(data.get("upload_token") or ""), salt=DIRECT_UPLOAD_SALT,
+                               max_age=2 * _signed_upload_ttl())
+    except signing.BadSignature:
+        return JsonResponse({"error": "Invalid or expired upload token."}, status=400)
+    if not _emails_match(claims.get("email"), admin_user.email):
+        return JsonResponse({"error": "Invalid or expired upload token."}, status=400)
+    object_path = claims["path"]
+
+    def reject(message: str, status: int) -> JsonResponse:
+        # A direct upload that is not confirmed would otherwise stay in the bucket for good
+        try:
+            storage.delete(object_path)
+        except StorageError:
+            pass
+        return JsonResponse({"error": message}, status=status)
+
+    event_id = data.get("event_id")
+    if event_id is not None:
+        try:
+            event_id = int(event_id)
+        except Exception:
+            return reject("event_id must be an integer", 400)
+        from database.database import get_engine
+        from sqlmodel import Session
+        from database.tables import Events
+
+        with Session(get_engine()) as session:
+            db_event = session.get(Events, event_id)
+            if not db_event or db_event.deleted_at is not None:
+                return reject("Not found", 404)
+            if not _emails_match(db_event.created_by, admin_user.email):
+                return reject("You can only edit events you created", 403)
+
+    try:
+        info = storage.stat(object_path)
+        if info is None:
+            return JsonResponse({"error": "Upload not found."}, status=404)
+        if info["size"] > MAX_IMAGE_BYTES:
+            return reject("Image exceeds 8 MB limit.", 400)
+        # The stored Content-Type is whatever the client declared: check the magic bytes too
+        image_format = sniff_image_format(storage.head(object_path, 16))
+    except StorageError as exc:
+        return JsonResponse({"error": str(exc)}, status=500)
+    if image_format is None or FORMAT_CONTENT_TYPES[image_format] != info["content_type"]:
+        return reject("Unsupported file type.", 400)
+
+    public_url = storage.public_url(object_path)
+    body = {"image_url": public_url, "image_variants": {}, "path": object_path}
+    if event_id is not None:
+        updated = update_event(event_id, EventUpdate(image_url=public_url))
+        if not updated:
+            return reject("Not found", 404)
+        body["event"] = _eventout_to_json(updated)
+    return JsonResponse(body)
+
+
+def _checked_image_stream(request: HttpRequest, chunk_size: int = 64 * 1024):
+    """Yield the request body in chunks, checking magic bytes and the size limit as it arrives."""
+    received = 0
+    while True:
+        chunk = request.read(chunk_size)
+        if not chunk:
+            return
+        if received == 0 and sniff_image_format(chunk[:16]) is None:
+            raise StorageError("Unsupported file type.")
+        received += len(chunk)
+        if received > MAX_IMAGE_BYTES:
+            raise StorageError("Image exceeds 8 MB limit.")
+        yield chunk
+
+
+@csrf_exempt
+def storage_local_upload(request: HttpRequest):
+    """Stand-in for the storage server's signed upload endpoint when STORAGE_BACKEND=local.
+
+    PUT /api/storage/local-upload?token=<token from create_signed_upload>, body = raw file bytes.
+    """
+    if request.method != "PUT":
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+    storage = get_storage()
+    if storage is None or storage.name != "local":
+        return JsonResponse({"error": "Not found"}, status=404)
+    try:
+        declared = int(request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        declared = 0
+    if declared > MAX_IMAGE_BYTES:
+        return JsonResponse({"error": "Image exceeds 8 MB limit."}, status=413)
+    try:
+        storage.ensure_ready()
+        path = storage.receive_signed_upload(
+            request.GET.get("token", ""), _checked_image_stream(request), max_age=_signed_upload_ttl()
+        )
+    except StorageError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    return JsonResponse({"path": path}, status=201)
+
+
 @csrf_exempt
 def events_register(request: HttpRequest):
     """Register the current authenticated user to an event.
@@ -360,19 +613,23 @@ def events_register(request: HttpRequest):
         return JsonResponse({"error": "Method not allowed"}, status=405)
     user = _auth_from_request(request)
     if not user:
+        EVENT_REGISTRATIONS.inc(result="unauthorized")
         return JsonResponse({"error": "Unauthorized"}, status=401)
     data = _parse_json(request)
     event_id = data.get("event_id")
     try:
         event_id = int(event_id)
     except Exception:
+        EVENT_REGISTRATIONS.inc(result="invalid")
         return JsonResponse({"error": "event_id must be an integer"}, status=400)
     action = UserEventAction(email=user.email, event_id=event_id)
     res = register_user(action)
     # Map failure reasons to appropriate HTTP statuses (defense-in-depth)
     if res.success:
+        EVENT_REGISTRATIONS.inc(result="success")
         return JsonResponse({"message": res.message, "success": True}, status=200)
     reason = getattr(res, "reason", None)
+    EVENT_REGISTRATIONS.inc(result=reason or "failed")
     if reason == 'full' or reason == 'already_registered':
         status_code = 409
     elif reason == 'not_found':
@@ -393,15 +650,18 @@ def events_unregister(request: HttpRequest):
         return JsonResponse({"error": "Method not allowed"}, status=405)
     user = _auth_from_request(request)
     if not user:
+        EVENT_UNREGISTRATIONS.inc(result="unauthorized")
         return JsonResponse({"error": "Unauthorized"}, status=401)
     data = _parse_json(request)
     event_id = data.get("event_id")
     try:
         event_id = int(event_id)
     except Exception:
+        EVENT_UNREGISTRATIONS.inc(result="invalid")
         return JsonResponse({"error": "event_id must be an integer"}, status=400)
     action = UserEventAction(email=user.email, event_id=event_id)
     res = unregister_user(action)
+    EVENT_UNREGISTRATIONS.inc(result="success" if res.success else "not_registered")
     status_code = 200 if res.success else 400
     return JsonResponse({"message": res.message, "success": res.success}, status=status_code)
 
@@ -428,7 +688,48 @@ def my_events(request: HttpRequest):
             "speakers": getattr(e, "speakers", []) or [],
             "category": getattr(e, "category", None),
             "image_url": getattr(e, "image_url", None),
+            "image_variants": getattr(e, "image_variants", None) or {},
         }
         for e in list_user_events(user.email, q)
     ]
     return JsonResponse({"events": items})
+
+
+@csrf_exempt
+def my_calendar(request: HttpRequest):
+    """Return the calendar subscription URL of the current authenticated user.
+
+    Requires Authorization: Bearer <jwt>. Returns { url, token }; the URL needs no other credentials.
+    """
+    if request.method != "GET":
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+    user = _auth_from_request(request)
+    if not user:
+        return JsonResponse({"error": "Unauthorized"}, status=401)
+    token = calendar_feed.feed_token(user.email)
+    url = request.build_absolute_uri(f"/api/my/calendar.ics?token={token}")
+    return JsonResponse({"url": url, "token": token})
+
+
+def my_calendar_feed(request: HttpRequest):
+    """iCalendar feed of the events the token's user is registered for (see backend/calendar_feed.py).
+
+    GET /api/my/calendar.ics?token=<from /api/my/calendar>. Answers 304 to a matching If-None-Match.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+    email = calendar_feed.email_from_token(request.GET.get("token") or "")
+    if not email:
+        return JsonResponse({"error": "Invalid calendar token"}, status=403)
+    versions = calendar_feed.feed_versions(email)
+    etag = calendar_feed.feed_etag(email, versions)
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in parse_etags(if_none_match)):
+        response = HttpResponse(status=304)
+    else:
+        response = StreamingHttpResponse(calendar_feed.feed_chunks(email, versions),
+                                         content_type="text/calendar; charset=utf-8")
+        response["Content-Disposition"] = 'inline; filename="aubevents.ics"'
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
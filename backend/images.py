@@ -0,0 +1,157 @@
+"""
+images.py
+---------
+Server-side processing for uploaded event posters.
+
+- Detects the real image format from magic bytes (file name and Content-Type are not trusted)
+- Re-encodes the upload into WebP variants (thumb, card, full); re-encoding drops EXIF/GPS metadata
+- Runs the CPU-heavy decode/resize/encode in a bounded worker pool instead of on the request thread;
+  at most IMAGE_QUEUE uploads may be queued or decoding, beyond that ``ImageBusy`` is raised at once
+
+Variant objects are stored next to each other as ``<prefix>/<variant>.webp`` so the full set
+can always be derived from the ``full`` URL (see ``variant_urls``).
+
+Requires Pillow (``pip install Pillow``); without it uploads are validated but stored as-is.
+"""
+
+from __future__ import annotations
+
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from functools import lru_cache
+from typing import BinaryIO, Dict, Optional, Union
+
+from django.conf import settings
+
+
+class InvalidImage(ValueError):
+    """The upload is not an image Pillow can decode (corrupt, truncated, too many pixels...)."""
+
+
+class ImageBusy(Exception):
+    """The image workers are saturated (queue full or processing timed out); retry later."""
+
+
+@lru_cache(maxsize=1)
+def _pillow():
+    """(Image, ImageOps), imported on the first upload rather than at startup; None without Pillow."""
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:  # pragma: no cover - handled via runtime config
+        return None
+    return Image, ImageOps
+
+
+# Longest edge in pixels for each variant; smaller images are never upscaled.
+# "full" stays last: uploads write variants in this order, so its presence marks a complete set.
+IMAGE_VARIANTS: Dict[str, int] = {
+    "thumb": 320,
+    "card": 800,
+    "full": 1600,
+}
+WEBP_QUALITY = 80
+WEBP_CONTENT_TYPE = "image/webp"
+
+# Largest accepted upload, for both proxied and direct (signed URL) uploads
+MAX_IMAGE_BYTES = 8 * 1024 * 1024
+
+# Extension used when an image is stored without re-encoding
+FORMAT_EXTENSIONS = {"jpeg": ".jpg", "png": ".png", "gif": ".gif", "webp": ".webp"}
+FORMAT_CONTENT_TYPES = {name: f"image/{name}" for name in FORMAT_EXTENSIONS}
+
+
+def sniff_image_format(head: bytes) -> Optional[str]:
+    """Return 'jpeg', 'png', 'gif' or 'webp' from the first bytes of a file, else None."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def can_transcode() -> bool:
+    return _pillow() is not None
+
+
+def build_variants(source: Union[str, BinaryIO]) -> Dict[str, bytes]:
+    """Decode an image (a file path or file object) once and encode every variant as WebP.
+
+    Metadata is not carried over. JPEGs are decoded at a reduced scale when they are much larger
+    than the biggest variant, so a 24 MP photo is never expanded to full size in memory.
+    """
+    Image, ImageOps = _pillow()
+    if hasattr(source, "seek"):
+        source.seek(0)
+    try:
+        with Image.open(source) as img:
+            largest = max(IMAGE_VARIANTS.values())
+            img.draft(img.mode, (largest, largest))
+            img = ImageOps.exif_transpose(img)  # apply camera rotation before EXIF is dropped
+            img = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as exc:
+        # UnidentifiedImageError and "image file is truncated" are OSErrors
+        raise InvalidImage(str(exc)) from exc
+    out: Dict[str, bytes] = {}
+    for name, edge in IMAGE_VARIANTS.items():
+        variant = img.copy()
+        variant.thumbnail((edge, edge), Image.LANCZOS)
+        buf = io.BytesIO()
+        variant.save(buf, format="WEBP", quality=WEBP_QUALITY, method=4)
+        out[name] = buf.getvalue()
+    return out
+
+
+@lru_cache(maxsize=1)
+def _pool() -> ThreadPoolExecutor:
+    # Pillow releases the GIL while decoding/resampling/encoding, so threads give real parallelism
+    workers = int(getattr(settings, "IMAGE_WORKERS", 2))
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-worker")
+
+
+@lru_cache(maxsize=1)
+def _slots() -> threading.BoundedSemaphore:
+    return threading.BoundedSemaphore(int(getattr(settings, "IMAGE_QUEUE", 8)))
+
+
+def process_in_pool(source: Union[str, BinaryIO], timeout: Optional[float] = None) -> Dict[str, bytes]:
+    """Run ``build_variants`` on the image worker pool and wait for the result.
+
+    The pool size caps how many uploads are decoded at once, whatever the number of request threads.
+    Raises ``InvalidImage`` for undecodable uploads and ``ImageBusy`` when the queue is full or the
+    job times out.
+    """
+    if timeout is None:
+        timeout = float(getattr(settings, "IMAGE_PROCESSING_TIMEOUT", 30))
+    slots = _slots()
+    if not slots.acquire(blocking=False):
+        raise ImageBusy()
+    try:
+        future = _pool().submit(build_variants, source)
+    except BaseException:
+        slots.release()
+        raise
+    # Freed when the job is over, so a timed-out decode still counts against the queue
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeout:
+        future.cancel()
+        raise ImageBusy()
+
+
+def variant_path(prefix: str, name: str) -> str:
+    return f"{prefix}/{name}.webp"
+
+
+def variant_urls(image_url: Optional[str]) -> Dict[str, str]:
+    """Derive every variant URL from a ``.../full.webp`` URL; {} for images stored as-is."""
+    suffix = "/full.webp"
+    if not image_url or not image_url.endswith(suffix):
+        return {}
+    base = image_url[: -len(suffix)]
+    return {name: f"{base}/{name}.webp" for name in IMAGE_VARIANTS}
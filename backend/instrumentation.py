@@ -0,0 +1,178 @@
+"""
+instrumentation.py
+------------------
+Per-request SQL accounting for both database paths.
+
+- The SQLModel engines (database/database.py, primary and replicas) are hooked with SQLAlchemy
+  cursor events
+- Django's own connections are hooked with ``connection.execute_wrapper``
+- Statements are attributed to the current request through a ContextVar, so concurrent
+  requests on other threads (or async tasks) never mix their numbers
+
+``RequestInstrumentationMiddleware`` adds a ``Server-Timing`` header (db/app durations and the
+slowest statement), logs one JSON line per request to ``backend.instrumentation.requests`` and
+logs statements slower than SLOW_QUERY_MS, with normalized SQL, to
+``backend.instrumentation.slow_queries``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from django.conf import settings
+from django.db import connections
+from sqlalchemy import event
+
+request_logger = logging.getLogger("backend.instrumentation.requests")
+slow_query_logger = logging.getLogger("backend.instrumentation.slow_queries")
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    total_seconds: float = 0.0
+    slowest_seconds: float = 0.0
+    slowest_sql: str = ""
+    by_source: dict = field(default_factory=dict)
+
+    def record(self, source: str, sql: str, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        self.by_source[source] = self.by_source.get(source, 0) + 1
+        if seconds >= self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_sql = sql
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("request_query_stats", default=None)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|:\w+|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse literals and parameter styles to ``?`` so equivalent statements group together."""
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("(?...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+def record_query(source: str, sql: str, seconds: float) -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats.record(source, sql, seconds)
+    threshold_ms = float(getattr(settings, "SLOW_QUERY_MS", 200))
+    if seconds * 1000 >= threshold_ms:
+        entry = {"source": source, "duration_ms": round(seconds * 1000, 2), "sql": normalize_sql(sql)}
+        slow_query_logger.warning(json.dumps(entry), extra={"slow_query": entry})
+
+
+# --- SQLModel / SQLAlchemy engine ---
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start"].pop()
+    record_query("sqlmodel", statement, time.perf_counter() - started)
+
+
+def _handle_error(exception_context):
+    # Keep the start-time stack balanced when a statement fails
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+def install_engine_hooks(engine) -> None:
+    """Attach the timing listeners to a SQLAlchemy engine (idempotent)."""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+# --- Django ORM ---
+
+def _django_wrapper(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        record_query("django", sql, time.perf_counter() - started)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Collect the statements issued inside the block (both database paths) into a QueryStats."""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(_django_wrapper))
+            yield stats
+    finally:
+        _current.reset(token)
+
+
+def server_timing(stats: QueryStats, total_seconds: float) -> str:
+    parts = [
+        f'db;dur={stats.total_seconds * 1000:.1f};desc="{stats.count} queries"',
+        f"app;dur={total_seconds * 1000:.1f}",
+    ]
+    if stats.count:
+        parts.append(f"db-slowest;dur={stats.slowest_seconds * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class RequestInstrumentationMiddleware:
+    """Count and time every SQL statement issued while handling a request."""
+
+    def __init__(self, get_response):
+        from database.database import get_engines
+
+        self.get_response = get_response
+        for engine in get_engines():
+            install_engine_hooks(engine)
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        with track_queries() as stats:
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        if getattr(settings, "SERVER_TIMING_HEADER", True):
+            response["Server-Timing"] = server_timing(stats, elapsed)
+
+        entry = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "duration_ms": round(elapsed * 1000, 2),
+            "db_queries": stats.count,
+            "db_ms": round(stats.total_seconds * 1000, 2),
+            "db_by_source": stats.by_source,
+            "slowest_ms": round(stats.slowest_seconds * 1000, 2),
+            "slowest_sql": normalize_sql(stats.slowest_sql) if stats.slowest_sql else None,
+        }
+        request_logger.info(json.dumps(entry), extra={"request_stats": entry})
+        return response
@@ -0,0 +1,187 @@
+"""
+mailer.py
+---------
+Bulk email for background jobs (reminders, change notifications): one subject and body per batch,
+personalized per recipient, handed to a transport in as few calls as possible.
+
+- ``Batch``: subject and plain-text body shared by its recipients; tags such as ``-name-`` in
+  either are replaced per recipient from ``Recipient.substitutions``
+- Transports, picked by MAIL_TRANSPORT: "sendgrid" makes one /v3/mail/send call per batch with one
+  personalization per recipient (at most MAX_RECIPIENTS); "django" renders each copy and sends them
+  all over one EMAIL_BACKEND connection; "fake" keeps batches in ``FakeTransport.outbox`` for tests.
+  "auto" (default) means sendgrid when SENDGRID_API_KEY is set, django otherwise
+- ``send_batches`` splits oversized batches and sends on at most MAIL_CONCURRENCY threads. It never
+  raises: each batch comes back with its outcome, so callers can retry or release what failed
+
+Request-path emails (verification and reset codes) still go through accounts.views.safe_send_mail.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from backend.metrics import EMAIL_SEND_SECONDS, EMAILS_SENT
+from database.database import event_timezone
+
+logger = logging.getLogger(__name__)
+
+MAX_RECIPIENTS = 1000  # SendGrid's limit of personalizations per request
+SENDGRID_URL = "https://api.sendgrid.com/v3/mail/send"
+
+
+class Recipient(NamedTuple):
+    email: str
+    substitutions: Dict[str, str] = {}
+
+
+class Batch(NamedTuple):
+    subject: str
+    body: str
+    recipients: Tuple[Recipient, ...]
+
+
+def personalize(text: str, substitutions: Dict[str, str]) -> str:
+    for tag, value in substitutions.items():
+        text = text.replace(tag, value)
+    return text
+
+
+def format_event_date(value: datetime) -> str:
+    """An event date for email bodies, labelled with the event time zone it is in ("... at 14:00 EEST")."""
+    return f"{value:%A %d %B %Y at %H:%M} {event_timezone().tzname(value)}"
+
+
+def split_batch(batch: Batch, size: int = MAX_RECIPIENTS) -> List[Batch]:
+    recipients = batch.recipients
+    if len(recipients) <= size:
+        return [batch]
+    return [batch._replace(recipients=recipients[i:i + size]) for i in range(0, len(recipients), size)]
+
+
+def sendgrid_payload(batch: Batch, from_email: str) -> dict:
+    personalizations = []
+    for recipient in batch.recipients:
+        item = {"to": [{"email": recipient.email}]}
+        if recipient.substitutions:
+            item["substitutions"] = recipient.substitutions
+        personalizations.append(item)
+    return {
+        "personalizations": personalizations,
+        "from": {"email": from_email},
+        "subject": batch.subject,
+        "content": [{"type": "text/plain", "value": batch.body}],
+    }
+
+
+# --- Transports ---
+
+class SendGridTransport:
+    name = "sendgrid"
+
+    def __init__(self, api_key: str, from_email: str, timeout: float = 10):
+        self.api_key = api_key
+        self.from_email = from_email
+        self.timeout = timeout
+        self._local = threading.local()  # one keep-alive session per sending thread
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            import requests  # only the email paths need it (see bench.importtime)
+            session = requests.Session()
+            session.headers.update({"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"})
+            self._local.session = session
+        return session
+
+    def send(self, batch: Batch) -> bool:
+        payload = json.dumps(sendgrid_payload(batch, self.from_email))
+        resp = self._session().post(SENDGRID_URL, data=payload, timeout=self.timeout)
+        if 200 <= resp.status_code < 300:
+            return True
+        logger.warning("SendGrid batch of %d failed %s: %s", len(batch.recipients), resp.status_code, resp.text[:300])
+        return False
+
+
+class DjangoTransport:
+    name = "django"
+
+    def __init__(self, from_email: str):
+        self.from_email = from_email
+
+    def send(self, batch: Batch) -> bool:
+        from django.core.mail import EmailMessage, get_connection
+
+        messages = [
+            EmailMessage(personalize(batch.subject, r.substitutions), personalize(batch.body, r.substitutions),
+                         self.from_email, [r.email])
+            for r in batch.recipients
+        ]
+        with get_connection() as connection:  # one SMTP session for the whole batch
+            return connection.send_messages(messages) == len(messages)
+
+
+class FakeTransport:
+    """Records batches instead of sending them; batches holding an address in `fail_for` fail."""
+
+    name = "fake"
+    outbox: List[Batch] = []  # shared by all instances, like django.core.mail.outbox
+    _lock = threading.Lock()
+
+    def __init__(self, fail_for: Iterable[str] = ()):
+        self.fail_for = set(fail_for)
+
+    def send(self, batch: Batch) -> bool:
+        if any(r.email in self.fail_for for r in batch.recipients):
+            return False
+        with self._lock:
+            FakeTransport.outbox.append(batch)
+        return True
+
+
+def get_transport():
+    kind = getattr(settings, "MAIL_TRANSPORT", "auto")
+    from_email = getattr(settings, "VERIFIED_FROM_EMAIL", None) or settings.DEFAULT_FROM_EMAIL
+    if kind == "auto":
+        kind = "sendgrid" if getattr(settings, "SENDGRID_API_KEY", None) else "django"
+    if kind == "sendgrid":
+        return SendGridTransport(settings.SENDGRID_API_KEY, from_email)
+    if kind == "django":
+        return DjangoTransport(from_email)
+    if kind == "fake":
+        return FakeTransport()
+    raise ImproperlyConfigured(f"Unknown MAIL_TRANSPORT {kind!r} (expected auto, sendgrid, django or fake)")
+
+
+def send_batches(batches: Iterable[Batch], transport=None, concurrency: Optional[int] = None) -> List[Tuple[Batch, bool]]:
+    """Send `batches` (split at MAX_RECIPIENTS) on a bounded thread pool; [(batch, sent)] in order."""
+    transport = transport or get_transport()
+    if concurrency is None:
+        concurrency = int(getattr(settings, "MAIL_CONCURRENCY", 4))
+    parts = [part for batch in batches for part in split_batch(batch)]
+
+    def send(part: Batch) -> bool:
+        started = time.perf_counter()
+        try:
+            sent = bool(transport.send(part))
+        except Exception as exc:
+            logger.warning("%s batch of %d raised: %s", transport.name, len(part.recipients), exc)
+            sent = False
+        EMAIL_SEND_SECONDS.observe(time.perf_counter() - started, transport=transport.name)
+        EMAILS_SENT.inc(len(part.recipients), transport=transport.name, result="success" if sent else "failure")
+        return sent
+
+    if concurrency <= 1 or len(parts) <= 1:
+        results = [send(part) for part in parts]
+    else:
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(parts)), thread_name_prefix="mailer") as pool:
+            results = list(pool.map(send, parts))
+    return list(zip(parts, results))
@@ -0,0 +1,363 @@
+"""
+metrics.py
+----------
+Prometheus-style counters and histograms, exposed as text at ``/metrics``.
+
+- Counters/histograms live in a process-local ``Registry`` guarded by a lock
+- With METRICS_DIR set (gunicorn, several worker processes), each process periodically writes a
+  snapshot to ``METRICS_DIR/<pid>-<id>.json``; ``/metrics`` merges every snapshot in the directory,
+  so any worker can answer for all of them. On scrape, the snapshots of exited workers are folded
+  into ``exited.json`` and removed (as prometheus_client's ``mark_process_dead`` does for its
+  files), so restarts do not pile up files while counters stay monotonic (clear it on deploy)
+- Without METRICS_DIR, ``/metrics`` reports the current process only (runserver, tests)
+- ``/metrics`` requires ``Authorization: Bearer <METRICS_TOKEN>``; without a token it is only
+  served when DEBUG is on
+
+``MetricsMiddleware`` records a latency histogram per route pattern (not per raw path, to keep
+label cardinality bounded). Domain metrics are defined at the bottom of this module.
+"""
+
+from __future__ import annotations
+
+import atexit
+import hmac
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+from uuid import uuid4
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows dev machines: exited snapshots are just kept
+    fcntl = None
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Merged snapshot of every exited process, kept in METRICS_DIR next to the live ones
+EXITED_SNAPSHOT = "exited.json"
+
+
+def _snapshot_pid(path: Path) -> Optional[int]:
+    pid = path.stem.split("-", 1)[0]
+    return int(pid) if pid.isdigit() else None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # exists, owned by someone else
+    return True
+
+
+def _read_snapshot(path: Path) -> Optional[dict]:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _write_snapshot(path: Path, data: dict) -> None:
+    tmp = path.with_name(f".{path.name}.{uuid4().hex}.tmp")
+    tmp.write_text(json.dumps(data))
+    os.replace(tmp, path)
+
+
+class Registry:
+    def __init__(self, directory: Optional[str] = None, flush_interval: Optional[float] = None):
+        self._metrics: Dict[str, "Metric"] = {}
+        self._lock = threading.Lock()
+        self._directory = directory
+        self._flush_interval = flush_interval
+        self._last_flush = 0.0
+        self._snapshot_name = f"{os.getpid()}-{uuid4().hex[:8]}.json"
+        self._atexit_registered = False
+
+    # --- configuration (read lazily so settings can load after this module) ---
+
+    def directory(self) -> Optional[Path]:
+        directory = self._directory if self._directory is not None else getattr(settings, "METRICS_DIR", None)
+        return Path(directory) if directory else None
+
+    def flush_interval(self) -> float:
+        if self._flush_interval is not None:
+            return self._flush_interval
+        return float(getattr(settings, "METRICS_FLUSH_INTERVAL", 1.0))
+
+    # --- registration / recording ---
+
+    def register(self, metric: "Metric") -> "Metric":
+        self._metrics[metric.name] = metric
+        return metric
+
+    def _updated(self) -> None:
+        directory = self.directory()
+        if directory is None:
+            return
+        now = time.monotonic()
+        if now - self._last_flush >= self.flush_interval():
+            self.flush(directory)
+
+    # --- snapshots ---
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def flush(self, directory: Optional[Path] = None) -> None:
+        """Write this process's snapshot to the shared directory (atomic rename)."""
+        directory = directory or self.directory()
+        if directory is None:
+            return
+        self._last_flush = time.monotonic()
+        directory.mkdir(parents=True, exist_ok=True)
+        _write_snapshot(directory / self._snapshot_name, self.snapshot())
+        if not self._atexit_registered:
+            self._atexit_registered = True
+            atexit.register(self.flush, directory)
+
+    def collect(self) -> dict:
+        """Snapshot of every process sharing the directory, or of this process alone."""
+        directory = self.directory()
+        if directory is None:
+            return self.snapshot()
+        self.flush(directory)
+        self.compact(directory)
+        merged: dict = {}
+        for path in sorted(directory.glob("*.json")):
+            data = _read_snapshot(path)
+            if data is None:
+                continue  # compacted meanwhile or damaged; skip this round
+            self._merge_into(merged, data)
+        return merged
+
+    def _merge_into(self, merged: dict, data: dict) -> None:
+        for name, snap in data.items():
+            metric = self._metrics.get(name)
+            if metric is not None:
+                merged[name] = metric.merge(merged.get(name), snap)
+
+    def compact(self, directory: Path) -> None:
+        """Fold the snapshots of exited processes into EXITED_SNAPSHOT and delete them."""
+        own = os.getpid()
+        exited = [path for path in directory.glob("*.json")
+                  if (pid := _snapshot_pid(path)) is not None and pid != own and not _pid_alive(pid)]
+        if not exited or fcntl is None:
+            return
+        with open(directory / ".compact.lock", "a") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return  # another worker is compacting right now
+            archive = directory / EXITED_SNAPSHOT
+            merged = _read_snapshot(archive) or {}
+            for path in exited:
+                data = _read_snapshot(path)
+                if data is not None:  # None: already compacted by another worker
+                    self._merge_into(merged, data)
+            _write_snapshot(archive, merged)
+            for path in exited:
+                path.unlink(missing_ok=True)
+
+    def render(self) -> str:
+        collected = self.collect()
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.extend(metric.render(collected.get(name) or metric.empty()))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def _label_key(labelnames: Tuple[str, ...], labels: dict) -> str:
+    if set(labelnames) != set(labels):
+        raise ValueError(f"expected labels {labelnames}, got {tuple(labels)}")
+    return json.dumps([str(labels[name]) for name in labelnames])
+
+
+def _format_labels(labelnames: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), registry: Registry = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.registry = registry
+        self._values: dict = {}
+        registry.register(self)
+
+    def snapshot(self) -> dict:
+        return dict(self._values)
+
+    def empty(self) -> dict:
+        return {}
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _label_key(self.labelnames, labels)
+        with self.registry._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        self.registry._updated()
+
+    def merge(self, merged: Optional[dict], snap: dict) -> dict:
+        merged = dict(merged or {})
+        for key, value in snap.items():
+            merged[key] = merged.get(key, 0) + value
+        return merged
+
+    def render(self, values: dict):
+        lines = self.header()
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, json.loads(key))} {_number(value)}")
+        return lines
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS, registry: Registry = REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(self.labelnames, labels)
+        with self.registry._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {"buckets": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            # Per-bucket (non-cumulative) counts; the last slot is +Inf
+            index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+            entry["buckets"][index] += 1
+            entry["sum"] += value
+            entry["count"] += 1
+        self.registry._updated()
+
+    def time(self, **labels) -> "_Timer":
+        return _Timer(self, labels)
+
+    def snapshot(self) -> dict:
+        return {key: {"buckets": list(v["buckets"]), "sum": v["sum"], "count": v["count"]}
+                for key, v in self._values.items()}
+
+    def merge(self, merged: Optional[dict], snap: dict) -> dict:
+        merged = {k: {"buckets": list(v["buckets"]), "sum": v["sum"], "count": v["count"]}
+                  for k, v in (merged or {}).items()}
+        for key, entry in snap.items():
+            if len(entry["buckets"]) != len(self.buckets) + 1:
+                continue  # written by a process with different buckets (mid-deploy)
+            target = merged.setdefault(key, {"buckets": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0})
+            target["buckets"] = [a + b for a, b in zip(target["buckets"], entry["buckets"])]
+            target["sum"] += entry["sum"]
+            target["count"] += entry["count"]
+        return merged
+
+    def render(self, values: dict):
+        lines = self.header()
+        bounds = [_number(b) for b in self.buckets] + ["+Inf"]
+        for key, entry in sorted(values.items()):
+            label_values = json.loads(key)
+            cumulative = 0
+            for bound, count in zip(bounds, entry["buckets"]):
+                cumulative += count
+                labels = _format_labels(self.labelnames, label_values, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, label_values)
+            lines.append(f"{self.name}_sum{labels} {_number(entry['sum'])}")
+            lines.append(f"{self.name}_count{labels} {entry['count']}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: dict):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+# --- Application metrics ---
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "aubevents_http_request_duration_seconds", "Request latency by route pattern.",
+    ["route", "method", "status"],
+)
+EVENT_REGISTRATIONS = Counter(
+    "aubevents_event_registrations_total", "Event registration attempts by result.", ["result"],
+)
+EVENT_UNREGISTRATIONS = Counter(
+    "aubevents_event_unregistrations_total", "Event unregistration attempts by result.", ["result"],
+)
+LOGINS = Counter("aubevents_logins_total", "Login attempts by result.", ["result"])
+SIGNUPS = Counter("aubevents_signups_total", "Signup attempts by result.", ["result"])
+RATE_LIMITED = Counter(
+    "aubevents_rate_limited_total", "Requests rejected by the rate limiter, by scope and key.", ["scope", "key"],
+)
+EMAILS_SENT = Counter("aubevents_emails_total", "Outgoing emails by transport and result.", ["transport", "result"])
+EMAIL_SEND_SECONDS = Histogram(
+    "aubevents_email_send_duration_seconds", "Time spent handing an email to its transport.", ["transport"],
+)
+
+
+# --- Django integration ---
+
+class MetricsMiddleware:
+    """Observe every request's latency, labelled with its URL pattern."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match is not None and match.route else "unmatched"
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - started, route=route, method=request.method, status=response.status_code,
+        )
+        return response
+
+
+def metrics_view(request: HttpRequest):
+    """Prometheus text exposition. Requires ``Authorization: Bearer <METRICS_TOKEN>``; open only in DEBUG."""
+    token = getattr(settings, "METRICS_TOKEN", None)
+    if not token and not settings.DEBUG:
+        return HttpResponse("Set METRICS_TOKEN to enable /metrics\n", status=403, content_type="text/plain")
+    if token and not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponse("Unauthorized\n", status=401, content_type="text/plain")
+    return HttpResponse(REGISTRY.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
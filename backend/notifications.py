@@ -0,0 +1,140 @@
+"""
+notifications.py
+----------------
+Tell registrants when an event they signed up for is changed or cancelled (called by backend/crud.py).
+
+- ``diff_event`` compares the event before and after an update on NOTIFIED_FIELDS; other edits
+  (description, image, capacity...) notify nobody
+- The roster is snapshotted in the request with one query on usereventlink (before the delete, for
+  a cancellation) and the message is rendered once; sending happens on a small background pool
+  (NOTIFICATION_WORKERS), so an edit to a 2,000-seat event returns without waiting for any email
+- Messages go out through backend/mailer.py: one body per change, the recipient's name as a
+  per-recipient substitution, SendGrid batches of up to 1000
+- Events that are already over notify nobody. Jobs live in the worker's memory: a restart drops
+  the ones still queued. Switched off with EVENT_CHANGE_NOTIFICATIONS=False
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+from backend.mailer import Batch, Recipient, format_event_date, send_batches
+from database.database import event_now, get_event_roster
+
+logger = logging.getLogger(__name__)
+
+NOTIFIED_FIELDS = ("title", "date", "location")
+NAME_TAG = "-name-"
+FIELD_LABELS = {"title": "Title", "date": "Date", "location": "Location"}
+
+_pending: set = set()
+_pending_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    # crud is also used without Django (scripts, pure pytest): no settings, nobody to email
+    return settings.configured and bool(getattr(settings, "EVENT_CHANGE_NOTIFICATIONS", True))
+
+
+@lru_cache(maxsize=1)
+def _pool() -> ThreadPoolExecutor:
+    workers = int(getattr(settings, "NOTIFICATION_WORKERS", 1))
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="notifications")
+
+
+def _format(field: str, value: Any) -> str:
+    if value is None:
+        return "(none)"
+    if field == "date":
+        return format_event_date(value)
+    return str(value)
+
+
+def diff_event(before: Any, after: Any) -> Dict[str, Tuple[Any, Any]]:
+    """{field: (old, new)} for the NOTIFIED_FIELDS that differ between two event objects."""
+    changes = {}
+    for field in NOTIFIED_FIELDS:
+        old, new = getattr(before, field, None), getattr(after, field, None)
+        if old != new:
+            changes[field] = (old, new)
+    return changes
+
+
+def _is_over(date: Optional[datetime]) -> bool:
+    return date is not None and date < event_now()
+
+
+def render_change(title: str, changes: Dict[str, Tuple[Any, Any]]) -> Tuple[str, str]:
+    lines = [
+        f"- {FIELD_LABELS[field]}: {_format(field, new)} (was {_format(field, old)})"
+        for field, (old, new) in changes.items()
+    ]
+    body = (f"Hi {NAME_TAG},\n\n" f'"{title}", which you registered for, has changed:\n\n'
+            + "\n".join(lines) + "\n\nAUBEVENTS")
+    return f"Event update: {title}", body
+
+
+def render_cancellation(title: str, date: Optional[datetime]) -> Tuple[str, str]:
+    when = f" on {_format('date', date)}" if date else ""
+    body = (f"Hi {NAME_TAG},\n\n" f'"{title}"{when}, which you registered for, has been cancelled.\n\n'
+            "Sorry for the inconvenience.\nAUBEVENTS")
+    return f"Event cancelled: {title}", body
+
+
+def _recipients(roster: List[Tuple[str, Optional[str]]]) -> Tuple[Recipient, ...]:
+    return tuple(Recipient(email, {NAME_TAG: fullname or email.split("@")[0]}) for email, fullname in roster)
+
+
+def _deliver(subject: str, body: str, roster: List[Tuple[str, Optional[str]]]) -> int:
+    results = send_batches([Batch(subject, body, _recipients(roster))])
+    failed = sum(len(batch.recipients) for batch, sent in results if not sent)
+    if failed:
+        logger.warning("Could not notify %d of %d registrant(s) about %r", failed, len(roster), subject)
+    return len(roster) - failed
+
+
+def _enqueue(subject: str, body: str, roster: List[Tuple[str, Optional[str]]]) -> Future:
+    future = _pool().submit(_deliver, subject, body, roster)
+    with _pending_lock:
+        _pending.add(future)
+    future.add_done_callback(_forget)
+    return future
+
+
+def _forget(future: Future) -> None:
+    with _pending_lock:
+        _pending.discard(future)
+
+
+def wait_for_pending(timeout: Optional[float] = None) -> bool:
+    """Block until the queued notification jobs are done (tests, graceful shutdown); False on timeout."""
+    with _pending_lock:
+        futures = list(_pending)
+    return not wait(futures, timeout=timeout).not_done
+
+
+def event_updated(event_id: int, before: Any, after: Any) -> Optional[Future]:
+    """Queue an email to the registrants if a notified field changed; returns the job, if any."""
+    if not enabled():
+        return None
+    changes = diff_event(before, after)
+    if not changes or _is_over(getattr(after, "date", None)):
+        return None
+    roster = get_event_roster(event_id)
+    if not roster:
+        return None
+    return _enqueue(*render_change(after.title, changes), roster)
+
+
+def event_cancelled(before: Any, roster: List[Tuple[str, Optional[str]]]) -> Optional[Future]:
+    """Queue the cancellation email; `roster` is snapshotted by the caller before the delete."""
+    if not enabled() or not roster or _is_over(getattr(before, "date", None)):
+        return None
+    return _enqueue(*render_cancellation(before.title, before.date), roster)
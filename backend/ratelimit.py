@@ -0,0 +1,118 @@
+"""
+ratelimit.py
+------------
+Token-bucket rate limiting shared by every worker process.
+
+- Buckets live in the ``ratelimitbuckets`` table; taking a token is one atomic conditional UPDATE
+  (see ``database.database.take_rate_limit_token``), so N gunicorn workers enforce one limit, not N
+- Views declare their limits with ``@rate_limit(scope, ip="20/m", email="5/h")``; each key gets its
+  own bucket and a request must find a token in all of them
+- Limits can be overridden per scope with the RATE_LIMITS setting and switched off with
+  RATE_LIMIT_ENABLED=False; a rejected request gets 429 with a Retry-After header
+
+Rates are "<count>/<period>" with period s, m, h or d: a bucket holds ``count`` tokens and refills
+completely over one period, so short bursts up to ``count`` are allowed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+from functools import wraps
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.http import JsonResponse
+
+from backend.metrics import RATE_LIMITED
+from database.database import delete_rate_limit_buckets, take_rate_limit_token
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate: str) -> Tuple[float, float]:
+    """'10/m' -> (capacity 10, refill 10/60 tokens per second)."""
+    count, _, period = rate.partition("/")
+    seconds = PERIODS.get(period.strip().lower()[:1])
+    if not seconds or int(count) < 1:
+        raise ValueError(f"Invalid rate '{rate}' (expected e.g. '10/m')")
+    return float(count), int(count) / seconds
+
+
+def client_ip(request) -> str:
+    if getattr(settings, "RATE_LIMIT_TRUST_FORWARDED", False):
+        forwarded = request.META.get("HTTP_X_FORWARDED_FOR", "")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.META.get("REMOTE_ADDR", "") or "unknown"
+
+
+def request_email(request) -> Optional[str]:
+    # Works for both DRF requests (parsed .data) and plain Django requests (raw JSON body)
+    data = getattr(request, "data", None)
+    if data is None:
+        try:
+            data = json.loads(request.body or b"{}")
+        except (ValueError, UnicodeDecodeError):
+            data = {}
+    email = data.get("email") if hasattr(data, "get") else None
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+
+def bucket_key(scope: str, kind: str, value: str) -> str:
+    # Hashed so bucket keys have a bounded length and do not store emails/IPs in clear
+    return f"{scope}:{kind}:{hashlib.sha256(value.encode()).hexdigest()[:32]}"
+
+
+def _limits(scope: str, declared: dict) -> dict:
+    overrides = (getattr(settings, "RATE_LIMITS", None) or {}).get(scope, {})
+    return {**declared, **overrides}
+
+
+def check(request, scope: str, limits: dict) -> Tuple[bool, float]:
+    """Take a token from every bucket that applies to this request; returns (allowed, retry_after)."""
+    values = {"ip": lambda: client_ip(request), "email": lambda: request_email(request)}
+    for kind, rate in _limits(scope, limits).items():
+        if not rate:
+            continue
+        value = values[kind]()
+        if not value:
+            continue
+        capacity, refill = parse_rate(rate)
+        allowed, retry_after = take_rate_limit_token(bucket_key(scope, kind, value), capacity, refill)
+        if not allowed:
+            RATE_LIMITED.inc(scope=scope, key=kind)
+            return False, retry_after
+    return True, 0.0
+
+
+def rate_limit(scope: str, message: str = "Too many requests. Please try again later.", **limits):
+    """Decorate a view with per-key limits, e.g. ``@rate_limit("login", ip="30/m", email="10/m")``.
+
+    Place it below ``@api_view`` so DRF has parsed the body when the email key is read.
+    """
+    unknown = set(limits) - {"ip", "email"}
+    if unknown:
+        raise ValueError(f"Unknown rate limit keys: {sorted(unknown)}")
+    for rate in limits.values():
+        if rate:
+            parse_rate(rate)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if getattr(settings, "RATE_LIMIT_ENABLED", True):
+                allowed, retry_after = check(request, scope, limits)
+                if not allowed:
+                    response = JsonResponse({"error": message}, status=429)
+                    response["Retry-After"] = str(max(1, math.ceil(retry_after)))
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapped
+    return decorator
+
+
+def reset_rate_limits(scope: Optional[str] = None) -> int:
+    """Forget all buckets (or those of one scope); used by tests and admins."""
+    return delete_rate_limit_buckets(prefix=f"{scope}:" if scope else None)
@@ -0,0 +1,82 @@
+"""
+reminders.py
+------------
+Reminder emails for registered events that start soon (``python manage.py send_reminders``).
+
+- One join query (``database.get_due_reminders``) finds every registration of an event starting
+  within the window that has no reminder of this kind yet
+- Each event's message is rendered once; the recipient's name is a per-recipient substitution, so
+  an event's registrants go out together in batches of up to MAX_RECIPIENTS (backend/mailer.py)
+- A batch is claimed in SentReminders before it is sent and released if the send fails: reruns
+  and overlapping cron runs never send a reminder twice, and failures are retried by the next run
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import List, Optional
+
+from backend.mailer import MAX_RECIPIENTS, Batch, Recipient, format_event_date, send_batches
+from database.database import DueReminder, claim_reminders, event_now, get_due_reminders, release_reminders
+
+NAME_TAG = "-name-"
+
+
+def reminder_kind(window: timedelta) -> str:
+    """Marker kind of a window ("24h"): reminders for different windows are tracked separately."""
+    return f"{int(window.total_seconds() // 3600)}h"
+
+
+def render_batch(rows: List[DueReminder]) -> Batch:
+    """The reminder of one event for the registrants in `rows`."""
+    first = rows[0]
+    when = format_event_date(first.date)
+    where = f" at {first.location}" if first.location else ""
+    body = (
+        f"Hi {NAME_TAG},\n\n"
+        f'This is a reminder that "{first.title}" starts on {when}{where}.\n\n'
+        "See you there!\nAUBEVENTS"
+    )
+    recipients = tuple(
+        Recipient(row.user_email, {NAME_TAG: row.fullname or row.user_email.split("@")[0]}) for row in rows
+    )
+    return Batch(f"Reminder: {first.title}", body, recipients)
+
+
+def send_reminders(window: timedelta = timedelta(hours=24), now: Optional[datetime] = None, transport=None,
+                   concurrency: Optional[int] = None, batch_size: int = MAX_RECIPIENTS,
+                   dry_run: bool = False) -> dict:
+    """Send the reminders due for events starting within `window` from `now`; returns counts.
+
+    `now` is wall-clock time in the event time zone, like Events.date (default: database.event_now()).
+
+    due: registrations found; sent / failed: per recipient; skipped: claimed by another run.
+    """
+    now = now or event_now()
+    kind = reminder_kind(window)
+    batch_size = max(1, min(batch_size, MAX_RECIPIENTS))  # keeps one mailer batch per claim
+    rows = get_due_reminders(kind, now, now + window)
+    summary = {"due": len(rows), "sent": 0, "failed": 0, "skipped": 0}
+    if dry_run or not rows:
+        return summary
+
+    claimed = []
+    for _, event_rows in groupby(rows, key=lambda row: row.event_id):
+        event_rows = list(event_rows)
+        for i in range(0, len(event_rows), batch_size):
+            chunk = event_rows[i:i + batch_size]
+            pairs = [(row.event_id, row.user_email) for row in chunk]
+            if claim_reminders(kind, pairs):
+                claimed.append((render_batch(chunk), pairs))
+            else:
+                summary["skipped"] += len(pairs)
+
+    results = send_batches([batch for batch, _ in claimed], transport, concurrency)
+    for (_, pairs), (_, sent) in zip(claimed, results):
+        if sent:
+            summary["sent"] += len(pairs)
+        else:
+            release_reminders(kind, pairs)
+            summary["failed"] += len(pairs)
+    return summary
@@ -0,0 +1,61 @@
+"""
+replicas.py
+-----------
+Read-your-writes for the read replicas configured with DATABASE_REPLICA_URLS.
+
+- Requests that write (POST/PUT/PATCH/DELETE) run entirely on the primary, so a handler that
+  reads back what it just wrote never sees a lagging replica
+- A successful write sets a short-lived cookie holding the end of the sticky window; requests
+  carrying an unexpired cookie run on the primary too, whichever worker serves them. That is what
+  makes "register, then reload my events" consistent across gunicorn workers
+- ``database.database.mark_written`` gives the same guarantee to callers outside HTTP (per process)
+
+Without replicas the middleware removes itself (MiddlewareNotUsed).
+"""
+
+from __future__ import annotations
+
+import math
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from database import database
+
+COOKIE_NAME = "replica_pin"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS", "TRACE"}
+
+
+def _sticky_seconds() -> float:
+    return float(getattr(settings, "REPLICA_STICKY_SECONDS", database.REPLICA_STICKY_SECONDS))
+
+
+def pinned_until(request) -> float:
+    """Unix time until which this client's reads go to the primary (0 when not pinned)."""
+    try:
+        return float(request.COOKIES.get(COOKIE_NAME, 0))
+    except ValueError:
+        return 0.0
+
+
+class ReadYourWritesMiddleware:
+    """Pin writes, and reads shortly after a client's own write, to the primary database."""
+
+    def __init__(self, get_response):
+        if not database.replica_engines:
+            raise MiddlewareNotUsed("no read replicas configured")
+        self.get_response = get_response
+
+    def __call__(self, request):
+        writes = request.method.upper() not in SAFE_METHODS
+        if not writes and pinned_until(request) <= time.time():
+            return self.get_response(request)
+
+        with database.use_primary():
+            response = self.get_response(request)
+        if writes and response.status_code < 400:
+            sticky = _sticky_seconds()
+            response.set_cookie(COOKIE_NAME, f"{time.time() + sticky:.3f}", max_age=math.ceil(sticky),
+                                httponly=True, samesite="Lax", secure=not settings.DEBUG)
+        return response
@@ -20,7 +20,7 @@ Install with:
     pip install fastapi pydantic sqlmodel
 """
 
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from pydantic import BaseModel, validator
 
@@ -144,6 +144,7 @@ class EventOut(BaseModel):
     speakers: List[str]
     category: Optional[str] = None
     image_url: Optional[str] = None
+    image_variants: Dict[str, str] = {}
 
     class Config:
         from_attributes = True  # allows reading from SQLModel/ORM objects
@@ -0,0 +1,338 @@
+"""
+search.py
+---------
+Typo-tolerant event search: an in-memory trigram index over title, location, speakers and organizers.
+
+- Text is normalized (accents stripped, lowercased, punctuation dropped) into words. Trigrams index
+  the vocabulary, not the events: each distinct word is stored once with its pg_trgm-style padded
+  trigrams ("hal" -> "  h", " ha", "hal", "al "), and words point at the events using them
+- A query word matches the vocabulary words whose trigram similarity (Dice coefficient) is at least
+  WORD_MIN_SIMILARITY, so "hal" finds "hall" and "robtics" finds "robotics". Trigrams miss one-letter
+  slips inside short words ("dmia" shares one trigram with "dima"), so words of EDIT_MIN_LENGTH or
+  more letters are also matched one edit away through a deletion neighbourhood (every word minus
+  one letter), scored 1 - 1/length. An event must contain
+  a match for every query word that matched anything; its score is the mean best similarity over
+  all query words, and ``search`` returns the top-k events scoring at least ``min_score``
+  (ties: newest event first)
+- The vocabulary stays small even for 100k events. Results are collected best first over
+  combinations of one similarity level per query word, each resolved with C-level set
+  intersections, until the top-k is full; events are never scored one by one. That is up to
+  MAX_LEVELS ** words combinations, so past MAX_COMBINATIONS the events matching every word are
+  scored one by one instead (linear in those events), and only the first MAX_QUERY_WORDS words
+  of a query are used: a long query is never exponential
+- Kept per process and updated incrementally by backend/crud.py writes, tagged with the "events"
+  data version like backend/catalog.py; a version this process did not write itself (another
+  worker's edit) makes the next query rebuild it from one query
+
+The ``python -m bench.search`` benchmark compares it with the SQL ``LIKE`` path.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+from math import prod
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.conf import settings
+
+from database.database import DATA_EVENTS, get_catalog_rows, get_data_version, get_event_record, use_primary
+
+DEFAULT_MIN_SCORE = 0.6
+WORD_MIN_SIMILARITY = 0.5
+EDIT_MIN_LENGTH = 4
+MAX_LEVELS = 4  # distinct similarity levels considered per query word
+MAX_QUERY_WORDS = 8  # later words of a query are ignored
+MAX_COMBINATIONS = 256  # beyond this many level combinations, events are scored one by one
+_EMPTY: frozenset = frozenset()
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text: str) -> List[str]:
+    """Lowercased ASCII words of `text`, accents removed ("Café-Bar" -> ["cafe", "bar"])."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    ascii_text = "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+    return _NON_WORD.sub(" ", ascii_text).split()
+
+
+def word_trigrams(word: str) -> Set[str]:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def deletions(word: str) -> Set[str]:
+    """`word` and every variant of it with one letter removed ("dima" -> dima, ima, dma, dia, dim)."""
+    return {word, *(word[:i] + word[i + 1:] for i in range(len(word)))}
+
+
+def trigrams(text: str) -> Set[str]:
+    grams = set()
+    for word in normalize(text):
+        grams |= word_trigrams(word)
+    return grams
+
+
+def event_text(title: Optional[str], location: Optional[str] = None,
+               speakers: Iterable[str] = (), organizers: Iterable[str] = ()) -> str:
+    """The searchable text of an event (its description is left out on purpose: it is long and noisy)."""
+    return " ".join(part for part in (title, location, *(speakers or ()), *(organizers or ())) if part)
+
+
+class TrigramIndex:
+    """Word -> event postings plus a trigram index of the vocabulary. Not thread-safe for writers."""
+
+    def __init__(self, version: int = 0):
+        self.version = version
+        self._texts: Dict[int, str] = {}
+        self._word_events: Dict[str, Set[int]] = {}
+        self._gram_words: Dict[str, Set[str]] = {}
+        self._word_sizes: Dict[str, int] = {}
+        self._deletion_words: Dict[str, Set[str]] = {}
+        self._similar_cache: Dict[str, List[Tuple[float, str]]] = {}
+        self._max_id = 0  # upper bound of the indexed ids
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def add(self, event_id: int, text: str) -> None:
+        if event_id in self._texts:
+            self.remove(event_id)
+        self._texts[event_id] = text
+        self._max_id = max(self._max_id, event_id)
+        for word in set(normalize(text)):
+            events = self._word_events.get(word)
+            if events is None:
+                self._word_events[word] = {event_id}
+                self._add_word(word)
+            else:
+                events.add(event_id)
+
+    def remove(self, event_id: int) -> None:
+        text = self._texts.pop(event_id, None)
+        if text is None:
+            return
+        for word in set(normalize(text)):
+            events = self._word_events.get(word)
+            if events is None:
+                continue
+            events.discard(event_id)
+            if not events:
+                del self._word_events[word]
+                self._remove_word(word)
+
+    def _add_word(self, word: str) -> None:
+        grams = word_trigrams(word)
+        self._word_sizes[word] = len(grams)
+        for gram in grams:
+            self._gram_words.setdefault(gram, set()).add(word)
+        if len(word) >= EDIT_MIN_LENGTH:
+            for variant in deletions(word):
+                self._deletion_words.setdefault(variant, set()).add(word)
+        self._similar_cache.clear()
+
+    def _remove_word(self, word: str) -> None:
+        del self._word_sizes[word]
+        for gram in word_trigrams(word):
+            words = self._gram_words.get(gram)
+            if words is not None:
+                words.discard(word)
+                if not words:
+                    del self._gram_words[gram]
+        if len(word) >= EDIT_MIN_LENGTH:
+            for variant in deletions(word):
+                words = self._deletion_words.get(variant)
+                if words is not None:
+                    words.discard(word)
+                    if not words:
+                        del self._deletion_words[variant]
+        self._similar_cache.clear()
+
+    def similar_words(self, word: str) -> List[Tuple[float, str]]:
+        """[(similarity, vocabulary word)] at or above WORD_MIN_SIMILARITY, most similar first."""
+        cached = self._similar_cache.get(word)
+        if cached is not None:
+            return cached
+        grams = word_trigrams(word)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._gram_words.get(gram, _EMPTY))
+        sizes = self._word_sizes
+        best = {}
+        for candidate, count in shared.items():
+            similarity = 2 * count / (len(grams) + sizes[candidate])
+            if similarity >= WORD_MIN_SIMILARITY:
+                best[candidate] = similarity
+        if len(word) >= EDIT_MIN_LENGTH:
+            # Sharing a deletion variant means one deletion, insertion, substitution or transposition apart
+            for variant in deletions(word):
+                for candidate in self._deletion_words.get(variant, _EMPTY):
+                    similarity = 1.0 if candidate == word else 1 - 1 / max(len(word), len(candidate))
+                    if similarity > best.get(candidate, 0.0):
+                        best[candidate] = similarity
+        similar = [(round(similarity, 4), candidate) for candidate, similarity in best.items()]
+        similar.sort(key=lambda item: (-item[0], item[1]))
+        if len(self._similar_cache) >= 4096:
+            self._similar_cache.clear()
+        self._similar_cache[word] = similar
+        return similar
+
+    def search(self, query: str, limit: int = 20, min_score: float = DEFAULT_MIN_SCORE,
+               candidates: Optional[Set[int]] = None) -> List[Tuple[int, float]]:
+        """[(event_id, score)] of the best `limit` matches, best first.
+
+        `candidates` restricts the matches to those ids (the events left after the listing's other
+        filters); it is applied before `limit`, so filtered-out events never take a slot.
+        """
+        words = list(dict.fromkeys(normalize(query)))[:MAX_QUERY_WORDS]
+        if not words or limit <= 0:
+            return []
+        levels = [self._levels(similar) for similar in map(self.similar_words, words) if similar]
+        if not levels:
+            return []
+        if prod(len(word_levels) for word_levels in levels) > MAX_COMBINATIONS:
+            return self._search_scored(levels, len(words), limit, min_score, candidates)
+
+        # Best first over combinations of one similarity level per word: an event's score is that of
+        # the first (highest) combination whose sets all contain it, so nothing is scored one by one
+        by_total: Dict[float, List[tuple]] = {}
+        for combo in itertools.product(*levels):
+            by_total.setdefault(round(sum(sim for sim, _ in combo), 4), []).append(combo)
+        results, seen, found = [], None, 0
+        for total in sorted(by_total, reverse=True):
+            score = total / len(words)
+            if score < min_score or found >= limit:
+                break
+            # The posting sets themselves may come back here, so nothing below updates in place
+            matched = None
+            for combo in by_total[total]:
+                sets = sorted((events for _, events in combo), key=len)
+                events = sets[0].intersection(*sets[1:]) if len(sets) > 1 else sets[0]
+                matched = events if matched is None else matched | events
+            if seen is not None:
+                matched = matched - seen
+            if candidates is not None:
+                matched = matched & candidates
+            if matched:
+                seen = matched if seen is None else seen | matched
+                found += len(matched)
+                results.append((score, matched))
+
+        out = []
+        for score, matched in results:
+            out.extend((event_id, round(score, 4)) for event_id in self._newest(matched, limit - len(out)))
+        return out
+
+    def _search_scored(self, levels: List[List[Tuple[float, Set[int]]]], word_count: int, limit: int,
+                       min_score: float, candidates: Optional[Set[int]]) -> List[Tuple[int, float]]:
+        """Same results as the combination walk in ``search``, by summing each word's best level per event."""
+        unions = sorted((set().union(*(events for _, events in word_levels)) for word_levels in levels), key=len)
+        matched = unions[0].intersection(*unions[1:])
+        if candidates is not None:
+            matched &= candidates
+        scored = []
+        for event_id in matched:
+            total = sum(next(sim for sim, events in word_levels if event_id in events) for word_levels in levels)
+            score = round(total, 4) / word_count
+            if score >= min_score:
+                scored.append((score, event_id))
+        return [(event_id, round(score, 4)) for score, event_id in heapq.nlargest(limit, scored)]
+
+    def _newest(self, events: Set[int], count: int) -> List[int]:
+        """The `count` highest ids in `events` (ties between equal scores go to the newest event)."""
+        if count <= 0:
+            return []
+        # A dense set is cheaper to probe downwards from the highest id than to scan entirely
+        if len(events) * len(events) < count * self._max_id:
+            return heapq.nlargest(count, events)
+        newest, event_id = [], self._max_id
+        while len(newest) < count and event_id > 0:
+            if event_id in events:
+                newest.append(event_id)
+            event_id -= 1
+        return newest
+
+    def _levels(self, similar: List[Tuple[float, str]]) -> List[Tuple[float, Set[int]]]:
+        """[(similarity, events holding a word that similar)] for the MAX_LEVELS best similarities."""
+        grouped: Dict[float, List[str]] = {}
+        for sim, word in similar:
+            if sim not in grouped and len(grouped) == MAX_LEVELS:
+                break
+            grouped.setdefault(sim, []).append(word)
+        word_events = self._word_events
+        return [
+            (sim, word_events[words[0]] if len(words) == 1 else set().union(*(word_events[w] for w in words)))
+            for sim, words in grouped.items()
+        ]
+
+
+# --- Process-wide index, kept in step with the "events" data version ---
+
+_index: Optional[TrigramIndex] = None
+_checked_at = 0.0
+_lock = threading.RLock()  # queries and in-place updates must not interleave
+
+
+def enabled() -> bool:
+    return bool(getattr(settings, "EVENT_FUZZY_SEARCH", True))
+
+
+def build_index(version: int) -> TrigramIndex:
+    index = TrigramIndex(version)
+    for row in get_catalog_rows():
+        index.add(row.id, event_text(row.title, row.location, row.speakers, row.organizers))
+    return index
+
+
+def current_index() -> TrigramIndex:
+    global _index, _checked_at
+    index = _index
+    now = time.monotonic()
+    if index is not None and now - _checked_at < float(getattr(settings, "EVENT_CATALOG_RECHECK_SECONDS", 1.0)):
+        return index
+    version = get_data_version(DATA_EVENTS)  # read before the rows, see catalog.current_snapshot
+    if index is None or index.version != version:
+        with _lock:
+            index = _index
+            if index is None or index.version != version:
+                index = build_index(version)
+                _index = index
+    _checked_at = now
+    return index
+
+
+def event_changed(version: int, event_id: int) -> None:
+    """Re-index one event after a crud write that moved the data version to `version`.
+
+    Only a write that directly follows the indexed version is applied in place; after a gap
+    (another worker wrote in between) the index is dropped and rebuilt by the next query.
+    """
+    global _index
+    with _lock:
+        index = _index
+        if index is None:
+            return
+        if index.version != version - 1:
+            _index = None
+            return
+        with use_primary():
+            row = get_event_record(event_id)
+        if row is None:
+            index.remove(event_id)
+        else:
+            index.add(event_id, event_text(row.title, row.location, row.speakers, row.organizers))
+        index.version = version
+
+
+def search_event_ids(query: str, limit: int = 50, min_score: Optional[float] = None,
+                     candidates: Optional[Set[int]] = None) -> List[int]:
+    """Ids of the events best matching `query` (among `candidates`, if given), best first."""
+    if min_score is None:
+        min_score = float(getattr(settings, "EVENT_FUZZY_MIN_SCORE", DEFAULT_MIN_SCORE))
+    with _lock:
+        index = current_index()
+        return [event_id for event_id, _ in index.search(query, limit, min_score, candidates)]
@@ -1,6 +1,7 @@
 
 from pathlib import Path
 import os
+import json
 from dotenv import load_dotenv
 import dj_database_url
 import pymysql
@@ -41,6 +42,34 @@ SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 SUPABASE_BUCKET = os.getenv("SUPABASE_BUCKET", "event-images")
 SUPABASE_BUCKET_PUBLIC = os.getenv("SUPABASE_BUCKET_PUBLIC", "True") == "True"
 
+# Image storage backend: "supabase" (default) or "local" (filesystem, for tests/offline runs)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase")
+LOCAL_STORAGE_DIR = os.getenv("LOCAL_STORAGE_DIR", str(BASE_DIR / "media"))
+LOCAL_STORAGE_URL = os.getenv("LOCAL_STORAGE_URL", "/media/")
+
+# Event image processing (WebP variants, see backend/images.py)
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", 2))
+IMAGE_PROCESSING_TIMEOUT = float(os.getenv("IMAGE_PROCESSING_TIMEOUT", 30))
+# Uploads allowed to queue for the workers before the upload endpoint answers 503
+IMAGE_QUEUE = int(os.getenv("IMAGE_QUEUE", 8))
+
+# Password hashing (accounts/passwords.py): bcrypt cost, process pool size (0 = inline) and the
+# number of hashes allowed to queue before login/signup answer 429
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", 16))
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", 10))
+
+# Rate limiting for auth endpoints (backend/ratelimit.py). Limits are declared on the views;
+# RATE_LIMITS overrides them per scope, e.g. {"login": {"ip": "300/m"}}. Trust X-Forwarded-For
+# only behind a proxy that sets it.
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "True") == "True"
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "False") == "True"
+RATE_LIMITS = json.loads(os.getenv("RATE_LIMITS", "{}"))
+
+# Lifetime in seconds of direct-upload tokens (POST /api/events/upload-url)
+SIGNED_UPLOAD_TTL = int(os.getenv("SIGNED_UPLOAD_TTL", 300))
+
 # Email settings (provide safe defaults for development)
 EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "django.core.mail.backends.console.EmailBackend")
 EMAIL_HOST = os.getenv("EMAIL_HOST", "localhost")
@@ -135,12 +164,21 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database (uses MySQL from .env if available)
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# True: the SQLModel layer (database/database.py) borrows Django's connection instead of keeping
+# its own pool, and atomic() blocks cover both (database/django_bridge.py)
+SQLMODEL_USE_DJANGO_CONNECTION = os.getenv("SQLMODEL_USE_DJANGO_CONNECTION", "False") == "True"
+# Seconds a worker keeps its database connection; with the bridge it is the only connection, so
+# it is kept by default instead of reconnecting (and renegotiating TLS) on every request
+DB_CONN_MAX_AGE = int(os.getenv("DB_CONN_MAX_AGE", "60" if SQLMODEL_USE_DJANGO_CONNECTION else "0"))
+
 if DATABASE_URL:
     DATABASES = {
-        'default': dj_database_url.parse(DATABASE_URL)
+        'default': dj_database_url.parse(DATABASE_URL, conn_max_age=DB_CONN_MAX_AGE,
+                                         conn_health_checks=DB_CONN_MAX_AGE > 0)
     }
-    # Set MySQL engine to use PyMySQL
-    DATABASES['default']['ENGINE'] = 'django.db.backends.mysql'
+    # Set MySQL engine to use PyMySQL (sqlite URLs, e.g. tests and bench/, keep the sqlite backend)
+    if DATABASES['default']['ENGINE'] != 'django.db.backends.sqlite3':
+        DATABASES['default']['ENGINE'] = 'django.db.backends.mysql'
     
     # Add SSL CA if file path is provided
     ca_path = os.environ.get("MYSQL_SSL_CA_PATH")
@@ -208,3 +246,68 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 MIDDLEWARE.insert(1, "whitenoise.middleware.WhiteNoiseMiddleware")
 
+# Per-request SQL counting/timing for the SQLModel engine and Django (backend/instrumentation.py).
+# Outermost, so the Server-Timing "app" duration covers every other middleware.
+MIDDLEWARE.insert(0, "backend.instrumentation.RequestInstrumentationMiddleware")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))
+SERVER_TIMING_HEADER = os.getenv("SERVER_TIMING_HEADER", "True") == "True"
+
+# Prometheus-style /metrics (backend/metrics.py). With several gunicorn workers, point METRICS_DIR
+# at a directory shared by all of them so every scrape sees the whole server.
+MIDDLEWARE.insert(1, "backend.metrics.MetricsMiddleware")
+METRICS_DIR = os.getenv("METRICS_DIR") or None
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 1.0))
+# Bearer token Prometheus must send; without it /metrics is only served when DEBUG is on
+METRICS_TOKEN = os.getenv("METRICS_TOKEN") or None
+
+# Read replicas for list/detail reads (database/database.py reads DATABASE_REPLICA_URLS itself).
+# After a write, a client's reads stay on the primary for REPLICA_STICKY_SECONDS (backend/replicas.py);
+# the middleware removes itself when no replica is configured.
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", 5))
+MIDDLEWARE.append("backend.replicas.ReadYourWritesMiddleware")
+
+# Public event list/search/detail from a per-process snapshot (backend/catalog.py); other workers'
+# edits become visible within EVENT_CATALOG_RECHECK_SECONDS, seat counts are always read fresh
+EVENT_CATALOG_SNAPSHOT = os.getenv("EVENT_CATALOG_SNAPSHOT", "True") == "True"
+EVENT_CATALOG_RECHECK_SECONDS = float(os.getenv("EVENT_CATALOG_RECHECK_SECONDS", 1.0))
+# Searches without a substring match fall back to the trigram index (backend/search.py); an event
+# must share EVENT_FUZZY_MIN_SCORE of the query's trigrams to be returned
+EVENT_FUZZY_SEARCH = os.getenv("EVENT_FUZZY_SEARCH", "True") == "True"
+EVENT_FUZZY_MIN_SCORE = float(os.getenv("EVENT_FUZZY_MIN_SCORE", 0.6))
+
+# iCalendar feeds (/api/my/calendar.ics, backend/calendar_feed.py): rendered feeds stay in the Django
+# cache for CALENDAR_CACHE_SECONDS (registrations and event edits change their key anyway);
+# events have no end time, so each one is shown as CALENDAR_EVENT_MINUTES long
+CALENDAR_CACHE_SECONDS = int(os.getenv("CALENDAR_CACHE_SECONDS", 86400))
+CALENDAR_EVENT_MINUTES = int(os.getenv("CALENDAR_EVENT_MINUTES", 60))
+
+# Bulk email of background jobs (backend/mailer.py): "auto" uses SendGrid batches when
+# SENDGRID_API_KEY is set and EMAIL_BACKEND otherwise; "fake" records instead of sending.
+# MAIL_CONCURRENCY bounds the send calls in flight
+MAIL_TRANSPORT = os.getenv("MAIL_TRANSPORT", "auto")
+MAIL_CONCURRENCY = int(os.getenv("MAIL_CONCURRENCY", 4))
+# Registrants are emailed when an event's title/date/location changes or it is deleted; the mail
+# goes out on NOTIFICATION_WORKERS background threads, off the request path (backend/notifications.py)
+EVENT_CHANGE_NOTIFICATIONS = os.getenv("EVENT_CHANGE_NOTIFICATIONS", "True") == "True"
+NOTIFICATION_WORKERS = int(os.getenv("NOTIFICATION_WORKERS", 1))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        # One JSON line per request; set REQUEST_LOG_LEVEL=WARNING to silence
+        "backend.instrumentation.requests": {
+            "handlers": ["console"],
+            "level": os.getenv("REQUEST_LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
+        "backend.instrumentation.slow_queries": {
+            "handlers": ["console"],
+            "level": "WARNING",
+            "propagate": False,
+        },
+    },
+}
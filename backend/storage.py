@@ -0,0 +1,445 @@
+"""
+storage.py
+----------
+Object storage used for event images.
+
+- SupabaseStorage: the production backend (wraps backend.supabase_client.get_supabase_client)
+- LocalStorage:    writes under LOCAL_STORAGE_DIR and serves from LOCAL_STORAGE_URL (tests, offline runs)
+
+Pick one with the STORAGE_BACKEND setting ("supabase" or "local"). ``get_storage()`` returns a
+process-wide instance. Bucket provisioning (list, then create or update) happens once in
+``ensure_ready()`` and the result is cached for the lifetime of the process, so an upload costs a
+single storage request.
+
+``upload_file()`` streams a Django UploadedFile (or any seekable file object) instead of taking
+bytes, so large uploads are never materialised as one Python bytes object. On Supabase it goes
+through the resumable (TUS) endpoint: TUS_CHUNK_SIZE windows are read from the file while they are
+sent, and a failed chunk is resumed from the offset the server reports. Uploads overwrite, which
+makes content-addressed paths safe to write twice.
+
+``create_signed_upload()`` issues a short-lived URL the browser can PUT an object to directly, so
+image bytes never pass through a Django worker. For the local backend the URL points at a stand-in
+endpoint (``/api/storage/local-upload``) that accepts a ``django.core.signing`` token.
+"""
+
+from __future__ import annotations
+
+import base64
+import mimetypes
+import os
+import threading
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+from urllib.parse import urljoin
+from uuid import uuid4
+
+from django.conf import settings
+from django.core import signing
+
+from backend.supabase_client import get_supabase_client
+
+
+class StorageError(Exception):
+    """Raised when the storage backend rejects or fails a request."""
+
+
+# Salt for the tokens accepted by the local stand-in upload endpoint
+LOCAL_UPLOAD_SALT = "backend.storage.local-upload"
+
+# Supabase's resumable endpoint only accepts 6 MB chunks (the last one may be shorter)
+TUS_CHUNK_SIZE = 6 * 1024 * 1024
+# Failed chunks tolerated per upload before giving up
+TUS_ATTEMPTS = 3
+
+
+class StorageBackend(ABC):
+    """Interface of a storage backend; a subclass missing a method fails when it is instantiated."""
+
+    name = "base"
+
+    def __init__(self):
+        self._ready = False
+        self._ready_lock = threading.Lock()
+
+    def ensure_ready(self) -> None:
+        """Provision the bucket/directory once per process; later calls are free."""
+        if self._ready:
+            return
+        with self._ready_lock:
+            if not self._ready:
+                self._provision()
+                self._ready = True
+
+    def _provision(self) -> None:
+        pass
+
+    @abstractmethod
+    def upload(self, path: str, data: bytes, content_type: str) -> None:
+        ...
+
+    @abstractmethod
+    def upload_file(self, path: str, fileobj: BinaryIO, content_type: str) -> None:
+        ...
+
+    @abstractmethod
+    def exists(self, path: str) -> bool:
+        ...
+
+    @abstractmethod
+    def public_url(self, path: str) -> str:
+        ...
+
+    @abstractmethod
+    def stat(self, path: str) -> Optional[dict]:
+        """Return ``{"size": int, "content_type": str}`` for an object, or None if it is missing."""
+
+    @abstractmethod
+    def head(self, path: str, size: int = 16) -> bytes:
+        """Return the first `size` bytes of an object (enough to sniff its real format)."""
+
+    @abstractmethod
+    def delete(self, path: str) -> None:
+        """Remove an object; removing a missing object is not an error."""
+
+    @abstractmethod
+    def create_signed_upload(self, path: str, content_type: str) -> dict:
+        """Return ``{"url", "method", "headers"}`` for a direct browser upload to ``path``."""
+
+
+def iter_chunks(fileobj: BinaryIO, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Yield a file's content chunk by chunk, using UploadedFile.chunks() when available."""
+    if hasattr(fileobj, "chunks"):
+        yield from fileobj.chunks(chunk_size)
+        return
+    fileobj.seek(0)
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+class _Window:
+    """`length` bytes of a file from `offset`, read 64 KB at a time while the HTTP client sends them."""
+
+    def __init__(self, fileobj: BinaryIO, offset: int, length: int):
+        self.fileobj = fileobj
+        self.offset = offset
+        self.length = length
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self) -> Iterator[bytes]:
+        self.fileobj.seek(self.offset)
+        left = self.length
+        while left > 0:
+            chunk = self.fileobj.read(min(64 * 1024, left))
+            if not chunk:
+                return
+            left -= len(chunk)
+            yield chunk
+
+
+def _file_size(fileobj: BinaryIO) -> int:
+    fileobj.seek(0, os.SEEK_END)
+    size = fileobj.tell()
+    fileobj.seek(0)
+    return size
+
+
+class SupabaseStorage(StorageBackend):
+    name = "supabase"
+
+    def __init__(self, client, bucket: str, public: bool = True,
+                 file_size_limit: Optional[int] = None, allowed_mime_types: Optional[list] = None,
+                 storage_url: Optional[str] = None, api_key: Optional[str] = None, http=None):
+        super().__init__()
+        self.client = client
+        self.bucket = bucket
+        self.public = public
+        # Enforced by Supabase itself, which matters for direct (signed URL) uploads
+        self.file_size_limit = file_size_limit
+        self.allowed_mime_types = allowed_mime_types
+        # Storage REST API (".../storage/v1") for resumable uploads and ranged reads;
+        # `http` is anything with requests.Session.request()
+        self.storage_url = storage_url.rstrip("/") if storage_url else None
+        self.api_key = api_key
+        self._http = http
+
+    def _provision(self) -> None:
+        storage_client = self.client.storage
+        try:
+            existing_buckets = {bucket_info.name for bucket_info in storage_client.list_buckets()}
+        except Exception as exc:
+            raise StorageError(f"Failed to list Supabase buckets: {exc}") from exc
+        from storage3.types import CreateOrUpdateBucketOptions
+        options = CreateOrUpdateBucketOptions(public=self.public)
+        if self.file_size_limit:
+            options["file_size_limit"] = self.file_size_limit
+        if self.allowed_mime_types:
+            options["allowed_mime_types"] = list(self.allowed_mime_types)
+        if self.bucket in existing_buckets:
+            # An existing bucket gets the limits too: they are what stops a signed-URL client
+            # from uploading an arbitrary or huge object
+            try:
+                storage_client.update_bucket(self.bucket, options)
+            except Exception as exc:
+                raise StorageError(f"Failed to update Supabase bucket '{self.bucket}': {exc}") from exc
+            return
+        try:
+            storage_client.create_bucket(self.bucket, options=options)
+        except Exception as exc:
+            raise StorageError(f"Failed to create Supabase bucket '{self.bucket}': {exc}") from exc
+
+    def _objects(self):
+        return self.client.storage.from_(self.bucket)
+
+    def upload(self, path: str, data, content_type: str) -> None:
+        try:
+            response = self._objects().upload(path, data, {"contentType": content_type, "upsert": "true"})
+        except Exception as exc:
+            raise StorageError(f"Supabase upload failed: {exc}") from exc
+        error = getattr(response, "error", None)
+        if error:
+            raise StorageError(str(error))
+
+    def upload_file(self, path: str, fileobj: BinaryIO, content_type: str) -> None:
+        if not self.storage_url:
+            # No TUS endpoint configured: storage3 can still stream the body from a file path
+            if hasattr(fileobj, "temporary_file_path"):
+                self.upload(path, fileobj.temporary_file_path(), content_type)
+                return
+            fileobj.seek(0)
+            self.upload(path, fileobj.read(), content_type)
+            return
+        size = _file_size(fileobj)
+        self._tus_send(self._tus_create(path, content_type, size), fileobj, size)
+
+    def _http_request(self, method: str, url: str, headers: dict, data=None):
+        if self._http is None:
+            import requests
+            self._http = requests.Session()
+        headers = {"Authorization": f"Bearer {self.api_key}", **headers}
+        return self._http.request(method, url, headers=headers, data=data, timeout=60)
+
+    def _tus_create(self, path: str, content_type: str, size: int) -> str:
+        metadata = {"bucketName": self.bucket, "objectName": path, "contentType": content_type}
+        encoded = ",".join(f"{key} {base64.b64encode(value.encode()).decode()}" for key, value in metadata.items())
+        try:
+            response = self._http_request("POST", self._resumable_url(), {
+                "Tus-Resumable": "1.0.0", "Upload-Length": str(size), "Upload-Metadata": encoded,
+                "x-upsert": "true",
+            })
+        except Exception as exc:
+            raise StorageError(f"Supabase upload failed: {exc}") from exc
+        location = response.headers.get("Location")
+        if response.status_code != 201 or not location:
+            raise StorageError(f"Supabase upload failed: HTTP {response.status_code}")
+        return urljoin(self._resumable_url(), location)
+
+    def _resumable_url(self) -> str:
+        return f"{self.storage_url}/upload/resumable"
+
+    def _tus_offset(self, location: str) -> int:
+        response = self._http_request("HEAD", location, {"Tus-Resumable": "1.0.0"})
+        if response.status_code >= 400:
+            raise StorageError(f"Supabase upload failed: HTTP {response.status_code}")
+        return int(response.headers["Upload-Offset"])
+
+    def _tus_send(self, location: str, fileobj: BinaryIO, size: int) -> None:
+        offset, failures = 0, 0
+        while offset < size:
+            window = _Window(fileobj, offset, min(TUS_CHUNK_SIZE, size - offset))
+            try:
+                response = self._http_request("PATCH", location, {
+                    "Tus-Resumable": "1.0.0", "Upload-Offset": str(offset), "Content-Type": "application/offset+octet-stream",
+                }, data=window)
+                if response.status_code != 204:
+                    raise StorageError(f"HTTP {response.status_code}")
+                stored = int(response.headers["Upload-Offset"])
+                if stored <= offset:
+                    # A server that accepts chunks without storing them would keep us here forever
+                    raise StorageError(f"no progress past offset {offset}")
+                offset = stored
+            except Exception as exc:
+                failures += 1
+                if failures >= TUS_ATTEMPTS:
+                    raise StorageError(f"Supabase upload failed: {exc}") from exc
+                try:
+                    # Resume from whatever part of the chunk the server did store
+                    offset = self._tus_offset(location)
+                except Exception as head_exc:
+                    raise StorageError(f"Supabase upload failed: {head_exc}") from head_exc
+
+    def exists(self, path: str) -> bool:
+        try:
+            return bool(self._objects().exists(path))
+        except Exception as exc:
+            raise StorageError(f"Supabase lookup failed: {exc}") from exc
+
+    def public_url(self, path: str) -> str:
+        public_response = self._objects().get_public_url(path)
+        public_url = None
+        if isinstance(public_response, str):
+            public_url = public_response
+        elif isinstance(public_response, dict):
+            public_url = public_response.get("publicUrl") or public_response.get("public_url")
+            if not public_url and isinstance(public_response.get("data"), dict):
+                public_url = public_response["data"].get("publicUrl")
+        elif hasattr(public_response, "data"):
+            data_attr = public_response.data
+            if isinstance(data_attr, dict):
+                public_url = data_attr.get("publicUrl")
+            else:
+                public_url = data_attr
+
+        if not public_url:
+            # Fallback to manual construction (bucket must be public)
+            base_url = (getattr(settings, "SUPABASE_URL", "") or "").rstrip("/")
+            public_url = f"{base_url}/storage/v1/object/public/{self.bucket}/{path}" if base_url else path
+        return public_url
+
+    def stat(self, path: str) -> Optional[dict]:
+        if not self.exists(path):
+            return None
+        try:
+            info = self._objects().info(path) or {}
+        except Exception as exc:
+            raise StorageError(f"Supabase lookup failed: {exc}") from exc
+        metadata = info.get("metadata") or {}
+        return {
+            "size": int(info.get("size") or metadata.get("size") or 0),
+            "content_type": info.get("content_type") or info.get("contentType") or metadata.get("mimetype") or "",
+        }
+
+    def head(self, path: str, size: int = 16) -> bytes:
+        if not self.storage_url:
+            try:
+                return bytes(self._objects().download(path)[:size])
+            except Exception as exc:
+                raise StorageError(f"Supabase download failed: {exc}") from exc
+        try:
+            response = self._http_request("GET", f"{self.storage_url}/object/{self.bucket}/{path}",
+                                          {"Range": f"bytes=0-{size - 1}"})
+        except Exception as exc:
+            raise StorageError(f"Supabase download failed: {exc}") from exc
+        if response.status_code not in (200, 206):
+            raise StorageError(f"Supabase download failed: HTTP {response.status_code}")
+        return response.content[:size]
+
+    def delete(self, path: str) -> None:
+        try:
+            self._objects().remove([path])
+        except Exception as exc:
+            raise StorageError(f"Supabase delete failed: {exc}") from exc
+
+    def create_signed_upload(self, path: str, content_type: str) -> dict:
+        # Supabase fixes the lifetime of signed upload URLs server-side (2 hours)
+        try:
+            signed = self._objects().create_signed_upload_url(path)
+        except Exception as exc:
+            raise StorageError(f"Failed to create signed upload URL: {exc}") from exc
+        return {"url": signed["signed_url"], "method": "PUT", "headers": {"Content-Type": content_type}}
+
+
+class LocalStorage(StorageBackend):
+    name = "local"
+
+    def __init__(self, root, base_url: str):
+        super().__init__()
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+
+    def _provision(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _full_path(self, path: str) -> Path:
+        full = (self.root / path).resolve()
+        if self.root.resolve() not in full.parents:
+            raise StorageError(f"Invalid object path: {path}")
+        return full
+
+    def upload(self, path: str, data: bytes, content_type: str) -> None:
+        self._write(path, [data])
+
+    def upload_file(self, path: str, fileobj: BinaryIO, content_type: str) -> None:
+        self._write(path, iter_chunks(fileobj))
+
+    def _write(self, path: str, chunks) -> None:
+        # Write to a side file and rename, so readers never see a partial object
+        full = self._full_path(path)
+        full.parent.mkdir(parents=True, exist_ok=True)
+        tmp = full.with_name(f"{full.name}.{uuid4().hex}.part")
+        try:
+            with open(tmp, "wb") as fh:
+                for chunk in chunks:
+                    fh.write(chunk)
+            os.replace(tmp, full)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+
+    def exists(self, path: str) -> bool:
+        return self._full_path(path).is_file()
+
+    def public_url(self, path: str) -> str:
+        return f"{self.base_url}/{path}"
+
+    def stat(self, path: str) -> Optional[dict]:
+        full = self._full_path(path)
+        if not full.is_file():
+            return None
+        content_type = mimetypes.guess_type(full.name)[0] or "application/octet-stream"
+        return {"size": full.stat().st_size, "content_type": content_type}
+
+    def head(self, path: str, size: int = 16) -> bytes:
+        try:
+            with open(self._full_path(path), "rb") as fh:
+                return fh.read(size)
+        except FileNotFoundError as exc:
+            raise StorageError(f"Object not found: {path}") from exc
+
+    def delete(self, path: str) -> None:
+        self._full_path(path).unlink(missing_ok=True)
+
+    def create_signed_upload(self, path: str, content_type: str) -> dict:
+        self._full_path(path)  # reject traversal before handing out a token
+        token = signing.dumps({"path": path, "content_type": content_type}, salt=LOCAL_UPLOAD_SALT)
+        return {
+            "url": f"/api/storage/local-upload?token={token}",
+            "method": "PUT",
+            "headers": {"Content-Type": content_type},
+        }
+
+    def receive_signed_upload(self, token: str, chunks, max_age: int) -> str:
+        """Write a direct upload made with a token from ``create_signed_upload``; returns the path."""
+        try:
+            claims = signing.loads(token, salt=LOCAL_UPLOAD_SALT, max_age=max_age)
+        except signing.BadSignature as exc:
+            raise StorageError("Invalid or expired upload token.") from exc
+        self._write(claims["path"], chunks)
+        return claims["path"]
+
+
+@lru_cache(maxsize=1)
+def get_storage() -> Optional[StorageBackend]:
+    """Return the configured storage backend, or ``None`` when it is not configured."""
+    backend = (getattr(settings, "STORAGE_BACKEND", "supabase") or "supabase").lower()
+    if backend == "local":
+        return LocalStorage(settings.LOCAL_STORAGE_DIR, settings.LOCAL_STORAGE_URL)
+    client = get_supabase_client()
+    if client is None:
+        return None
+    from backend.images import FORMAT_CONTENT_TYPES, MAX_IMAGE_BYTES
+    return SupabaseStorage(
+        client,
+        getattr(settings, "SUPABASE_BUCKET", "event-images"),
+        public=getattr(settings, "SUPABASE_BUCKET_PUBLIC", True),
+        file_size_limit=MAX_IMAGE_BYTES,
+        allowed_mime_types=sorted(FORMAT_CONTENT_TYPES.values()),
+        storage_url=f"{settings.SUPABASE_URL.rstrip('/')}/storage/v1",
+        api_key=settings.SUPABASE_SERVICE_ROLE_KEY,
+    )
@@ -3,20 +3,27 @@ from __future__ import annotations
 from functools import lru_cache
 from typing import Optional
 
+from typing import TYPE_CHECKING
+
 from django.conf import settings
 
-try:
-    from supabase import Client, create_client
-except ImportError:  # pragma: no cover - handled via runtime config
-    Client = None  # type: ignore
-    create_client = None  # type: ignore
+if TYPE_CHECKING:  # pragma: no cover
+    from supabase import Client
 
 
 @lru_cache(maxsize=1)
 def get_supabase_client() -> Optional["Client"]:
-    """Return a cached Supabase client or ``None`` when not configured."""
+    """Return a cached Supabase client or ``None`` when not configured.
+
+    The supabase package (httpx, postgrest, storage3, realtime, ...) takes ~0.3 s to import, so it
+    is only imported here, on first use, instead of on every worker boot and management command.
+    """
     url = getattr(settings, "SUPABASE_URL", None)
     key = getattr(settings, "SUPABASE_SERVICE_ROLE_KEY", None)
-    if not url or not key or create_client is None:
+    if not url or not key:
+        return None
+    try:
+        from supabase import create_client
+    except ImportError:  # pragma: no cover - handled via runtime config
         return None
     return create_client(url, key)
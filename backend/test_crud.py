@@ -7,7 +7,7 @@ run: pytest backend/test_crud.py -v
 
 import pytest
 from datetime import datetime, timedelta
-from sqlmodel import Session, SQLModel
+from sqlmodel import Session, SQLModel, select
 
 from database.database import get_engine
 from database.tables import Users
@@ -20,6 +20,7 @@ from backend.crud import (
     register_user,
     unregister_user,
     list_user_events,
+    list_facets,
 )
 from backend.schemas import EventCreate, EventUpdate, UserEventAction
 
@@ -169,3 +170,152 @@ def test_unregister_user_from_event(sample_user, sample_event_data):
     # Unregister again -> should fail
     resp2 = unregister_user(UserEventAction(event_id=event.id, email=sample_user))
     assert resp2.success is False
+
+
+# --------------------------------------------------------------------
+# Filters and facet counts
+# --------------------------------------------------------------------
+
+def _make_event(category, date, capacity=3):
+    return create_event(EventCreate(
+        title=f"{category} event",
+        date=date,
+        location="AUB Campus",
+        capacity=capacity,
+        organizers=["CS Society"],
+        speakers=["Dr. Lina"],
+        category=category,
+        image_url="https://example.com/poster.png",
+    ))
+
+
+def test_list_all_events_filters_in_sql():
+    monday = datetime(2030, 1, 7, 18, 0)
+    workshop = _make_event("Workshop", monday)
+    _make_event("Concert", monday)
+    _make_event("Workshop", monday + timedelta(days=10))
+
+    ids = [e.id for e in list_all_events(category="Workshop", date_from=monday, date_to=monday + timedelta(days=1))]
+    assert ids == [workshop.id]
+    assert len(list_all_events(has_seats=True)) == 3
+
+
+def test_list_upcoming_only_excludes_past_and_sorts_by_date():
+    now = datetime.utcnow()
+    later = _make_event("Workshop", now + timedelta(days=3))
+    sooner = _make_event("Concert", now + timedelta(days=1))
+    past = _make_event("Social", now - timedelta(days=30))
+
+    assert [e.id for e in list_all_events(upcoming_only=True)] == [sooner.id, later.id]
+    assert [e.id for e in list_all_events()] == [past.id, sooner.id, later.id]
+
+
+def test_speaker_and_organizer_filters_follow_writes():
+    from database.database import backfill_event_names
+    from database.tables import EventSpeakers
+
+    monday = datetime(2030, 1, 7, 18, 0)
+    talk = _make_event("Talk", monday)
+    panel = _make_event("Panel", monday + timedelta(days=1))
+    update_event(panel.id, EventUpdate(speakers=["Rami  Khoury", "Dr. Lina"], organizers=["IEEE Student Branch"]))
+
+    assert [e.id for e in list_all_events(speaker="dr. lina")] == [talk.id, panel.id]
+    assert [e.id for e in list_all_events(speaker="Rami Khoury")] == [panel.id]
+    assert [e.id for e in list_all_events(organizer="CS Society")] == [talk.id]
+    assert list_all_events(organizer="CS Society", category="Panel") == []
+
+    # The side rows are rebuilt from the JSON columns, e.g. for events created before they existed
+    with Session(get_engine()) as session:
+        session.execute(EventSpeakers.__table__.delete())
+        session.commit()
+    assert list_all_events(speaker="Dr. Lina") == []
+    assert backfill_event_names(limit=1) == (talk.id, 1)
+    assert backfill_event_names(after_id=talk.id) == (panel.id, 1)
+    assert backfill_event_names(after_id=panel.id) == (None, 0)
+    assert [e.id for e in list_all_events(speaker="Dr. Lina")] == [talk.id, panel.id]
+
+    delete_event_by_id(talk.id)
+    assert [e.id for e in list_all_events(speaker="Dr. Lina")] == [panel.id]
+
+
+def test_facet_counts_follow_create_update_delete():
+    monday = datetime(2030, 1, 7, 18, 0)
+    a = _make_event("Workshop", monday)
+    b = _make_event("Workshop", monday + timedelta(days=7))
+    assert list_facets() == {
+        "categories": {"Workshop": 2},
+        "weeks": {"2030-01-07": 1, "2030-01-14": 1},
+    }
+
+    update_event(b.id, EventUpdate(category="Concert", date=monday + timedelta(days=2)))
+    assert list_facets() == {
+        "categories": {"Workshop": 1, "Concert": 1},
+        "weeks": {"2030-01-07": 2},
+    }
+
+    # Scoped like the listings: past events drop out of upcoming_only, created_by counts one admin's
+    past = _make_event("Workshop", datetime(2020, 1, 6, 18, 0))
+    assert list_facets(upcoming_only=True) == {
+        "categories": {"Workshop": 1, "Concert": 1},
+        "weeks": {"2030-01-07": 2},
+    }
+    assert list_facets()["weeks"]["2020-01-06"] == 1
+    assert list_facets(created_by="nobody@aub.edu.lb") == {"categories": {}, "weeks": {}}
+    delete_event_by_id(past.id)
+
+    delete_event_by_id(a.id)
+    assert list_facets() == {"categories": {"Concert": 1}, "weeks": {"2030-01-07": 1}}
+
+
+def test_soft_deleted_events_disappear_and_are_purged():
+    from database.database import (
+        get_event_roster, get_event_users, purge_deleted_events, register_user_to_event, unregister_user_from_event,
+    )
+    from database.tables import Events, UserEventLink
+
+    monday = datetime(2030, 1, 7, 18, 0)
+    gone, kept = _make_event("Workshop", monday), _make_event("Concert", monday)
+    with Session(get_engine()) as session:
+        session.add_all([Users(email=f"u{i}@aub.edu.lb", password_hash="pw", fullname=f"User {i}", is_verified=True)
+                         for i in range(3)])
+        session.commit()
+    for i in range(3):
+        register_user_to_event(f"u{i}@aub.edu.lb", gone.id)
+    register_user_to_event("u0@aub.edu.lb", kept.id)
+
+    assert delete_event_by_id(gone.id) is True
+    assert get_event(gone.id) is None
+    assert [e.id for e in list_all_events()] == [kept.id]
+    assert [e.id for e in list_user_events("u0@aub.edu.lb")] == [kept.id]
+    assert register_user_to_event("u1@aub.edu.lb", gone.id) == (False, "not_found")
+    # Nor can anyone leave it (which would hand a seat back) or read its roster
+    assert unregister_user_from_event("u1@aub.edu.lb", gone.id) is False
+    with Session(get_engine()) as session:
+        assert session.get(Events, gone.id).available_seats == 0
+    assert get_event_users(gone.id) == []
+    assert get_event_roster(gone.id) == []
+    assert get_event_users(kept.id) == ["u0@aub.edu.lb"]
+
+    # Registrations go first, a bounded batch at a time, then the event row itself
+    assert purge_deleted_events(limit=2) == (0, 2)
+    assert purge_deleted_events(limit=2) == (0, 1)
+    assert purge_deleted_events(limit=2) == (1, 0)
+    assert purge_deleted_events() == (0, 0)
+    with Session(get_engine()) as session:
+        assert session.get(Events, gone.id) is None
+        assert len(session.exec(select(UserEventLink)).all()) == 1
+
+
+def test_create_event_records_image_variants():
+    event = create_event(EventCreate(
+        title="Poster test",
+        date=datetime(2030, 1, 7, 18, 0),
+        location="AUB Campus",
+        capacity=3,
+        organizers=["CS Society"],
+        speakers=["Dr. Lina"],
+        image_url="https://cdn.example.com/events/abc/full.webp",
+    ))
+    variants = get_event(event.id).image_variants
+    assert variants["card"] == "https://cdn.example.com/events/abc/card.webp"
+    assert set(variants) == {"thumb", "card", "full"}
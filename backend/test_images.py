@@ -0,0 +1,75 @@
+"""
+Tests for the event image pipeline (backend/images.py).
+run: pytest backend/test_images.py -v
+"""
+
+import io
+
+import pytest
+
+from backend.images import IMAGE_VARIANTS, build_variants, sniff_image_format, variant_urls
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def _jpeg_with_exif(size=(2400, 1200)) -> io.BytesIO:
+    img = Image.new("RGB", size, color=(200, 30, 30))
+    exif = Image.Exif()
+    exif[0x010F] = "TestCamera"  # Make
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", exif=exif)
+    buf.seek(0)
+    return buf
+
+
+def test_sniff_image_format_uses_magic_bytes():
+    assert sniff_image_format(_jpeg_with_exif().read(16)) == "jpeg"
+    assert sniff_image_format(b"\x89PNG\r\n\x1a\n" + b"\0" * 8) == "png"
+    assert sniff_image_format(b"GIF89a" + b"\0" * 10) == "gif"
+    assert sniff_image_format(b"RIFF\0\0\0\0WEBPVP8 ") == "webp"
+    assert sniff_image_format(b"<?php echo 1; ?>") is None
+
+
+def test_build_variants_resizes_and_strips_metadata():
+    variants = build_variants(_jpeg_with_exif())
+    assert set(variants) == set(IMAGE_VARIANTS)
+    for name, data in variants.items():
+        with Image.open(io.BytesIO(data)) as img:
+            assert img.format == "WEBP"
+            assert max(img.size) == IMAGE_VARIANTS[name]
+            assert not img.getexif()
+    assert len(variants["thumb"]) < len(variants["full"])
+
+
+def test_build_variants_reads_large_jpegs_from_a_path(tmp_path):
+    path = tmp_path / "poster.jpg"
+    path.write_bytes(_jpeg_with_exif(size=(6000, 4000)).getvalue())
+    variants = build_variants(str(path))
+    with Image.open(io.BytesIO(variants["full"])) as img:
+        assert img.size == (1600, 1067)
+
+
+def test_variant_urls_derived_from_full_url():
+    base = "https://cdn.example.com/events/2030/01/07/abc"
+    assert variant_urls(f"{base}/full.webp") == {name: f"{base}/{name}.webp" for name in IMAGE_VARIANTS}
+    assert variant_urls("https://cdn.example.com/poster.png") == {}
+
+
+def test_image_queue_is_bounded(monkeypatch):
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    from backend import images
+
+    release = threading.Event()
+    slots, pool = threading.BoundedSemaphore(1), ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(images, "build_variants", lambda source: release.wait(5) and {})
+    monkeypatch.setattr(images, "_slots", lambda: slots)
+    monkeypatch.setattr(images, "_pool", lambda: pool)
+    with pytest.raises(images.ImageBusy):
+        images.process_in_pool("poster.png", timeout=0.01)  # timed out, still decoding
+    with pytest.raises(images.ImageBusy):
+        images.process_in_pool("poster.png", timeout=5)  # the only slot is still taken
+    release.set()
+    assert slots.acquire(timeout=5)
+    pool.shutdown()
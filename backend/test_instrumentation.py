@@ -0,0 +1,54 @@
+"""
+Tests for per-request SQL instrumentation (backend/instrumentation.py).
+run: pytest backend/test_instrumentation.py -v
+"""
+
+import logging
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from backend.instrumentation import install_engine_hooks, normalize_sql, server_timing, track_queries
+
+
+@pytest.fixture
+def django_settings():
+    from django.conf import settings
+    if not settings.configured:
+        settings.configure(SECRET_KEY="test-secret")
+    return settings
+
+
+def test_normalize_sql_collapses_literals_and_placeholders():
+    sql = "SELECT *  FROM events\n WHERE id IN (?, ?, ?) AND title = 'it''s' AND seats > 10 AND email = %(email_1)s"
+    assert normalize_sql(sql) == "SELECT * FROM events WHERE id IN (?...) AND title = ? AND seats > ? AND email = ?"
+
+
+def test_engine_statements_are_counted_per_block(django_settings):
+    engine = create_engine("sqlite://")
+    install_engine_hooks(engine)
+    install_engine_hooks(engine)  # idempotent: statements must not be counted twice
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))  # outside any tracked block
+        with track_queries() as stats:
+            for _ in range(3):
+                conn.execute(text("SELECT 1"))
+
+    assert stats.count == 3
+    assert stats.by_source == {"sqlmodel": 3}
+    assert stats.slowest_sql == "SELECT 1"
+    assert server_timing(stats, 0.01).startswith('db;dur=')
+    assert 'desc="3 queries"' in server_timing(stats, 0.01)
+
+
+def test_slow_queries_are_logged_with_normalized_sql(django_settings, monkeypatch, caplog):
+    monkeypatch.setattr(django_settings, "SLOW_QUERY_MS", 0, raising=False)
+    engine = create_engine("sqlite://")
+    install_engine_hooks(engine)
+
+    with caplog.at_level(logging.WARNING, logger="backend.instrumentation.slow_queries"):
+        with engine.connect() as conn, track_queries():
+            conn.execute(text("SELECT 42 WHERE 'a' = :name"), {"name": "a"})
+
+    assert any('"sql": "SELECT ? WHERE ? = ?"' in r.getMessage() for r in caplog.records)
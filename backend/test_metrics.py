@@ -0,0 +1,96 @@
+"""
+Tests for the Prometheus-style metrics registry (backend/metrics.py).
+run: pytest backend/test_metrics.py -v
+"""
+
+import pytest
+
+from backend.metrics import Counter, Histogram, Registry
+
+
+@pytest.fixture(autouse=True)
+def django_settings():
+    from django.conf import settings
+    if not settings.configured:
+        settings.configure(SECRET_KEY="test-secret")
+
+
+def test_counter_and_histogram_render_in_text_format():
+    registry = Registry()
+    logins = Counter("logins_total", "Login attempts.", ["result"], registry=registry)
+    latency = Histogram("latency_seconds", "Latency.", ["route"], buckets=(0.1, 1.0), registry=registry)
+
+    logins.inc(result="success")
+    logins.inc(2, result="bad_credentials")
+    latency.observe(0.05, route="api/events")
+    latency.observe(0.5, route="api/events")
+    latency.observe(3, route="api/events")
+
+    text = registry.render()
+    assert "# TYPE logins_total counter" in text
+    assert 'logins_total{result="success"} 1' in text
+    assert 'logins_total{result="bad_credentials"} 2' in text
+    assert 'latency_seconds_bucket{route="api/events",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="api/events",le="1"} 2' in text
+    assert 'latency_seconds_bucket{route="api/events",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{route="api/events"} 3' in text
+    assert 'latency_seconds_sum{route="api/events"} 3.55' in text
+
+
+def test_labels_must_match_declaration():
+    counter = Counter("x_total", "X.", ["result"], registry=Registry())
+    with pytest.raises(ValueError):
+        counter.inc(outcome="success")
+
+
+def test_worker_snapshots_are_merged_through_the_shared_directory(tmp_path):
+    # Two registries stand in for two gunicorn worker processes
+    workers = [Registry(directory=str(tmp_path), flush_interval=0) for _ in range(2)]
+    counters = [Counter("registrations_total", "Registrations.", ["result"], registry=r) for r in workers]
+    histograms = [Histogram("mail_seconds", "Mail.", [], buckets=(1.0,), registry=r) for r in workers]
+
+    counters[0].inc(result="success")
+    counters[1].inc(3, result="success")
+    counters[1].inc(result="full")
+    histograms[0].observe(0.5)
+    histograms[1].observe(2.0)
+
+    text = workers[0].render()
+    assert 'registrations_total{result="success"} 4' in text
+    assert 'registrations_total{result="full"} 1' in text
+    assert 'mail_seconds_bucket{le="1"} 1' in text
+    assert 'mail_seconds_count 2' in text
+    assert len(list(tmp_path.glob("*.json"))) == 2
+
+
+def test_exited_workers_are_folded_into_one_snapshot(tmp_path):
+    import subprocess
+    import sys
+
+    exited = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+    dead_pid = int(exited.stdout)
+    old = Registry(directory=str(tmp_path), flush_interval=0)
+    old._snapshot_name = f"{dead_pid}-deadbeef.json"  # as if written by the exited worker
+    Counter("registrations_total", "Registrations.", ["result"], registry=old).inc(2, result="success")
+
+    live = Registry(directory=str(tmp_path), flush_interval=0)
+    Counter("registrations_total", "Registrations.", ["result"], registry=live).inc(result="success")
+    for _ in range(2):  # folding is idempotent: the exited worker is counted exactly once
+        assert 'registrations_total{result="success"} 3' in live.render()
+    assert {p.name for p in tmp_path.glob("*.json")} == {"exited.json", live._snapshot_name}
+
+
+def test_metrics_view_requires_the_token_outside_debug():
+    from django.test import RequestFactory, override_settings
+
+    from backend.metrics import metrics_view
+
+    request = RequestFactory().get("/metrics")
+    authorized = RequestFactory().get("/metrics", HTTP_AUTHORIZATION="Bearer s3cret")
+    with override_settings(DEBUG=False, METRICS_TOKEN=None, METRICS_DIR=None):
+        assert metrics_view(request).status_code == 403
+    with override_settings(DEBUG=True, METRICS_TOKEN=None, METRICS_DIR=None):
+        assert metrics_view(request).status_code == 200
+    with override_settings(DEBUG=True, METRICS_TOKEN="s3cret", METRICS_DIR=None):
+        assert metrics_view(request).status_code == 401
+        assert metrics_view(authorized).status_code == 200
@@ -0,0 +1,67 @@
+"""
+Tests for the versioned SQLModel schema migrations (database/migrations.py).
+run: pytest backend/test_migrations.py -v
+"""
+
+from sqlalchemy import create_engine, inspect, text
+
+from database.migrations import MIGRATIONS, applied_versions, migrate
+
+
+LEGACY_EVENTS_DDL = """
+CREATE TABLE events (
+    id INTEGER NOT NULL, title VARCHAR NOT NULL, description VARCHAR, date DATETIME,
+    location VARCHAR, capacity INTEGER, available_seats INTEGER, speakers JSON, organizers JSON,
+    PRIMARY KEY (id)
+)
+"""
+
+
+def test_migrate_fresh_database_records_every_version(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    applied = migrate(engine)
+    assert [m.version for m in applied] == [m.version for m in MIGRATIONS]
+    assert applied_versions(engine) == {m.version for m in MIGRATIONS}
+    # Running again is a no-op
+    assert migrate(engine) == []
+
+
+def test_migrate_upgrades_legacy_events_table(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(LEGACY_EVENTS_DDL))
+
+    migrate(engine)
+
+    inspector = inspect(engine)
+    columns = {c["name"] for c in inspector.get_columns("events")}
+    assert {"category", "created_by", "image_url", "deleted_at"} <= columns
+    indexes = {i["name"] for i in inspector.get_indexes("events")}
+    assert {"ix_events_date", "ix_events_category_date", "ix_events_created_by", "ix_events_deleted_at"} <= indexes
+    link_indexes = {i["name"] for i in inspector.get_indexes("usereventlink")}
+    assert "ix_usereventlink_user_email" in link_indexes
+    # Expression index, which SQLite reflection does not report
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'ix_events_created_by_lower'")).first()
+
+
+def test_migrate_moves_auth_codes_out_of_users(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'codes.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE users (email VARCHAR NOT NULL PRIMARY KEY, fullname VARCHAR, password_hash VARCHAR,"
+            " is_admin BOOLEAN, is_verified BOOLEAN, verification_token VARCHAR, verification_token_expiry DATETIME,"
+            " reset_code VARCHAR, reset_code_expiry DATETIME)"
+        ))
+        conn.execute(text(
+            "INSERT INTO users VALUES"
+            " ('new@aub.edu.lb', 'n', 'h', 0, 0, '111111', '2030-01-01 00:00:00', NULL, NULL),"
+            " ('old@aub.edu.lb', 'o', 'h', 0, 1, '222222', '2030-01-01 00:00:00', '333333', '2030-01-01 00:00:00')"
+        ))
+
+    migrate(engine)
+
+    assert not {"verification_token", "reset_code"} & {c["name"] for c in inspect(engine).get_columns("users")}
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT email, purpose, code FROM authtokens ORDER BY email")).all()
+    assert [tuple(r) for r in rows] == [("new@aub.edu.lb", "verify", "111111"), ("old@aub.edu.lb", "reset", "333333")]
@@ -0,0 +1,97 @@
+"""
+Tests for the shared token-bucket rate limiter (backend/ratelimit.py).
+run: pytest backend/test_ratelimit.py -v
+"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from database.database import take_rate_limit_token
+from database.migrations import migrate
+
+
+@pytest.fixture
+def django_settings():
+    from django.conf import settings
+    if not settings.configured:
+        settings.configure(SECRET_KEY="test-secret")
+    return settings
+
+
+@pytest.fixture
+def buckets(django_settings):
+    from backend.ratelimit import reset_rate_limits
+    migrate()
+    reset_rate_limits()
+    yield
+    reset_rate_limits()
+
+
+def test_parse_rate():
+    from backend.ratelimit import parse_rate
+    assert parse_rate("10/m") == (10.0, 10 / 60)
+    assert parse_rate("3/hour") == (3.0, 3 / 3600)
+    for bad in ("10", "0/m", "5/w"):
+        with pytest.raises(ValueError):
+            parse_rate(bad)
+
+
+def test_bucket_allows_burst_then_refills(buckets):
+    key, now = "test:ip:refill", 1000.0
+    assert [take_rate_limit_token(key, 3, 1.0, now=now)[0] for _ in range(4)] == [True, True, True, False]
+    allowed, retry_after = take_rate_limit_token(key, 3, 1.0, now=now)
+    assert not allowed and retry_after == pytest.approx(1.0)
+    assert take_rate_limit_token(key, 3, 1.0, now=now + 1.5)[0]
+    # Refill is capped at capacity
+    results = [take_rate_limit_token(key, 3, 1.0, now=now + 100)[0] for _ in range(4)]
+    assert results == [True, True, True, False]
+
+
+def test_concurrent_takes_never_exceed_capacity(buckets):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: take_rate_limit_token("test:ip:race", 10, 0.0, now=1.0)[0], range(40)))
+    assert results.count(True) == 10
+
+
+def test_decorator_rejects_with_retry_after(buckets, monkeypatch):
+    from django.test import RequestFactory
+    from django.http import JsonResponse
+    from backend import ratelimit
+    from backend.metrics import RATE_LIMITED
+
+    monkeypatch.setattr(ratelimit.settings, "RATE_LIMITS", {}, raising=False)
+    monkeypatch.setattr(ratelimit.settings, "RATE_LIMIT_ENABLED", True, raising=False)
+
+    @ratelimit.rate_limit("test_login", ip="5/m", email="2/m")
+    def view(request):
+        return JsonResponse({"ok": True})
+
+    factory = RequestFactory()
+
+    def post(email, ip="10.0.0.1"):
+        body = json.dumps({"email": email})
+        return view(factory.post("/login", body, content_type="application/json", REMOTE_ADDR=ip))
+
+    before = RATE_LIMITED.snapshot().get(json.dumps(["test_login", "email"]), 0)
+    assert [post("a@aub.edu.lb").status_code for _ in range(3)] == [200, 200, 429]
+    rejected = post("A@aub.edu.lb ")  # same bucket after normalization
+    assert rejected.status_code == 429
+    assert int(rejected["Retry-After"]) >= 1
+    assert RATE_LIMITED.snapshot()[json.dumps(["test_login", "email"])] == before + 2
+
+    # Another email still has its own bucket, until the shared per-IP bucket runs out
+    assert post("b@aub.edu.lb").status_code == 200
+    assert post("b@aub.edu.lb").status_code == 429  # ip bucket (5/m) is now empty
+    assert post("c@aub.edu.lb", ip="10.0.0.2").status_code == 200
+
+    monkeypatch.setattr(ratelimit.settings, "RATE_LIMITS", {"test_login": {"ip": None}})
+    ratelimit.reset_rate_limits("test_login")
+    assert [post("d@aub.edu.lb").status_code for _ in range(3)] == [200, 200, 429]
+
+
+def test_unknown_limit_keys_are_rejected():
+    from backend.ratelimit import rate_limit
+    with pytest.raises(ValueError):
+        rate_limit("x", user="1/m")
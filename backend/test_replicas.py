@@ -0,0 +1,132 @@
+"""
+Tests for read-replica routing (database/database.py) and ReadYourWritesMiddleware (backend/replicas.py).
+Two SQLite files stand in for the primary and a replica; "replication" is done by hand, so anything
+written to the primary alone shows which database a read went to.
+run: pytest backend/test_replicas.py -v
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, SQLModel
+
+from database import database
+from database.database import (
+    configure_replicas,
+    get_engine,
+    get_user_events,
+    read_engine,
+    register_user_to_event,
+    update_title,
+    use_primary,
+)
+from database.tables import Events, Users
+from backend.crud import delete_event_by_id, get_event, list_all_events, update_event
+from backend.schemas import EventUpdate
+
+
+def _seed(engine):
+    with Session(engine) as session:
+        session.add(Users(email="student@aub.edu.lb", fullname="Student", password_hash="x", is_verified=True))
+        session.add(Users(email="other@aub.edu.lb", fullname="Other", password_hash="x", is_verified=True))
+        session.add(Events(id=1, title="Hackathon", date=datetime.utcnow() + timedelta(days=7),
+                           location="AUB", capacity=10, available_seats=10, created_by="admin@aub.edu.lb"))
+        session.commit()
+
+
+@pytest.fixture
+def replica(tmp_path):
+    primary = get_engine()
+    SQLModel.metadata.drop_all(primary)
+    SQLModel.metadata.create_all(primary)
+    configure_replicas([f"sqlite:///{tmp_path / 'replica.db'}"])
+    replica = database.replica_engines[0]
+    SQLModel.metadata.create_all(replica)
+    _seed(primary)
+    _seed(replica)
+    yield replica
+    configure_replicas([])
+    SQLModel.metadata.drop_all(primary)
+
+
+def test_reads_go_to_primary_without_replicas():
+    configure_replicas([])
+    assert read_engine() is get_engine()
+    assert database.get_engines() == [get_engine()]
+
+
+def test_list_and_detail_reads_use_replica(replica):
+    update_title(1, "Renamed on primary")
+    assert get_event(1).title == "Hackathon"
+    assert [e.title for e in list_all_events()] == ["Hackathon"]
+    with use_primary():
+        assert read_engine() is get_engine()
+        assert get_event(1).title == "Renamed on primary"
+    assert get_event(1).title == "Hackathon"
+
+
+def test_own_registration_is_read_back_from_primary(replica, monkeypatch):
+    assert register_user_to_event("student@aub.edu.lb", 1) == (True, None)
+    # The registering user sees it at once; nobody else's reads are pinned
+    assert [e["id"] for e in get_user_events("student@aub.edu.lb")] == [1]
+    assert read_engine("other@aub.edu.lb") is replica
+
+    # Once the sticky window has passed, the user is back on the (still lagging) replica
+    monkeypatch.setattr(database, "REPLICA_STICKY_SECONDS", 0)
+    register_user_to_event("other@aub.edu.lb", 1)
+    assert get_user_events("other@aub.edu.lb") == []
+
+
+def test_event_updates_and_deletes_pin_the_creators_reads(replica):
+    update_event(1, EventUpdate(title="Renamed"))
+    assert [e.title for e in list_all_events(created_by="Admin@aub.edu.lb")] == ["Renamed"]
+    assert read_engine("other@aub.edu.lb") is replica
+
+    database._recent_writes.clear()
+    assert delete_event_by_id(1)
+    assert list_all_events(created_by="admin@aub.edu.lb") == []
+
+
+@pytest.fixture
+def django_settings():
+    from django.conf import settings
+    if not settings.configured:
+        settings.configure(SECRET_KEY="test-secret")
+    return settings
+
+
+def test_middleware_pins_writes_and_the_following_reads(replica, django_settings):
+    from django.test import RequestFactory
+    from django.http import HttpResponse
+    from backend.replicas import COOKIE_NAME, ReadYourWritesMiddleware
+
+    seen = []
+
+    def view(request):
+        seen.append(read_engine())
+        return HttpResponse(status=201 if request.method == "POST" else 200)
+
+    middleware = ReadYourWritesMiddleware(view)
+    factory = RequestFactory()
+
+    middleware(factory.get("/api/events"))
+    response = middleware(factory.post("/api/events/1/register"))
+    assert seen == [replica, get_engine()]
+    assert response.cookies[COOKIE_NAME]["max-age"] == 5
+
+    request = factory.get("/api/my/events")
+    request.COOKIES[COOKIE_NAME] = response.cookies[COOKIE_NAME].value
+    middleware(request)
+    expired = factory.get("/api/my/events")
+    expired.COOKIES[COOKIE_NAME] = "1000"
+    middleware(expired)
+    assert seen[2:] == [get_engine(), replica]
+
+
+def test_middleware_is_unused_without_replicas(django_settings):
+    from django.core.exceptions import MiddlewareNotUsed
+    from backend.replicas import ReadYourWritesMiddleware
+
+    configure_replicas([])
+    with pytest.raises(MiddlewareNotUsed):
+        ReadYourWritesMiddleware(lambda request: None)
@@ -0,0 +1,74 @@
+"""
+Tests for the trigram search index (backend/search.py).
+run: pytest backend/test_search.py -v
+"""
+
+from backend.search import TrigramIndex, event_text, normalize, trigrams
+
+
+def _index():
+    index = TrigramIndex()
+    index.add(1, event_text("AI in Medicine", "Issam Fares Hall", ["Dr. Lina Haddad"], ["CS Society"]))
+    index.add(2, event_text("Career Fair", "West Hall", ["Rami Khoury"], ["Career Center"]))
+    index.add(3, event_text("Robotics Workshop", "Bechtel Engineering", ["Issa Fares"], ["IEEE"]))
+    return index
+
+
+def test_normalize_strips_accents_and_punctuation():
+    assert normalize("Café-Bar, Ümit's talk!") == ["cafe", "bar", "umit", "s", "talk"]
+    assert trigrams("Hal") == {"  h", " ha", "hal", "al "}
+
+
+def test_typos_still_match_and_rank_first():
+    index = _index()
+    assert index.search("Issam Fares Hal")[0][0] == 1
+    assert index.search("Lina Hadad")[0][0] == 1       # speakers are searched
+    assert index.search("carrer center")[0][0] == 2    # organizers too
+    assert index.search("robtics")[0][0] == 3
+    assert index.search("quantum") == []
+
+
+def test_scores_are_ranked_and_limited():
+    results = _index().search("Fares", limit=5)
+    assert [event_id for event_id, _ in results] == [3, 1]  # same score: the shorter text wins
+    assert results[0][1] == 1.0
+    assert len(_index().search("Fares", limit=1)) == 1
+
+
+def test_incremental_updates():
+    index = _index()
+    index.add(2, event_text("Startup Pitch Night", "West Hall"))  # update replaces the old text
+    assert index.search("career fair") == []
+    assert index.search("startup pich")[0][0] == 2
+    index.remove(2)
+    assert index.search("startup pitch") == []
+    assert len(index) == 2
+    # Words no other event uses leave the vocabulary
+    assert index.similar_words("startup") == []
+    assert index.similar_words("hal") == [(0.6667, "hall")]
+
+
+def test_candidates_are_filtered_before_the_limit():
+    index = TrigramIndex()
+    for event_id in range(1, 61):
+        index.add(event_id, event_text("Robotics Workshop", "West Hall"))
+    assert [event_id for event_id, _ in index.search("robtics", limit=3)] == [60, 59, 58]
+    assert index.search("robtics", limit=3, candidates={1, 2}) == [(2, 0.875), (1, 0.875)]
+
+
+def test_long_queries_are_not_exponential():
+    import time
+
+    # Every word has four similarity levels and no event holds two of them: the worst case for
+    # walking level combinations (4 ** 11 of them)
+    bases = ["robotics", "climate", "startup", "debate", "poetry", "finance", "nutrition", "architecture",
+             "seminar", "hackathon", "bootcamp"]
+    index, event_id = TrigramIndex(), 0
+    for base in bases:
+        for variant in (base, base + "s", base + "ers", base[:-2]):
+            event_id += 1
+            index.add(event_id, variant)
+    started = time.perf_counter()
+    assert index.search(" ".join(bases)) == []
+    assert index.search("robotics robotic")[0] == (1, 0.9375)
+    assert time.perf_counter() - started < 0.5
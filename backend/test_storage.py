@@ -0,0 +1,248 @@
+"""
+Tests for the image storage backends (backend/storage.py).
+run: pytest backend/test_storage.py -v
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from backend.storage import (
+    TUS_ATTEMPTS, TUS_CHUNK_SIZE, LocalStorage, StorageBackend, StorageError, SupabaseStorage,
+)
+
+
+class FakeBucket:
+    def __init__(self):
+        self.uploads = []
+
+    def upload(self, path, data, options):
+        self.uploads.append((path, data, options))
+        return SimpleNamespace(error=None)
+
+    def get_public_url(self, path):
+        return f"https://cdn.example.com/{path}"
+
+
+class FakeStorageClient:
+    def __init__(self):
+        self.list_calls = 0
+        self.created = []
+        self.updated = []
+        self.bucket = FakeBucket()
+
+    def list_buckets(self):
+        self.list_calls += 1
+        return [SimpleNamespace(name=name) for name in self.created]
+
+    def create_bucket(self, name, options=None):
+        self.created.append(name)
+
+    def update_bucket(self, name, options):
+        self.updated.append((name, options))
+
+    def from_(self, name):
+        return self.bucket
+
+
+def test_supabase_bucket_is_provisioned_once_per_process():
+    client = SimpleNamespace(storage=FakeStorageClient())
+    storage = SupabaseStorage(client, "event-images")
+
+    for i in range(3):
+        storage.ensure_ready()
+        storage.upload(f"events/{i}.webp", b"data", "image/webp")
+
+    assert client.storage.list_calls == 1
+    assert client.storage.created == ["event-images"]
+    assert len(client.storage.bucket.uploads) == 3
+    assert storage.public_url("events/0.webp") == "https://cdn.example.com/events/0.webp"
+
+
+class FakeTusServer:
+    """Just enough of Supabase's resumable endpoint; the first PATCH stores half its chunk and fails."""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.created = []
+        self.patches = 0
+
+    def request(self, method, url, headers, data=None, timeout=None):
+        if method == "POST":
+            self.created.append(headers)
+            return SimpleNamespace(status_code=201, headers={"Location": "/storage/v1/upload/resumable/abc"})
+        assert url == "https://project.supabase.co/storage/v1/upload/resumable/abc"
+        if method == "HEAD":
+            return SimpleNamespace(status_code=200, headers={"Upload-Offset": str(len(self.data))})
+        assert int(headers["Upload-Offset"]) == len(self.data)
+        self.patches += 1
+        body = b"".join(data)
+        assert len(body) == len(data) <= TUS_CHUNK_SIZE
+        if self.patches == 1:
+            self.data += body[: len(body) // 2]
+            raise ConnectionError("connection reset")
+        self.data += body
+        return SimpleNamespace(status_code=204, headers={"Upload-Offset": str(len(self.data))})
+
+
+def test_supabase_upload_file_is_resumable(tmp_path):
+    payload = bytes(range(256)) * (40 * 1024)  # 10 MB: two chunks
+    source = tmp_path / "poster.png"
+    source.write_bytes(payload)
+    server = FakeTusServer()
+    storage = SupabaseStorage(SimpleNamespace(storage=FakeStorageClient()), "event-images",
+                              storage_url="https://project.supabase.co/storage/v1",
+                              api_key="service-key", http=server)
+
+    with open(source, "rb") as fh:
+        storage.upload_file("events/ab/abc.png", fh, "image/png")
+
+    assert bytes(server.data) == payload
+    assert server.patches == 3  # the failed chunk is resumed from the stored offset, not resent
+    [headers] = server.created
+    assert headers["Upload-Length"] == str(len(payload))
+    assert headers["Authorization"] == "Bearer service-key"
+
+
+class StuckTusServer(FakeTusServer):
+    """Answers every PATCH with 204 but never moves Upload-Offset."""
+
+    def request(self, method, url, headers, data=None, timeout=None):
+        if method == "PATCH":
+            self.patches += 1
+            return SimpleNamespace(status_code=204, headers={"Upload-Offset": "0"})
+        return super().request(method, url, headers, data, timeout)
+
+
+def test_supabase_upload_gives_up_when_the_offset_never_advances(tmp_path):
+    source = tmp_path / "poster.png"
+    source.write_bytes(b"x" * 1024)
+    server = StuckTusServer()
+    storage = SupabaseStorage(SimpleNamespace(storage=FakeStorageClient()), "event-images",
+                              storage_url="https://project.supabase.co/storage/v1",
+                              api_key="service-key", http=server)
+
+    with open(source, "rb") as fh, pytest.raises(StorageError, match="no progress"):
+        storage.upload_file("events/ab/stuck.png", fh, "image/png")
+    assert server.patches == TUS_ATTEMPTS
+
+
+def test_supabase_head_reads_a_byte_range_and_delete_removes():
+    calls = []
+    http = SimpleNamespace(request=lambda method, url, headers, data=None, timeout=None: (
+        calls.append((method, url, headers["Range"])) or SimpleNamespace(status_code=206, content=b"\x89PNG\r\n\x1a\n")
+    ))
+    client = SimpleNamespace(storage=FakeStorageClient())
+    client.storage.bucket.remove = lambda paths: calls.append(("remove", paths))
+    storage = SupabaseStorage(client, "event-images", storage_url="https://project.supabase.co/storage/v1",
+                              api_key="service-key", http=http)
+
+    assert storage.head("events/direct/a.png", 8) == b"\x89PNG\r\n\x1a\n"
+    storage.delete("events/direct/a.png")
+    assert calls == [
+        ("GET", "https://project.supabase.co/storage/v1/object/event-images/events/direct/a.png", "bytes=0-7"),
+        ("remove", ["events/direct/a.png"]),
+    ]
+
+
+def test_backend_missing_a_method_cannot_be_created():
+    class NoDelete(StorageBackend):
+        def upload(self, path, data, content_type): ...
+        def upload_file(self, path, fileobj, content_type): ...
+        def exists(self, path): ...
+        def public_url(self, path): ...
+        def stat(self, path): ...
+        def head(self, path, size=16): ...
+        def create_signed_upload(self, path, content_type): ...
+
+    with pytest.raises(TypeError, match="delete"):
+        NoDelete()
+
+
+def test_local_storage_writes_files_and_builds_urls(tmp_path):
+    storage = LocalStorage(tmp_path / "media", "/media/")
+    storage.ensure_ready()
+    storage.upload("events/2030/01/07/abc/full.webp", b"webp-bytes", "image/webp")
+
+    assert (tmp_path / "media" / "events/2030/01/07/abc/full.webp").read_bytes() == b"webp-bytes"
+    assert storage.public_url("events/2030/01/07/abc/full.webp") == "/media/events/2030/01/07/abc/full.webp"
+
+
+def test_local_storage_rejects_paths_outside_root(tmp_path):
+    storage = LocalStorage(tmp_path / "media", "/media/")
+    storage.ensure_ready()
+    with pytest.raises(StorageError):
+        storage.upload("../escape.txt", b"x", "text/plain")
+
+
+def test_local_storage_streams_file_objects(tmp_path):
+    import io
+
+    storage = LocalStorage(tmp_path / "media", "/media/")
+    storage.ensure_ready()
+    payload = b"x" * (200 * 1024 + 7)  # spans several 64 KB chunks
+    assert not storage.exists("events/ab/abc.png")
+
+    storage.upload_file("events/ab/abc.png", io.BytesIO(payload), "image/png")
+
+    assert storage.exists("events/ab/abc.png")
+    assert (tmp_path / "media" / "events/ab/abc.png").read_bytes() == payload
+    assert not list((tmp_path / "media" / "events/ab").glob("*.part"))
+
+
+@pytest.fixture
+def django_secret():
+    # Signed upload tokens use django.core.signing, which needs a SECRET_KEY
+    from django.conf import settings
+    if not settings.configured:
+        settings.configure(SECRET_KEY="test-secret")
+
+
+def test_supabase_bucket_is_created_with_upload_limits():
+    client = SimpleNamespace(storage=FakeStorageClient())
+    created_options = []
+    client.storage.create_bucket = lambda name, options=None: created_options.append(options)
+    storage = SupabaseStorage(client, "event-images", file_size_limit=1024, allowed_mime_types=["image/png"])
+
+    storage.ensure_ready()
+
+    assert created_options == [{"public": True, "file_size_limit": 1024, "allowed_mime_types": ["image/png"]}]
+
+
+def test_existing_supabase_bucket_gets_the_upload_limits():
+    client = SimpleNamespace(storage=FakeStorageClient())
+    client.storage.created.append("event-images")
+    storage = SupabaseStorage(client, "event-images", file_size_limit=1024, allowed_mime_types=["image/png"])
+
+    storage.ensure_ready()
+
+    assert client.storage.created == ["event-images"]
+    assert client.storage.updated == [
+        ("event-images", {"public": True, "file_size_limit": 1024, "allowed_mime_types": ["image/png"]}),
+    ]
+
+
+def test_local_signed_upload_round_trip(tmp_path, django_secret):
+    storage = LocalStorage(tmp_path / "media", "/media/")
+    storage.ensure_ready()
+
+    signed = storage.create_signed_upload("events/direct/a.png", "image/png")
+    assert signed["method"] == "PUT"
+    token = signed["url"].split("token=", 1)[1]
+
+    path = storage.receive_signed_upload(token, iter([b"\x89PNG\r\n\x1a\n", b"rest"]), max_age=60)
+
+    assert path == "events/direct/a.png"
+    assert storage.stat(path) == {"size": 12, "content_type": "image/png"}
+
+
+def test_local_signed_upload_rejects_bad_tokens(tmp_path, django_secret):
+    storage = LocalStorage(tmp_path / "media", "/media/")
+    storage.ensure_ready()
+    token = storage.create_signed_upload("events/direct/a.png", "image/png")["url"].split("token=", 1)[1]
+
+    with pytest.raises(StorageError):
+        storage.receive_signed_upload(token + "x", iter([b"data"]), max_age=60)
+    with pytest.raises(StorageError):
+        storage.receive_signed_upload(token, iter([b"data"]), max_age=-1)  # already expired
+    assert storage.stat("events/direct/a.png") is None
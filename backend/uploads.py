@@ -0,0 +1,46 @@
+"""
+uploads.py
+----------
+Helpers for receiving uploaded files without holding them in memory.
+
+``HashingUploadHandler`` sits in front of Django's temporary-file upload handler and computes the
+SHA-256 of every file while its chunks arrive from the socket, so the digest costs no extra pass
+over the data. The file itself is always spooled to a temp file on disk (whatever
+FILE_UPLOAD_MAX_MEMORY_SIZE says), so storage uploads and image decoding can read it from a path.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Optional
+
+from django.core.files.uploadhandler import FileUploadHandler, TemporaryFileUploadHandler
+from django.http import HttpRequest
+
+
+class HashingUploadHandler(FileUploadHandler):
+    """Record ``request.upload_digests[field_name] = sha256 hex`` for each uploaded file."""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self._hash = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self._hash.update(raw_data)
+        return raw_data  # pass the chunk on to the next handler untouched
+
+    def file_complete(self, file_size):
+        digests = getattr(self.request, "upload_digests", None)
+        if digests is None:
+            digests = self.request.upload_digests = {}
+        digests[self.field_name] = self._hash.hexdigest()
+        return None  # let the default handlers build the UploadedFile
+
+
+def install_hashing_handler(request: HttpRequest) -> None:
+    """Must run before request.POST / request.FILES are first accessed."""
+    request.upload_handlers = [HashingUploadHandler(request), TemporaryFileUploadHandler(request)]
+
+
+def upload_digest(request: HttpRequest, field_name: str) -> Optional[str]:
+    return (getattr(request, "upload_digests", None) or {}).get(field_name)
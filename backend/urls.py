@@ -5,6 +5,7 @@ from django.views.generic import TemplateView
 from django.conf import settings
 from django.conf.urls.static import static
 from backend import events_views
+from backend.metrics import metrics_view
 
 def root_index(_request):
     """Simple root endpoint to help discover APIs."""
@@ -22,17 +23,27 @@ urlpatterns = [
     path('api/events', events_views.events_create, name='events_create'),
     path('api/events/<int:event_id>', events_views.events_detail, name='events_detail'),
     path('api/events/upload-image', events_views.events_upload_image, name='events_upload_image'),
+    path('api/events/upload-url', events_views.events_upload_url, name='events_upload_url'),
+    path('api/events/upload-url/confirm', events_views.events_upload_confirm, name='events_upload_confirm'),
+    path('api/storage/local-upload', events_views.storage_local_upload, name='storage_local_upload'),
     path('api/events/register', events_views.events_register, name='events_register'),
     path('api/events/unregister', events_views.events_unregister, name='events_unregister'),
     path('api/my/events', events_views.my_events, name='my_events'),
+    path('api/my/calendar', events_views.my_calendar, name='my_calendar'),
+    path('api/my/calendar.ics', events_views.my_calendar_feed, name='my_calendar_feed'),
+
+    # Prometheus scrape endpoint (see backend/metrics.py)
+    path('metrics', metrics_view, name='metrics'),
 
     # Optional API root
     path('api/', root_index, name='api_root'),
 ]
 
 urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+# Serve images written by the local storage backend (DEBUG only, see backend/storage.py)
+urlpatterns += static(settings.LOCAL_STORAGE_URL, document_root=settings.LOCAL_STORAGE_DIR)
 
 # Catch-all for React routing - must exclude all Django routes
 urlpatterns += [
-    re_path(r'^(?!api/|admin/|auth/|static/).*$', TemplateView.as_view(template_name='index.html')),
+    re_path(r'^(?!api/|admin/|auth/|static/|media/|metrics$).*$', TemplateView.as_view(template_name='index.html')),
 ]
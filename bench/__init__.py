@@ -0,0 +1,12 @@
+"""
+bench
+-----
+Reproducible load benchmarks for the events API.
+
+- seed.py:    creates N users and M events in a throwaway SQLite file (or a given DATABASE_URL)
+- run.py:     drives a weighted list/detail/search/register/unregister mix through the Django
+              test client at a configurable concurrency and writes the results as JSON
+- compare.py: diffs two result files so regressions between commits stand out
+
+Run with:  python -m bench.run --users 200 --events 500 --requests 2000 --concurrency 8 --out bench.json
+"""
@@ -0,0 +1,79 @@
+"""
+compare.py
+----------
+Diff two bench.run JSON reports, e.g. from the base branch and from a change.
+
+    python -m bench.compare before.json after.json [--threshold 0.10]
+
+Prints per-operation throughput, latency percentiles and statements per request with the relative
+change, and exits with status 1 when any metric regresses by more than --threshold.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# (label, path into a summary, True when higher is better)
+METRICS = [
+    ("req/s", ("throughput_rps",), True),
+    ("p50 ms", ("latency_ms", "p50"), False),
+    ("p95 ms", ("latency_ms", "p95"), False),
+    ("p99 ms", ("latency_ms", "p99"), False),
+    ("stmts/req", ("statements_per_request", "mean"), False),
+]
+
+
+def _get(summary: dict, path: tuple):
+    for key in path:
+        summary = summary.get(key, {}) if isinstance(summary, dict) else {}
+    return summary if isinstance(summary, (int, float)) else None
+
+
+def compare(before: dict, after: dict, threshold: float) -> tuple:
+    """Return (rows, regressions); a row is (section, metric, before, after, relative change)."""
+    sections = [("total", before.get("total", {}), after.get("total", {}))]
+    for op in sorted(set(before.get("operations", {})) & set(after.get("operations", {}))):
+        sections.append((op, before["operations"][op], after["operations"][op]))
+
+    rows, regressions = [], []
+    for section, old, new in sections:
+        for label, path, higher_is_better in METRICS:
+            a, b = _get(old, path), _get(new, path)
+            if a is None or b is None:
+                continue
+            change = (b - a) / a if a else 0.0
+            rows.append((section, label, a, b, change))
+            worse = -change if higher_is_better else change
+            if worse > threshold:
+                regressions.append((section, label, a, b, change))
+    return rows, regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench.compare", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative change counted as a regression (default 0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    before = json.loads(Path(args.before).read_text())
+    after = json.loads(Path(args.after).read_text())
+    rows, regressions = compare(before, after, args.threshold)
+
+    print(f"{before['meta'].get('commit', '?')} -> {after['meta'].get('commit', '?')}")
+    print(f"{'operation':<12} {'metric':<10} {'before':>10} {'after':>10} {'change':>8}")
+    for section, label, a, b, change in rows:
+        print(f"{section:<12} {label:<10} {a:>10} {b:>10} {change:>+8.1%}")
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}:")
+        for section, label, a, b, change in regressions:
+            print(f"  {section} {label}: {a} -> {b} ({change:+.1%})")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
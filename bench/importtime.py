@@ -0,0 +1,131 @@
+"""
+importtime.py
+-------------
+Cold-start profile: how long a fresh interpreter takes to get each entry point ready, and which
+packages that time goes to.
+
+- "settings": ``django.setup()`` alone
+- "wsgi":     ``import backend.wsgi``, i.e. what a gunicorn worker pays before its first request
+- "urls":     wsgi plus the URLconf and every view module (the first request of each worker)
+- "command":  ``manage.py check``, which every management command pays through its system checks
+
+Each target runs --repeat times in a new process for wall-clock time, then once more under
+``python -X importtime`` for the per-package breakdown. The report also says whether the heavy
+integrations (supabase, requests, Pillow, ...) were imported, which they should not be at startup.
+
+Example:
+    python -m bench.importtime --repeat 5 --top 10 --out importtime.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+TARGETS = {
+    "settings": ["-c", "import django; django.setup()"],
+    "wsgi": ["-c", "import backend.wsgi"],
+    "urls": ["-c", "import backend.wsgi, backend.urls"],
+    "command": ["manage.py", "check"],
+}
+
+# Imported on first use of the upload/email paths only (backend/supabase_client.py, backend/images.py).
+# requests still shows up from the URLconf on: rest_framework.compat imports it when it is installed.
+HEAVY_MODULES = ("supabase", "storage3", "postgrest", "realtime", "httpx", "requests", "PIL")
+
+
+def parse_importtime(stderr: str) -> list:
+    """Rows of ``-X importtime`` output as {"name", "depth", "self_us", "cumulative_us"}."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        head, cumulative, name = line[len("import time:"):].split("|", 2)
+        try:
+            self_us, cumulative_us = int(head), int(cumulative)
+        except ValueError:
+            continue  # the "self [us] | cumulative | imported package" header
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append({"name": name.strip(), "depth": depth, "self_us": self_us, "cumulative_us": cumulative_us})
+    return rows
+
+
+def summarize_imports(rows: list, top: int) -> dict:
+    by_package = defaultdict(int)
+    for row in rows:
+        by_package[row["name"].split(".")[0]] += row["self_us"]
+    loaded = {row["name"] for row in rows}
+    slowest = sorted(rows, key=lambda r: r["cumulative_us"], reverse=True)
+    return {
+        "modules": len(rows),
+        "import_ms": round(sum(r["self_us"] for r in rows) / 1000, 1),
+        "heavy_loaded": sorted(m for m in HEAVY_MODULES if m in loaded),
+        "top_packages": [[name, round(us / 1000, 1)]
+                         for name, us in sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:top]],
+        "top_modules": [[r["name"], round(r["cumulative_us"] / 1000, 1)] for r in slowest[:top]],
+    }
+
+
+def _environment() -> dict:
+    env = dict(os.environ)
+    env.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+    # Engines are created at import but never connect, so an in-memory URL is enough
+    env.setdefault("DATABASE_URL", "sqlite://")
+    return env
+
+
+def profile_target(argv: list, repeat: int, top: int) -> dict:
+    env = _environment()
+    command = [sys.executable] + argv
+    # One unmeasured run so every target starts from warm .pyc files and a warm page cache
+    subprocess.run(command, cwd=ROOT, env=env, capture_output=True, check=True)
+    walls = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, env=env, capture_output=True, check=True)
+        walls.append((time.perf_counter() - started) * 1000)
+    traced = subprocess.run([sys.executable, "-X", "importtime"] + argv, cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    return {
+        "wall_ms": {"min": round(min(walls), 1), "median": round(statistics.median(walls), 1)},
+        **summarize_imports(parse_importtime(traced.stderr), top),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench.importtime", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=sorted(TARGETS), nargs="+", default=list(TARGETS),
+                        help="Entry points to profile (default: all)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per target (default 5)")
+    parser.add_argument("--top", type=int, default=10, help="Packages/modules listed per target (default 10)")
+    parser.add_argument("--out", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = {
+        "meta": {"python": platform.python_version(), "repeat": args.repeat},
+        "targets": {name: profile_target(TARGETS[name], args.repeat, args.top) for name in args.target},
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n")
+        for name, result in report["targets"].items():
+            heavy = ", ".join(result["heavy_loaded"]) or "none"
+            print(f"{name}: {result['wall_ms']['median']} ms median, {result['import_ms']} ms importing "
+                  f"{result['modules']} modules, heavy integrations loaded: {heavy}")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+passwords.py
+------------
+Login hashing throughput: bcrypt checks per second per core, inline and through the bounded
+process pool in accounts/passwords.py, for each cost factor.
+
+- "inline":  checks on one thread, i.e. what a single core sustains
+- "pool":    --clients threads logging in at once through the pool, retrying after each 429;
+             reports accepted logins/sec, how many 429 (HashingBusy) answers were given and the
+             latency of accepted checks, which is what a login burst looks like
+
+Example:
+    python -m bench.passwords --rounds 10 11 12 --workers 2 --queue 8 --clients 16 --out passwords.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import bcrypt
+
+from bench.run import percentile
+
+PASSWORD = "BenchPass123!"
+RETRY_AFTER = 0.02  # seconds a client waits after a 429 (shortened from the real Retry-After: 1)
+
+
+def _inline(hashed: bytes, seconds: float) -> dict:
+    checks, started = 0, time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        bcrypt.checkpw(PASSWORD.encode(), hashed)
+        checks += 1
+    elapsed = time.perf_counter() - started
+    return {"checks": checks, "checks_per_second_per_core": round(checks / elapsed, 2)}
+
+
+def _pool(hashed: str, attempts: int, clients: int, workers: int) -> dict:
+    from accounts.passwords import HashingBusy, check_password
+
+    check_password(PASSWORD, hashed)  # start the worker processes outside the measurement
+
+    def attempt(_):
+        # A well-behaved client: on 429 it backs off briefly and retries
+        busy = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                ok = check_password(PASSWORD, hashed)
+                return ("ok" if ok else "failed"), time.perf_counter() - started, busy
+            except HashingBusy:
+                busy += 1
+                time.sleep(RETRY_AFTER)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(attempt, range(attempts)))
+    elapsed = time.perf_counter() - started
+
+    accepted = sorted(t * 1000 for outcome, t, _ in results if outcome == "ok")
+    busy = sum(b for _, _, b in results)
+    return {
+        "attempts": attempts,
+        "accepted": len(accepted),
+        "rejected_429": busy,
+        "accepted_per_second": round(len(accepted) / elapsed, 2),
+        "accepted_per_second_per_worker": round(len(accepted) / elapsed / workers, 2),
+        "latency_ms": {
+            "p50": round(percentile(accepted, 50), 1),
+            "p95": round(percentile(accepted, 95), 1),
+            "p99": round(percentile(accepted, 99), 1),
+        },
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench.passwords", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 12], help="bcrypt cost factors (default 10 12)")
+    parser.add_argument("--seconds", type=float, default=3.0, help="Duration of each inline measurement")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Hashing processes (default: cores)")
+    parser.add_argument("--queue", type=int, default=None, help="PASSWORD_HASH_QUEUE (default: 2 x workers)")
+    parser.add_argument("--clients", type=int, default=None, help="Concurrent logins (default: 4 x workers)")
+    parser.add_argument("--attempts", type=int, default=100, help="Logins per cost factor in the pool run")
+    parser.add_argument("--out", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    queue = args.queue or 2 * args.workers
+    clients = args.clients or 4 * args.workers
+
+    from django.conf import settings
+    settings.configure(PASSWORD_HASH_WORKERS=args.workers, PASSWORD_HASH_QUEUE=queue, PASSWORD_HASH_TIMEOUT=60)
+
+    report = {
+        "meta": {"cores": os.cpu_count(), "workers": args.workers, "queue": queue, "clients": clients,
+                 "bcrypt": bcrypt.__version__},
+        "rounds": {},
+    }
+    for rounds in args.rounds:
+        hashed = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(rounds=rounds))
+        report["rounds"][str(rounds)] = {
+            "inline": _inline(hashed, args.seconds),
+            "pool": _pool(hashed.decode(), args.attempts, clients, args.workers),
+        }
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n")
+        for rounds, result in report["rounds"].items():
+            print(f"cost {rounds}: {result['inline']['checks_per_second_per_core']} logins/s per core inline, "
+                  f"{result['pool']['accepted_per_second']} logins/s through the pool, "
+                  f"{result['pool']['rejected_429']} 429 answers for {result['pool']['attempts']} logins")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
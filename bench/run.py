@@ -0,0 +1,314 @@
+"""
+run.py
+------
+Load benchmark for the events API.
+
+- Seeds N users and M events into a throwaway SQLite file (or --database-url, e.g. a MySQL stand-in)
+- Drives a weighted mix of list/detail/search/register/unregister requests through the Django
+  test client from --concurrency threads (the full middleware + view + database path, no network)
+- Reports throughput, p50/p95/p99 latency and database statements per request, overall and per
+  operation, as JSON (stdout or --out) so runs can be diffed with ``python -m bench.compare``
+
+Example:
+    python -m bench.run --users 200 --events 500 --requests 2000 --concurrency 8 --out bench.json
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+OPERATIONS = ("list", "detail", "search", "register", "unregister")
+DEFAULT_MIX = "list=40,detail=25,search=15,register=10,unregister=10"
+
+
+def parse_mix(text: str) -> dict:
+    """Parse "list=40,detail=25,..." into {operation: weight}."""
+    mix = {}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation '{name}' (expected one of {', '.join(OPERATIONS)})")
+        mix[name] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise argparse.ArgumentTypeError("the mix needs at least one operation with a positive weight")
+    return mix
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list (0 for an empty list)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), math.ceil(pct / 100 * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+def summarize(samples: list, duration: float) -> dict:
+    """Summarize (latency_seconds, statements, status_code) samples."""
+    latencies = sorted(s[0] * 1000 for s in samples)
+    statements = [s[1] for s in samples]
+    statuses = Counter(str(s[2]) for s in samples)
+    count = len(samples)
+    return {
+        "requests": count,
+        "errors": sum(1 for s in samples if s[2] >= 500 or s[2] == 0),
+        "status_codes": dict(sorted(statuses.items())),
+        "throughput_rps": round(count / duration, 2) if duration else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / count, 3) if count else 0.0,
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "max": round(latencies[-1], 3) if latencies else 0.0,
+        },
+        "statements_per_request": {
+            "mean": round(sum(statements) / count, 2) if count else 0.0,
+            "max": max(statements) if statements else 0,
+        },
+    }
+
+
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or "unknown"
+    except Exception:
+        return "unknown"
+
+
+def _configure_environment(database_url: str) -> None:
+    # Must happen before Django settings and database.database are imported
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+    os.environ.setdefault("DJANGO_SECRET_KEY", "bench-secret")
+    os.environ.setdefault("JWT_SECRET", "bench-jwt-secret-bench-jwt-secret")
+    os.environ["DEBUG"] = "False"  # DEBUG keeps every Django query in memory
+    os.environ["STORAGE_BACKEND"] = "local"
+    os.environ.setdefault("REQUEST_LOG_LEVEL", "WARNING")  # no per-request log lines while benchmarking
+
+    import django
+    from django.conf import settings
+
+    warnings.filterwarnings("ignore", message="No directory at")  # collectstatic output is not needed
+    django.setup()
+    if "*" not in settings.ALLOWED_HOSTS:
+        settings.ALLOWED_HOSTS.append("testserver")
+    # 4xx responses are expected in the mix (full events, double registrations)
+    logging.getLogger("django.request").setLevel(logging.ERROR)
+
+
+class StatementCounter:
+    """Counts statements issued by the current thread on the SQLModel engine and Django's connection."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self._local = threading.local()
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args, **kwargs):
+        self._local.count = getattr(self._local, "count", 0) + 1
+
+    def _django_wrapper(self, execute, sql, params, many, context):
+        self._on_execute()
+        return execute(sql, params, many, context)
+
+    def measure(self, func):
+        """Run func() and return (result, seconds, statements)."""
+        from django.db import connection
+
+        self._local.count = 0
+        with connection.execute_wrapper(self._django_wrapper):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+        return result, elapsed, self._local.count
+
+
+class Workload:
+    """Builds requests for each operation; tracks registrations so unregister has real targets."""
+
+    def __init__(self, user_emails: list, event_ids: list, seed_value: int):
+        import jwt
+        from django.conf import settings
+
+        self.event_ids = event_ids
+        self.user_emails = user_emails
+        exp = datetime.utcnow() + timedelta(hours=6)
+        self.tokens = {
+            email: jwt.encode({"email": email, "exp": exp, "iat": datetime.utcnow()},
+                              settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+            for email in user_emails
+        }
+        self.registered = []
+        self.lock = threading.Lock()
+        self.seed_value = seed_value
+        self._rng = threading.local()
+        self._workers = itertools.count()
+
+    @property
+    def rng(self) -> random.Random:
+        if not hasattr(self._rng, "value"):
+            # Seeded per worker number (not thread id) so runs are repeatable
+            self._rng.value = random.Random(f"{self.seed_value}-{next(self._workers)}")
+        return self._rng.value
+
+    def _auth(self, email: str) -> dict:
+        return {"HTTP_AUTHORIZATION": f"Bearer {self.tokens[email]}"}
+
+    def request(self, client, op: str):
+        from bench.seed import WORDS
+
+        rng = self.rng
+        if op == "list":
+            return client.get("/api/events")
+        if op == "detail":
+            return client.get(f"/api/events/{rng.choice(self.event_ids)}")
+        if op == "search":
+            return client.get("/api/events", {"q": rng.choice(WORDS)})
+
+        if op == "unregister":
+            with self.lock:
+                pair = self.registered.pop(rng.randrange(len(self.registered))) if self.registered else None
+            if pair is not None:
+                email, event_id = pair
+                return client.post("/api/events/unregister", {"event_id": event_id},
+                                   content_type="application/json", **self._auth(email))
+            # Nothing to unregister yet: fall through to a registration
+
+        email, event_id = rng.choice(self.user_emails), rng.choice(self.event_ids)
+        response = client.post("/api/events/register", {"event_id": event_id},
+                               content_type="application/json", **self._auth(email))
+        if response.status_code == 200:
+            with self.lock:
+                self.registered.append((email, event_id))
+        return response
+
+
+def run(args) -> dict:
+    tmpdir = None
+    database_url = args.database_url
+    if not database_url:
+        tmpdir = tempfile.mkdtemp(prefix="aubevents-bench-")
+        database_url = f"sqlite:///{Path(tmpdir) / 'bench.db'}"
+    _configure_environment(database_url)
+
+    from django.test import Client
+
+    from bench.seed import seed, user_email
+    from database.database import get_engine
+
+    seed_start = time.perf_counter()
+    event_ids = seed(args.users, args.events, seed_value=args.seed, capacity=args.capacity)
+    seed_seconds = time.perf_counter() - seed_start
+
+    workload = Workload([user_email(i) for i in range(args.users)], event_ids, args.seed)
+    counter = StatementCounter(get_engine())
+    ops, weights = zip(*args.mix.items())
+    schedule_rng = random.Random(args.seed)
+    warmup = schedule_rng.choices(ops, weights, k=args.warmup)
+    schedule = schedule_rng.choices(ops, weights, k=args.requests)
+
+    clients = threading.local()
+
+    def one(op):
+        if not hasattr(clients, "value"):
+            clients.value = Client()
+        try:
+            response, elapsed, statements = counter.measure(lambda: workload.request(clients.value, op))
+            return op, elapsed, statements, response.status_code
+        except Exception:
+            logging.getLogger(__name__).exception("request failed (%s)", op)
+            return op, 0.0, 0, 0
+
+    with ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="bench") as pool:
+        list(pool.map(one, warmup))
+        started = time.perf_counter()
+        results = list(pool.map(one, schedule))
+        duration = time.perf_counter() - started
+
+    by_op = {}
+    for op, elapsed, statements, status in results:
+        by_op.setdefault(op, []).append((elapsed, statements, status))
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "python": platform.python_version(),
+            "database": get_engine().dialect.name,
+            "users": args.users,
+            "events": args.events,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "mix": args.mix,
+            "seed": args.seed,
+            "seed_seconds": round(seed_seconds, 3),
+            "duration_seconds": round(duration, 3),
+        },
+        "total": summarize([(e, s, c) for _, e, s, c in results], duration),
+        "operations": {op: summarize(samples, duration) for op, samples in sorted(by_op.items())},
+    }
+
+    if tmpdir and not args.keep_db:
+        get_engine().dispose()
+        for path in Path(tmpdir).iterdir():
+            path.unlink()
+        os.rmdir(tmpdir)
+    elif tmpdir:
+        report["meta"]["database_url"] = database_url
+    return report
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m bench.run", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200, help="Users to seed (default 200)")
+    parser.add_argument("--events", type=int, default=500, help="Events to seed (default 500)")
+    parser.add_argument("--requests", type=int, default=2000, help="Measured requests (default 2000)")
+    parser.add_argument("--warmup", type=int, default=100, help="Unmeasured warm-up requests (default 100)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Client threads (default 8)")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"Operation weights (default {DEFAULT_MIX})")
+    parser.add_argument("--capacity", type=int, default=50, help="Seats per seeded event (default 50)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for data and request schedule")
+    parser.add_argument("--database-url", help="Benchmark against this database instead of a temporary SQLite file "
+                                               "(rows from earlier runs with the bench- prefix are replaced)")
+    parser.add_argument("--keep-db", action="store_true", help="Keep the temporary SQLite file")
+    parser.add_argument("--out", help="Write the JSON report here instead of stdout")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n")
+        total = report["total"]
+        print(f"{total['requests']} requests, {total['throughput_rps']} req/s, "
+              f"p50 {total['latency_ms']['p50']} ms, p99 {total['latency_ms']['p99']} ms, "
+              f"{total['statements_per_request']['mean']} statements/request -> {args.out}")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    sys.exit(main())
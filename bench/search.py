@@ -0,0 +1,224 @@
+"""
+search.py
+---------
+Event search benchmark: the trigram index (backend/search.py) against the SQL ``LIKE`` path
+(``database.list_events(search=...)``) on the same synthetic catalog, for each --events size.
+
+- "exact": a speaker, location or title phrase copied from a random event
+- "typo":  the same phrase with one edit (drop, swap or replace a letter) in one of its words
+
+For both paths the report gives p50/p99 query latency and the hit rate: how often the first result
+contains every word of the original phrase. The index also reports its build time and memory
+(tracemalloc). The SQL path runs against a temporary SQLite file unless --database-url is given.
+
+Example:
+    python -m bench.search --events 1000 10000 100000 --queries 300 --out search.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from bench.run import percentile
+
+TOPICS = ["Robotics", "Career", "Music", "Startup", "Coding", "Debate", "Art", "Climate", "Machine Learning",
+          "Film", "Entrepreneurship", "Public Health", "Architecture", "Poetry", "Finance", "Nutrition"]
+FORMATS = ["Workshop", "Talk", "Panel", "Fair", "Night", "Bootcamp", "Seminar", "Meetup", "Hackathon"]
+LOCATIONS = ["Issam Fares Hall", "West Hall", "College Hall", "Bechtel Engineering", "Nicely Hall", "Van Dyck Hall",
+             "Jafet Library", "Charles Hostler Center", "Assembly Hall", "Olayan School of Business", "Green Oval"]
+FIRST_NAMES = ["Lina", "Rami", "Nour", "Karim", "Maya", "Hadi", "Rania", "Omar", "Yara", "Ziad", "Dima", "Samir",
+               "Layal", "Fadi", "Hiba", "Tarek", "Reem", "Walid", "Joelle", "Bassel"]
+LAST_NAMES = ["Haddad", "Khoury", "Saab", "Nassar", "Farah", "Aoun", "Mansour", "Khalil", "Hamdan", "Sleiman",
+              "Daher", "Karam", "Azar", "Tannous", "Jaber", "Chahine", "Rizk", "Ghanem", "Saliba", "Bitar"]
+CLUBS = ["CS Society", "IEEE Student Branch", "Entrepreneurship Club", "Debate Club", "Photography Club",
+         "Red Cross Club", "Music Club", "Outdoors Club", "Model UN", "Women in Engineering"]
+
+
+def make_catalog(count: int, rng: random.Random) -> list:
+    """`count` synthetic events as dicts with title, location, speakers and organizers."""
+    return [
+        {
+            "id": i + 1,
+            "title": f"{rng.choice(TOPICS)} {rng.choice(FORMATS)} {rng.randrange(1, 50)}",
+            "location": rng.choice(LOCATIONS),
+            "speakers": [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(rng.randrange(1, 3))],
+            "organizers": [rng.choice(CLUBS)],
+        }
+        for i in range(count)
+    ]
+
+
+def add_typo(phrase: str, rng: random.Random) -> str:
+    """One edit in one word of at least four letters (the phrase is returned as is if it has none)."""
+    words = phrase.split()
+    candidates = [i for i, word in enumerate(words) if len(word) >= 4]
+    if not candidates:
+        return phrase
+    i = rng.choice(candidates)
+    word, pos = words[i], rng.randrange(1, len(words[i]) - 1)
+    edit = rng.choice(("drop", "swap", "replace"))
+    if edit == "drop":
+        word = word[:pos] + word[pos + 1:]
+    elif edit == "swap":
+        word = word[:pos] + word[pos + 1] + word[pos] + word[pos + 2:]
+    else:
+        word = word[:pos] + rng.choice("aeiourstln".replace(word[pos].lower(), "")) + word[pos + 1:]
+    words[i] = word
+    return " ".join(words)
+
+
+def make_queries(catalog: list, count: int, rng: random.Random) -> list:
+    """[(phrase, typo_phrase)] drawn from random events' speakers, locations and titles."""
+    queries = []
+    for _ in range(count):
+        event = rng.choice(catalog)
+        phrase = rng.choice([event["location"], event["title"], *event["speakers"]])
+        queries.append((phrase, add_typo(phrase, rng)))
+    return queries
+
+
+def _words(event: dict) -> set:
+    from backend.search import event_text, normalize
+    return set(normalize(event_text(event["title"], event["location"], event["speakers"], event["organizers"])))
+
+
+def _timed(search, queries: list, expected: list, words: dict) -> dict:
+    from backend.search import normalize
+
+    latencies, hits = [], 0
+    for query, phrase in zip(queries, expected):
+        started = time.perf_counter()
+        ids = search(query)
+        latencies.append((time.perf_counter() - started) * 1000)
+        hits += bool(ids) and set(normalize(phrase)) <= words[ids[0]]
+    latencies.sort()
+    return {
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "hit_rate": round(hits / len(queries), 3),
+    }
+
+
+def bench_index(catalog: list, queries: list, top: int, min_score: float) -> dict:
+    from backend.search import TrigramIndex, event_text
+
+    def build():
+        index = TrigramIndex()
+        for e in catalog:
+            index.add(e["id"], event_text(e["title"], e["location"], e["speakers"], e["organizers"]))
+        return index
+
+    started = time.perf_counter()
+    index = build()
+    build_ms = (time.perf_counter() - started) * 1000
+    tracemalloc.start()
+    measured = build()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del measured
+
+    words = {e["id"]: _words(e) for e in catalog}
+    phrases = [phrase for phrase, _ in queries]
+    search = lambda q: [event_id for event_id, _ in index.search(q, top, min_score)]  # noqa: E731
+    return {
+        "build_ms": round(build_ms, 1),
+        "memory_mb": round(memory / 2 ** 20, 1),
+        "exact": _timed(search, phrases, phrases, words),
+        "typo": _timed(search, [typo for _, typo in queries], phrases, words),
+    }
+
+
+def bench_sql(catalog: list, queries: list) -> dict:
+    from sqlalchemy import delete, insert
+    from database.database import get_engine, list_events
+    from database.migrations import migrate
+    from database.tables import Events
+
+    engine = get_engine()
+    migrate(engine)
+    start = datetime.utcnow() + timedelta(days=1)
+    with engine.begin() as conn:
+        conn.execute(delete(Events))
+        conn.execute(insert(Events), [
+            {"id": e["id"], "title": e["title"], "location": e["location"], "speakers": e["speakers"],
+             "organizers": e["organizers"], "description": None, "date": start + timedelta(minutes=e["id"]),
+             "capacity": 50, "available_seats": 50, "image_variants": {}}
+            for e in catalog
+        ])
+
+    words = {e["id"]: _words(e) for e in catalog}
+    phrases = [phrase for phrase, _ in queries]
+    search = lambda q: [e.id for e in list_events(search=q)]  # noqa: E731
+    return {
+        "exact": _timed(search, phrases, phrases, words),
+        "typo": _timed(search, [typo for _, typo in queries], phrases, words),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench.search", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Catalog sizes (default 1000 10000 100000)")
+    parser.add_argument("--queries", type=int, default=300, help="Queries per kind and size (default 300)")
+    parser.add_argument("--top", type=int, default=10, help="Results per index query (default 10)")
+    parser.add_argument("--min-score", type=float, default=0.6, help="Index score threshold (default 0.6)")
+    parser.add_argument("--no-sql", action="store_true", help="Skip the SQL LIKE comparison")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for catalog and queries")
+    parser.add_argument("--database-url", help="Run the SQL path here instead of a temporary SQLite file "
+                                               "(its events table is emptied)")
+    parser.add_argument("--out", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    tmpdir = None
+    if not args.no_sql:
+        database_url = args.database_url
+        if not database_url:
+            tmpdir = tempfile.mkdtemp(prefix="aubevents-search-")
+            database_url = f"sqlite:///{Path(tmpdir) / 'search.db'}"
+        os.environ["DATABASE_URL"] = database_url  # before database.database is imported
+    else:
+        os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+    report = {"meta": {"queries": args.queries, "top": args.top, "min_score": args.min_score, "seed": args.seed},
+              "sizes": {}}
+    for size in args.events:
+        rng = random.Random(args.seed)
+        catalog = make_catalog(size, rng)
+        queries = make_queries(catalog, args.queries, rng)
+        result = {"index": bench_index(catalog, queries, args.top, args.min_score)}
+        if not args.no_sql:
+            result["sql_like"] = bench_sql(catalog, queries)
+        report["sizes"][str(size)] = result
+
+    if tmpdir:
+        from database.database import get_engine
+        get_engine().dispose()
+        for path in Path(tmpdir).iterdir():
+            path.unlink()
+        os.rmdir(tmpdir)
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n")
+        for size, result in report["sizes"].items():
+            index, line = result["index"], f"{size} events: index typo p50 {result['index']['typo']['p50_ms']} ms"
+            line += f" (hit rate {index['typo']['hit_rate']}), build {index['build_ms']} ms, {index['memory_mb']} MB"
+            if "sql_like" in result:
+                sql = result["sql_like"]
+                line += f"; LIKE typo p50 {sql['typo']['p50_ms']} ms (hit rate {sql['typo']['hit_rate']})"
+            print(line)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+seed.py
+-------
+Bulk-creates the benchmark data set.
+
+Benchmark rows are recognisable by their ``bench-`` email prefix, so seeding a shared database
+(e.g. a MySQL stand-in given with --database-url) first removes the rows of a previous run.
+DATABASE_URL must be set before this module is imported (database.database builds its engine on import).
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import bcrypt
+from sqlalchemy import delete
+from sqlmodel import Session, select
+
+from database.database import backfill_event_names, get_engine, rebuild_facet_counts
+from database.migrations import migrate
+from database.tables import EventOrganizers, Events, EventSpeakers, UserEventLink, Users
+
+BENCH_PREFIX = "bench-"
+ADMIN_EMAIL = "bench-admin@aub.edu.lb"
+CATEGORIES = ["Academic", "Career", "Cultural", "Social", "Sports", "Workshop"]
+WORDS = ["robotics", "career", "music", "startup", "coding", "debate", "art", "climate", "ai", "film"]
+
+
+def user_email(i: int) -> str:
+    return f"{BENCH_PREFIX}user-{i}@aub.edu.lb"
+
+
+def clear_bench_rows(engine) -> None:
+    with Session(engine) as session:
+        bench_events = select(Events.id).where(Events.created_by.like(f"{BENCH_PREFIX}%"))
+        session.exec(delete(UserEventLink).where(
+            UserEventLink.user_email.like(f"{BENCH_PREFIX}%") | UserEventLink.event_id.in_(bench_events)
+        ))
+        for table in (EventSpeakers, EventOrganizers):
+            session.exec(delete(table).where(table.event_id.in_(bench_events)))
+        session.exec(delete(Events).where(Events.created_by.like(f"{BENCH_PREFIX}%")))
+        session.exec(delete(Users).where(Users.email.like(f"{BENCH_PREFIX}%")))
+        session.commit()
+
+
+def seed(users: int, events: int, seed_value: int = 0, capacity: int = 50) -> list:
+    """Create `users` users, `events` upcoming events and return the event ids."""
+    rng = random.Random(seed_value)
+    engine = get_engine()
+    migrate(engine)
+    clear_bench_rows(engine)
+
+    # One cheap hash shared by every user: seeding should not be dominated by bcrypt
+    password_hash = bcrypt.hashpw(b"BenchPass123!", bcrypt.gensalt(rounds=4)).decode()
+    start = datetime.utcnow() + timedelta(days=1)
+
+    with Session(engine) as session:
+        session.add(Users(fullname="Bench Admin", email=ADMIN_EMAIL, password_hash=password_hash,
+                          is_admin=True, is_verified=True))
+        session.add_all(
+            Users(fullname=f"Bench User {i}", email=user_email(i), password_hash=password_hash, is_verified=True)
+            for i in range(users)
+        )
+        session.commit()
+
+        rows = []
+        for i in range(events):
+            topic = rng.choice(WORDS)
+            rows.append(Events(
+                title=f"{topic.title()} session {i}",
+                description=f"Benchmark event about {topic} and {rng.choice(WORDS)}.",
+                date=start + timedelta(hours=rng.randrange(0, 24 * 180)),
+                location=f"Building {rng.randrange(1, 20)}",
+                capacity=capacity,
+                available_seats=capacity,
+                speakers=[f"Speaker {rng.randrange(100)}"],
+                organizers=[f"Club {rng.randrange(30)}"],
+                category=rng.choice(CATEGORIES),
+                created_by=ADMIN_EMAIL,
+                image_url="https://example.com/bench.png",
+            ))
+        session.add_all(rows)
+        session.commit()
+        event_ids = [row.id for row in rows]
+
+    rebuild_facet_counts()
+    last_id = 0
+    while last_id is not None:  # speaker/organizer side tables
+        last_id, _ = backfill_event_names(after_id=last_id, limit=1000)
+    return event_ids
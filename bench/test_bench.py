@@ -0,0 +1,78 @@
+"""
+Tests for the benchmark helpers (bench/run.py, bench/compare.py, bench/importtime.py, bench/search.py).
+run: pytest bench/test_bench.py -v
+"""
+
+import argparse
+
+import pytest
+
+from bench.compare import compare
+from bench.importtime import parse_importtime, summarize_imports
+from bench.run import parse_mix, percentile, summarize
+from bench.search import add_typo, make_catalog, make_queries
+
+
+def test_parse_mix_validates_operations():
+    assert parse_mix("list=3, detail=1") == {"list": 3.0, "detail": 1.0}
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_mix("list=1,login=2")
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_mix("list=0")
+
+
+def test_percentiles_use_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([7], 95) == 7
+    assert percentile([], 50) == 0.0
+
+
+def test_summarize_and_compare_flag_regressions():
+    fast = summarize([(0.010, 2, 200)] * 10, duration=1.0)
+    slow = summarize([(0.020, 2, 200)] * 9 + [(0.020, 2, 0)], duration=2.0)
+    assert fast["throughput_rps"] == 10.0 and fast["latency_ms"]["p50"] == 10.0
+    assert slow["errors"] == 1 and slow["status_codes"] == {"0": 1, "200": 9}
+
+    _, regressions = compare({"total": fast}, {"total": slow}, threshold=0.1)
+    assert {label for _, label, *_ in regressions} == {"req/s", "p50 ms", "p95 ms", "p99 ms"}
+    _, regressions = compare({"total": slow}, {"total": fast}, threshold=0.1)
+    assert regressions == []
+
+
+def test_importtime_parsing_and_summary():
+    stderr = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       100 |        100 |     PIL.Image",
+        "import time:        50 |        150 |   PIL",
+        "import time:      2000 |       2000 |   django.http",
+        "import time:        10 |       2160 | backend.images",
+        "some unrelated stderr line",
+    ])
+    rows = parse_importtime(stderr)
+    assert [(r["name"], r["depth"]) for r in rows] == [
+        ("PIL.Image", 2), ("PIL", 1), ("django.http", 1), ("backend.images", 0),
+    ]
+    summary = summarize_imports(rows, top=2)
+    assert summary["modules"] == 4
+    assert summary["import_ms"] == 2.2
+    assert summary["heavy_loaded"] == ["PIL"]
+    assert summary["top_packages"] == [["django", 2.0], ["PIL", 0.1]]
+    assert summary["top_modules"][0] == ["backend.images", 2.2]
+
+
+def test_search_queries_carry_at_most_one_typo():
+    import random
+
+    rng = random.Random(1)
+    catalog = make_catalog(50, rng)
+    assert [e["id"] for e in catalog] == list(range(1, 51))
+    typos = 0
+    for phrase, typo in make_queries(catalog, 100, rng):
+        changed = [(a, b) for a, b in zip(phrase.split(), typo.split()) if a != b]
+        assert len(changed) <= 1  # swapping a doubled letter ("Hall") changes nothing
+        assert all(abs(len(a) - len(b)) <= 1 for a, b in changed)
+        typos += len(changed)
+    assert typos > 80
+    assert add_typo("Art 12", random.Random(0)) == "Art 12"
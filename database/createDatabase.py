@@ -3,8 +3,10 @@
 
 from sqlmodel import SQLModel
 from database.database import get_engine
+from database.migrations import migrate
 import database.tables
 
 #SQLModel.metadata.drop_all(get_engine())
-SQLModel.metadata.create_all(get_engine())
+# Creates the tables and records/applies every schema migration (see database/migrations.py)
+migrate(get_engine())
 
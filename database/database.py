@@ -1,32 +1,263 @@
 # List of database functions to be used in the backend
 
 from sqlmodel import Session, select, create_engine
-from sqlalchemy import or_, update
+from sqlalchemy import and_, or_, update, delete, case, insert, literal, bindparam, func
+from sqlalchemy.orm import aliased
+from sqlalchemy.exc import IntegrityError
 from database.tables import Users
+from database.tables import UserEventLink
 from database.tables import Events
-from typing import Optional, List
-from datetime import datetime
+from database.tables import EventFacets
+from database.tables import RateLimitBuckets
+from database.tables import AuthTokens
+from database.tables import DataVersions
+from database.tables import EventSpeakers
+from database.tables import EventOrganizers
+from database.tables import SentReminders
+from database import django_bridge
+from typing import Iterable, Optional, List, NamedTuple, Tuple
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
 from dotenv import load_dotenv
+from contextlib import contextmanager
+from contextvars import ContextVar
+import hashlib
 import os
+import random
+import time
 
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
-engine = create_engine(DATABASE_URL, echo=False)
+# SQLMODEL_USE_DJANGO_CONNECTION=True runs these functions on Django's connection instead of a
+# second pool (see database/django_bridge.py)
+if os.getenv("SQLMODEL_USE_DJANGO_CONNECTION", "False") == "True":
+    engine = django_bridge.create_bridged_engine(DATABASE_URL, echo=False)
+else:
+    engine = create_engine(DATABASE_URL, echo=False)
 
 def get_engine():
     return engine
 
+@contextmanager
+def atomic():
+    """One transaction across several of these functions and the Django ORM, e.g.::
+
+        with atomic():
+            create_user(...)
+            register_user_to_event(...)
+
+    Needs SQLMODEL_USE_DJANGO_CONNECTION=True; otherwise each function still commits on its own.
+    Reads inside the block stay on the primary, since replicas cannot see its uncommitted writes.
+    """
+    with django_bridge.atomic(engine), use_primary():
+        yield
+
+# --- Event time zone ---
+# Events.date holds naive wall-clock times in EVENT_TIME_ZONE: what admins type into the event
+# form (a datetime-local input, no offset) and what the frontend displays as is.
+
+EVENT_TIME_ZONE = os.getenv("EVENT_TIME_ZONE", "Asia/Beirut")
+
+def event_timezone() -> ZoneInfo:
+    return ZoneInfo(EVENT_TIME_ZONE)
+
+def event_now() -> datetime:
+    """The current time as a naive wall-clock value in EVENT_TIME_ZONE, comparable with Events.date."""
+    return datetime.now(event_timezone()).replace(tzinfo=None)
+
+# --- Read replicas ---
+# DATABASE_REPLICA_URLS (comma-separated) lists read-only copies of DATABASE_URL. Read helpers that
+# tolerate a little lag (list_events, get_event_record, get_user_events, get_facet_counts) take their
+# engine from read_engine(); everything else, and every write, stays on the primary. Replicas keep
+# their own pools, also when the primary is bridged to Django's connection.
+#
+# Read-your-writes: a write marks its key (the user's email) for REPLICA_STICKY_SECONDS, during
+# which reads for that key go to the primary. That covers this process; ReadYourWritesMiddleware
+# (backend/replicas.py) carries the same window across workers in a cookie and calls use_primary().
+
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", 5))
+replica_engines = []
+_recent_writes: dict = {}
+_pin_primary: ContextVar[bool] = ContextVar("pin_primary", default=False)
+
+def configure_replicas(urls: List[str]) -> None:
+    """Replace the replica set (an empty list routes every read to the primary)."""
+    global replica_engines
+    for replica in replica_engines:
+        replica.dispose()
+    replica_engines = [create_engine(url, echo=False, pool_pre_ping=True) for url in urls]
+    _recent_writes.clear()
+
+configure_replicas([url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()])
+
+def get_engines() -> list:
+    """The primary engine followed by every replica engine."""
+    return [engine, *replica_engines]
+
+def mark_written(key: Optional[str]) -> None:
+    """Send reads for `key` to the primary for the next REPLICA_STICKY_SECONDS."""
+    if not key or not replica_engines:
+        return
+    now = time.monotonic()
+    if len(_recent_writes) > 10000:
+        for stale in [k for k, until in _recent_writes.items() if until <= now]:
+            _recent_writes.pop(stale, None)
+    _recent_writes[key.lower()] = now + REPLICA_STICKY_SECONDS
+
+@contextmanager
+def use_primary():
+    """Route every read in the block (this thread / task only) to the primary."""
+    token = _pin_primary.set(True)
+    try:
+        yield
+    finally:
+        _pin_primary.reset(token)
+
+def read_engine(key: Optional[str] = None):
+    """Engine for a read that may lag: a random replica, unless pinned or `key` wrote recently."""
+    if not replica_engines or _pin_primary.get():
+        return engine
+    if key:
+        until = _recent_writes.get(key.lower())
+        if until is not None:
+            if until > time.monotonic():
+                return engine
+            _recent_writes.pop(key.lower(), None)
+    return random.choice(replica_engines)
+
 #________________________________________________________________________________________________________________________________________________________
 
 # ------ Users table functions ------
 
 # --- Create User ---
 
-def create_user(email: str, password_hash: str):
+def create_user(email: str, password_hash: str, fullname: Optional[str] = None,
+                auth_token: Optional[Tuple[str, str, datetime]] = None, **fields) -> bool:
+    """Insert a user in one transaction; extra Users columns (e.g. is_verified) may be passed.
+
+    `auth_token` is an optional (purpose, code, expires_at) stored alongside the user.
+    Returns False when the email is already registered.
+    """
     with Session(engine) as session:
-        user = Users(email=email, password_hash=password_hash)
+        user = Users(email=email, password_hash=password_hash, fullname=fullname or email.split("@")[0], **fields)
         session.add(user)
-        session.commit()
+        try:
+            if auth_token is not None:
+                # No relationship() links the two, so flush the user first for the foreign key
+                session.flush()
+                purpose, code, expires_at = auth_token
+                session.add(AuthTokens(email=email, purpose=purpose, code=code, expires_at=expires_at))
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+            return False
+        return True
+
+
+# --- Single-fetch snapshot (auth flows) ---
+
+class UserSnapshot(NamedTuple):
+    """Plain, detached copy of a users row (and, on request, its codes): one SELECT per auth decision."""
+    email: str
+    fullname: Optional[str]
+    password_hash: str
+    is_admin: bool
+    is_verified: bool
+    verification_token: Optional[str]
+    verification_token_expiry: Optional[datetime]
+    reset_code: Optional[str]
+    reset_code_expiry: Optional[datetime]
+
+
+_USER_COLUMNS = [Users.email, Users.fullname, Users.password_hash, Users.is_admin, Users.is_verified]
+
+
+def get_user_snapshot(email: str, with_tokens: bool = False) -> Optional[UserSnapshot]:
+    """Read a user's auth state with a single SELECT (no ORM identity, no relationship loading).
+
+    With `with_tokens` the verification and reset codes are outer-joined into the same SELECT;
+    otherwise those fields are None.
+    """
+    stmt = select(*_USER_COLUMNS).where(Users.email == email)
+    if with_tokens:
+        verify, reset = aliased(AuthTokens), aliased(AuthTokens)
+        stmt = (
+            stmt.add_columns(verify.code, verify.expires_at, reset.code, reset.expires_at)
+            .outerjoin(verify, and_(verify.email == Users.email, verify.purpose == TOKEN_VERIFY))
+            .outerjoin(reset, and_(reset.email == Users.email, reset.purpose == TOKEN_RESET))
+        )
+    with engine.connect() as conn:
+        row = conn.execute(stmt).first()
+    if row is None:
+        return None
+    return UserSnapshot(*row) if with_tokens else UserSnapshot(*row, None, None, None, None)
+
+
+def update_user_fields(email: str, clear_tokens: Tuple[str, ...] = (), **fields) -> bool:
+    """Set several Users columns with a single UPDATE; returns False when the user does not exist.
+
+    `clear_tokens` deletes the user's codes for those purposes in the same transaction.
+    """
+    if not fields and not clear_tokens:
+        return False
+    with engine.begin() as conn:
+        updated = True
+        if fields:
+            updated = conn.execute(update(Users).where(Users.email == email).values(**fields)).rowcount > 0
+        if clear_tokens:
+            conn.execute(delete(AuthTokens).where(AuthTokens.email == email, AuthTokens.purpose.in_(clear_tokens)))
+    return updated
+
+
+# --- Verification / reset codes (AuthTokens) ---
+
+TOKEN_VERIFY = "verify"
+TOKEN_RESET = "reset"
+
+
+def set_auth_token(email: str, purpose: str, code: str, expires_at: datetime) -> bool:
+    """Store (or replace) a user's code for `purpose`; returns False when the user does not exist."""
+    with engine.begin() as conn:
+        replaced = conn.execute(
+            update(AuthTokens)
+            .where(AuthTokens.email == email, AuthTokens.purpose == purpose)
+            .values(code=code, expires_at=expires_at)
+        ).rowcount
+        if replaced:
+            return True
+        # INSERT ... SELECT FROM users doubles as the existence check
+        inserted = conn.execute(
+            insert(AuthTokens).from_select(
+                ["email", "purpose", "code", "expires_at"],
+                select(Users.email, literal(purpose), literal(code), literal(expires_at)).where(Users.email == email),
+            )
+        ).rowcount
+    return inserted > 0
+
+
+def get_auth_token(email: str, purpose: str) -> Optional[Tuple[str, datetime]]:
+    """(code, expires_at) of a user's code for `purpose`, or None."""
+    with engine.connect() as conn:
+        row = conn.execute(
+            select(AuthTokens.code, AuthTokens.expires_at)
+            .where(AuthTokens.email == email, AuthTokens.purpose == purpose)
+        ).first()
+    return (row[0], row[1]) if row else None
+
+
+def delete_expired_auth_tokens(before: Optional[datetime] = None, limit: int = 1000) -> int:
+    """Delete up to `limit` codes that expired before `before` (default: now); returns the count.
+
+    Callers loop until 0 so each batch is a short transaction.
+    """
+    before = before or datetime.utcnow()
+    with engine.begin() as conn:
+        ids = conn.execute(
+            select(AuthTokens.id).where(AuthTokens.expires_at < before).order_by(AuthTokens.expires_at).limit(limit)
+        ).scalars().all()
+        if not ids:
+            return 0
+        return conn.execute(delete(AuthTokens).where(AuthTokens.id.in_(ids))).rowcount
 
 
 # --- Getters ---
@@ -53,20 +284,20 @@ def get_is_verified(email: str) -> Optional[bool]:
     return user.is_verified if user else None
 
 def get_verification_token(email: str) -> Optional[str]:
-    user = get_user(email)
-    return user.verification_token if user else None
+    token = get_auth_token(email, TOKEN_VERIFY)
+    return token[0] if token else None
 
 def get_verification_token_expiry(email: str) -> Optional[datetime]:
-    user = get_user(email)
-    return user.verification_token_expiry if user else None
+    token = get_auth_token(email, TOKEN_VERIFY)
+    return token[1] if token else None
 
 def get_reset_code(email: str) -> Optional[str]:
-    user = get_user(email)
-    return user.reset_code if user else None
+    token = get_auth_token(email, TOKEN_RESET)
+    return token[0] if token else None
 
 def get_reset_code_expiry(email: str) -> Optional[datetime]:
-    user = get_user(email)
-    return user.reset_code_expiry if user else None
+    token = get_auth_token(email, TOKEN_RESET)
+    return token[1] if token else None
 
 
 # --- Setters ---
@@ -111,37 +342,81 @@ def update_is_verified(email: str, verified: bool):
         session.commit()
         session.refresh(user)
 
+# Codes always expire; without an explicit expiry they get the reset code lifetime
+DEFAULT_TOKEN_LIFETIME = timedelta(minutes=15)
+
 def update_verification_token(email: str, token: str, expiry: Optional[datetime] = None):
-    with Session(engine) as session:
-        user = session.exec(select(Users).where(Users.email == email)).first()
-        if not user:
-            return None
-        user.verification_token = token
-        user.verification_token_expiry = expiry
-        session.add(user)
-        session.commit()
-        session.refresh(user)
+    if not set_auth_token(email, TOKEN_VERIFY, token, expiry or datetime.utcnow() + DEFAULT_TOKEN_LIFETIME):
+        return None
 
 def update_reset_code(email: str, code: str, expiry: Optional[datetime] = None):
-    with Session(engine) as session:
-        user = session.exec(select(Users).where(Users.email == email)).first()
-        if not user:
-            return None
-        user.reset_code = code
-        user.reset_code_expiry = expiry
-        session.add(user)
-        session.commit()
-        session.refresh(user)
+    if not set_auth_token(email, TOKEN_RESET, code, expiry or datetime.utcnow() + DEFAULT_TOKEN_LIFETIME):
+        return None
 
 # --- Delete ---
 
 def delete_user(email: str):
-    with Session(engine) as session:
-        user = session.exec(select(Users).where(Users.email == email)).first()
-        if not user:
-            return False
-        session.delete(user)
-        session.commit()
+    with engine.begin() as conn:
+        return _delete_users(conn, [email]) > 0
+
+
+# --- Bulk delete (manage.py purgeusers) ---
+
+def _users_matching(domain: Optional[str]):
+    # Filtered in SQL: email LIKE '%@domain' (wildcards in `domain` are escaped)
+    return [Users.email.endswith("@" + domain.lower(), autoescape=True)] if domain else []
+
+
+def count_users_to_purge(domain: Optional[str] = None) -> dict:
+    """Rows a purge would remove: users, their registrations and codes, and events they created."""
+    emails = select(Users.email).where(*_users_matching(domain))
+    with engine.connect() as conn:
+        def count(stmt):
+            return conn.execute(stmt).scalar_one()
+        return {
+            "users": count(select(func.count()).select_from(Users).where(*_users_matching(domain))),
+            "registrations": count(select(func.count()).select_from(UserEventLink)
+                                   .where(UserEventLink.user_email.in_(emails))),
+            "codes": count(select(func.count()).select_from(AuthTokens).where(AuthTokens.email.in_(emails))),
+            "events_created": count(select(func.count()).select_from(Events).where(Events.created_by.in_(emails))),
+        }
+
+
+def delete_users_batch(domain: Optional[str] = None, limit: int = 500) -> int:
+    """Delete up to `limit` users (optionally of one email domain) in one short transaction.
+
+    Dependent rows go first: registrations (their seats are given back), codes, and the
+    creator reference of their events (the events themselves are kept). Returns the number
+    of users deleted; callers loop until it is 0.
+    """
+    with engine.begin() as conn:
+        emails = conn.execute(
+            select(Users.email).where(*_users_matching(domain)).order_by(Users.email).limit(limit)
+        ).scalars().all()
+        return _delete_users(conn, emails)
+
+
+def _delete_users(conn, emails: List[str]) -> int:
+    """Delete users and, first, every row that references them (same order in every caller)."""
+    if not emails:
+        return 0
+    freed = conn.execute(
+        select(UserEventLink.event_id, func.count())
+        .where(UserEventLink.user_email.in_(emails))
+        .group_by(UserEventLink.event_id)
+    ).all()
+    if freed:
+        conn.execute(
+            update(Events)
+            .where(Events.id == bindparam("b_event_id"))
+            .values(available_seats=Events.available_seats + bindparam("b_seats")),
+            [{"b_event_id": event_id, "b_seats": seats} for event_id, seats in freed],
+        )
+        conn.execute(delete(UserEventLink).where(UserEventLink.user_email.in_(emails)))
+    # Explicit, as SQLite does not enforce the ON DELETE CASCADE unless foreign keys are switched on
+    conn.execute(delete(AuthTokens).where(AuthTokens.email.in_(emails)))
+    conn.execute(update(Events).where(Events.created_by.in_(emails)).values(created_by=None))
+    return conn.execute(delete(Users).where(Users.email.in_(emails))).rowcount
 
 #________________________________________________________________________________________________________________________________________________________
 
@@ -158,9 +433,12 @@ def create_event(
     available_seats: Optional[int] = None,
     category: Optional[str] = None,
     created_by: Optional[str] = None,
-    image_url: Optional[str] = None
+    image_url: Optional[str] = None,
+    image_variants: Optional[dict] = None,
+    speakers: Optional[List[str]] = None,
+    organizers: Optional[List[str]] = None
 ) -> Events:
-    
+    """Insert an event together with its speaker/organizer side rows, in one transaction."""
     event = Events(
         title=title,
         description=description,
@@ -170,14 +448,21 @@ def create_event(
         available_seats=available_seats,
         category=category,
         created_by=created_by,
-        image_url=image_url
+        image_url=image_url,
+        image_variants=image_variants or {},
+        speakers=speakers or [],
+        organizers=organizers or []
     )
 
     with Session(get_engine()) as session:
         session.add(event)
+        session.flush()  # assigns event.id
+        _replace_names(session, EventSpeakers, event.id, speakers)
+        _replace_names(session, EventOrganizers, event.id, organizers)
         session.commit()
         session.refresh(event)
-        return event
+    mark_written(created_by)
+    return event
     
 # --- Getters ---
 
@@ -211,6 +496,11 @@ def get_image_url(event_id: int) -> Optional[str]:
         event = session.get(Events, event_id)
         return event.image_url if event else None
 
+def get_image_variants(event_id: int) -> Optional[dict]:
+    with Session(get_engine()) as session:
+        event = session.get(Events, event_id)
+        return event.image_variants if event else None
+
 def get_capacity(event_id: int) -> Optional[int]:
     with Session(get_engine()) as session:
         event = session.get(Events, event_id)
@@ -226,6 +516,33 @@ def get_speakers(event_id: int) -> Optional[str]:
         event = session.get(Events, event_id)
         return event.speakers if event else None
 
+def get_event_record(event_id: int) -> Optional[Events]:
+    """The whole event row in one query, from a replica when configured (see read_engine).
+
+    Soft-deleted events count as missing.
+    """
+    with Session(read_engine()) as session:
+        event = session.get(Events, event_id)
+        return event if event is not None and event.deleted_at is None else None
+
+def get_catalog_rows() -> List[Events]:
+    """Every live event in listing order (date, id), in one query on the primary (backend/catalog.py)."""
+    with Session(get_engine()) as session:
+        return session.exec(select(Events).where(Events.deleted_at.is_(None)).order_by(Events.date, Events.id)).all()
+
+def get_seat_counts(event_ids: Optional[List[int]] = None) -> dict:
+    """{event_id: available_seats} for the given live events (all when None), one narrow query.
+
+    Soft-deleted events are left out, which is how catalog snapshots drop them before a rebuild.
+    """
+    stmt = select(Events.id, Events.available_seats).where(Events.deleted_at.is_(None))
+    if event_ids is not None:
+        if not event_ids:
+            return {}
+        stmt = stmt.where(Events.id.in_(event_ids))
+    with read_engine().connect() as conn:
+        return dict(conn.execute(stmt).all())
+
 def get_category(event_id: int) -> Optional[str]:
     with Session(get_engine()) as session:
         event = session.get(Events, event_id)
@@ -258,6 +575,7 @@ def update_organizer(event_id: int, organizer: str) -> None:
             return
         event.organizers = organizer
         session.add(event)
+        _replace_names(session, EventOrganizers, event_id, organizer)
         session.commit()
 
 def update_date(event_id: int, date: datetime):
@@ -278,12 +596,13 @@ def update_location(event_id: int, location: str):
         session.add(event)
         session.commit()
 
-def update_image_url(event_id: int, image_url: Optional[str]):
+def update_image_url(event_id: int, image_url: Optional[str], image_variants: Optional[dict] = None):
     with Session(get_engine()) as session:
         event = session.get(Events, event_id)
         if not event:
             return
         event.image_url = image_url
+        event.image_variants = image_variants or {}
         session.add(event)
         session.commit()
 
@@ -314,6 +633,7 @@ def update_speakers(event_id: int, speakers: str) -> None:
             return
         event.speakers = speakers
         session.add(event)
+        _replace_names(session, EventSpeakers, event_id, speakers)
         session.commit()
 
 def update_category(event_id: int, category: Optional[str]) -> None:
@@ -328,13 +648,92 @@ def update_category(event_id: int, category: Optional[str]) -> None:
 
 # --- Delete ---
 def delete_event(event_id: int) -> bool:
+    """Soft-delete an event: one UPDATE, whatever the size of its roster.
+
+    Every read filters on deleted_at from then on; registrations and side rows stay until
+    purge_deleted_events removes them. False if the event is missing or already deleted.
+    """
+    stmt = (
+        update(Events)
+        .where(Events.id == event_id, Events.deleted_at.is_(None))
+        .values(deleted_at=datetime.utcnow())
+    )
+    with engine.begin() as conn:
+        return bool(conn.execute(stmt).rowcount)  # ✅ explicitly signal success
+
+def purge_deleted_events(deleted_before: Optional[datetime] = None, limit: int = 1000) -> Tuple[int, int]:
+    """One bounded step of removing soft-deleted events for good; returns (events, registrations) removed.
+
+    Registrations go first, at most `limit` rows per call (a 2,000-seat event takes a few calls);
+    events whose registrations are all gone are then removed with their side rows, `limit` at a
+    time. Only events deleted before `deleted_before` (default: now) are touched. Call it until it
+    returns (0, 0), as `python manage.py purgeevents` does.
+    """
+    deleted = select(Events.id).where(Events.deleted_at.is_not(None), Events.deleted_at < (deleted_before or datetime.utcnow()))
+    with engine.begin() as conn:
+        links = conn.execute(
+            select(UserEventLink.event_id, UserEventLink.user_email).where(UserEventLink.event_id.in_(deleted)).limit(limit)
+        ).all()
+        if links:
+            by_event: dict = {}
+            for event_id, email in links:
+                by_event.setdefault(event_id, []).append(email)
+            removed = 0
+            for event_id, emails in by_event.items():
+                removed += conn.execute(delete(UserEventLink).where(
+                    UserEventLink.event_id == event_id, UserEventLink.user_email.in_(emails)
+                )).rowcount
+            return 0, removed
+        ids = conn.execute(deleted.order_by(Events.id).limit(limit)).scalars().all()
+        if not ids:
+            return 0, 0
+        for table in (EventSpeakers, EventOrganizers, SentReminders):
+            conn.execute(delete(table).where(table.event_id.in_(ids)))
+        conn.execute(delete(Events).where(Events.id.in_(ids)))
+        return len(ids), 0
+
+
+# --- Speaker / organizer side tables (EventSpeakers, EventOrganizers) ---
+
+def name_key(name: str) -> str:
+    """How speaker/organizer names are stored and looked up: trimmed, single-spaced, casefolded."""
+    return " ".join(str(name).split()).casefold()
+
+def _name_keys(names) -> List[str]:
+    if not names:
+        return []
+    if isinstance(names, str):
+        names = [names]
+    return list(dict.fromkeys(key for key in map(name_key, names) if key))
+
+def _replace_names(session, table, event_id: int, names) -> None:
+    """Make `table` hold exactly `names` for one event (inside the caller's transaction)."""
+    session.execute(delete(table).where(table.event_id == event_id))
+    keys = _name_keys(names)
+    if keys:
+        session.execute(insert(table), [{"event_id": event_id, "name": key} for key in keys])
+
+def backfill_event_names(after_id: int = 0, limit: int = 500) -> Tuple[Optional[int], int]:
+    """Rewrite the side rows of the next `limit` events with id > `after_id` from their JSON columns.
+
+    One transaction per batch; returns (last event id of the batch, or None when done, events processed).
+    Safe to re-run: each event's rows are replaced, never appended.
+    """
     with Session(get_engine()) as session:
-        event = session.get(Events, event_id)
-        if not event:
-            return False
-        session.delete(event)
+        rows = session.execute(
+            select(Events.id, Events.speakers, Events.organizers)
+            .where(Events.id > after_id).order_by(Events.id).limit(limit)
+        ).all()
+        if not rows:
+            return None, 0
+        ids = [row.id for row in rows]
+        for table, column in ((EventSpeakers, "speakers"), (EventOrganizers, "organizers")):
+            session.execute(delete(table).where(table.event_id.in_(ids)))
+            values = [{"event_id": row.id, "name": key} for row in rows for key in _name_keys(getattr(row, column))]
+            if values:
+                session.execute(insert(table), values)
         session.commit()
-        return True  # ✅ explicitly signal success
+    return ids[-1], len(ids)
 
 
 #________________________________________________________________________________________________________________________________________________________
@@ -353,7 +752,7 @@ def register_user_to_event(user_email: str, event_id: int):
         if not user:
             return (False, 'not_found')
         event = session.get(Events, event_id)
-        if not event:
+        if not event or event.deleted_at is not None:
             return (False, 'not_found')
 
         # Already registered? quick check via relationship (works fine here)
@@ -396,26 +795,33 @@ def register_user_to_event(user_email: str, event_id: int):
         user.events.append(event)
         session.add(user)
         session.commit()
-        return (True, None)
+    mark_written(user_email)
+    bump_data_version(registrations_key(user_email))
+    return (True, None)
 
 def unregister_user_from_event(user_email: str, event_id: int):
+    """Remove a registration and give the seat back; False if there is none (or the event was deleted)."""
     with Session(get_engine()) as session:
         user = session.get(Users, user_email)
         event = session.get(Events, event_id)
-        if user and event and event in user.events:
+        if user and event and event.deleted_at is None and event in user.events:
             user.events.remove(event)
             event.available_seats += 1
             session.add(user)
             session.add(event)
             session.commit()
-            return True
-        return False
+        else:
+            return False
+    mark_written(user_email)
+    bump_data_version(registrations_key(user_email))
+    return True
 def get_user_events(user_email: str, search: Optional[str] = None) -> list[int]:
     """Return a list of event dicts the given user is registered for.
 
     If `search` is provided, filter by title/location/description (case-insensitive substring).
+    Read from a replica unless the user registered/unregistered within REPLICA_STICKY_SECONDS.
     """
-    with Session(get_engine()) as session:
+    with Session(read_engine(user_email)) as session:
         user = session.get(Users, user_email)
         if not user:
             return []
@@ -434,13 +840,17 @@ def get_user_events(user_email: str, search: Optional[str] = None) -> list[int]:
                     "speakers": getattr(event, "speakers", []) or [],
                     "category": getattr(event, "category", None),
                     "image_url": getattr(event, "image_url", None),
+                    "image_variants": getattr(event, "image_variants", None) or {},
                 }
                 for event in user.events
+                if event.deleted_at is None
             ]
 
         q = search.lower().strip()
         out = []
         for event in user.events:
+            if event.deleted_at is not None:
+                continue
             title = (event.title or "").lower()
             desc = (event.description or "").lower()
             loc = (event.location or "").lower()
@@ -454,16 +864,292 @@ def get_user_events(user_email: str, search: Optional[str] = None) -> list[int]:
                     "available_seats": event.available_seats,
                     "category": getattr(event, "category", None),
                     "image_url": getattr(event, "image_url", None),
+                    "image_variants": getattr(event, "image_variants", None) or {},
                 })
         return out
 
+def get_event_roster(event_id: int) -> List[Tuple[str, Optional[str]]]:
+    """[(email, fullname)] of everyone registered for a live event, in one query on the primary."""
+    stmt = (
+        select(Users.email, Users.fullname)
+        .join(UserEventLink, UserEventLink.user_email == Users.email)
+        .join(Events, Events.id == UserEventLink.event_id)
+        .where(UserEventLink.event_id == event_id, Events.deleted_at.is_(None))
+        .order_by(Users.email)
+    )
+    with engine.connect() as conn:
+        return [tuple(row) for row in conn.execute(stmt)]
+
 def get_event_users(event_id: int) -> list[str]:
     with Session(get_engine()) as session:
         event = session.get(Events, event_id)
-        if not event:
+        if not event or event.deleted_at is not None:
             return []
         return [user.email for user in event.users]
 
+#________________________________________________________________________________________________________________________________________________________
+# ------ Facet counts (EventFacets summary table) ------
+
+FACET_CATEGORY = "category"
+FACET_WEEK = "week"
+
+def facet_week(date: datetime) -> str:
+    """Bucket key of the week containing `date`: the ISO date of its Monday."""
+    return (date.date() - timedelta(days=date.weekday())).isoformat()
+
+def _facet_buckets(category: Optional[str], date: Optional[datetime]) -> list[tuple[str, str]]:
+    buckets = []
+    if category:
+        buckets.append((FACET_CATEGORY, category))
+    if date is not None:
+        buckets.append((FACET_WEEK, facet_week(date)))
+    return buckets
+
+def adjust_facet_counts(category: Optional[str], date: Optional[datetime], delta: int) -> None:
+    """Add `delta` to the category and week buckets of one event.
+
+    Uses an in-place `count = count + delta` so concurrent writers never lose updates.
+    """
+    if not delta:
+        return
+    for kind, bucket in _facet_buckets(category, date):
+        stmt = (
+            update(EventFacets)
+            .where(EventFacets.kind == kind, EventFacets.bucket == bucket)
+            .values(count=EventFacets.count + delta)
+        )
+        with Session(get_engine()) as session:
+            if session.exec(stmt).rowcount or delta < 0:
+                session.commit()
+                continue
+            session.add(EventFacets(kind=kind, bucket=bucket, count=delta))
+            try:
+                session.commit()
+            except IntegrityError:
+                # Another writer created the bucket first; fall back to the increment
+                session.rollback()
+                session.exec(stmt)
+                session.commit()
+
+def created_by_matches(email: str):
+    """WHERE clause for the events of one admin: emails compare case-insensitively (ix_events_created_by_lower)."""
+    return func.lower(Events.created_by) == email.strip().lower()
+
+def count_facets(rows: Iterable[tuple[Optional[str], Optional[datetime]]]) -> dict[tuple[str, str], int]:
+    """{(kind, bucket): n} over (category, date) pairs, one per event."""
+    counts: dict[tuple[str, str], int] = {}
+    for category, date in rows:
+        for key in _facet_buckets(category, date):
+            counts[key] = counts.get(key, 0) + 1
+    return counts
+
+def facets_from_counts(counts: dict[tuple[str, str], int]) -> dict:
+    """{"categories": {name: n}, "weeks": {monday_iso: n}} from {(kind, bucket): n}, weeks in order."""
+    facets = {"categories": {}, "weeks": {}}
+    for (kind, bucket), count in counts.items():
+        if count > 0:
+            facets["categories" if kind == FACET_CATEGORY else "weeks"][bucket] = count
+    facets["weeks"] = dict(sorted(facets["weeks"].items()))
+    return facets
+
+def get_facet_counts(upcoming_only: bool = False, created_by: Optional[str] = None) -> dict:
+    """Return {"categories": {name: n}, "weeks": {monday_iso: n}} over the events a listing covers.
+
+    Scoped like list_events: the whole live catalog comes from the summary table; upcoming_only
+    and created_by count the matching live events instead, over the same index range scans the
+    listing itself uses.
+    """
+    if not upcoming_only and not created_by:
+        with Session(read_engine()) as session:
+            rows = session.exec(select(EventFacets).where(EventFacets.count > 0)).all()
+        return facets_from_counts({(row.kind, row.bucket): row.count for row in rows})
+    stmt = select(Events.category, Events.date).where(Events.deleted_at.is_(None))
+    if upcoming_only:
+        stmt = stmt.where(Events.date >= event_now())
+    if created_by:
+        stmt = stmt.where(created_by_matches(created_by))
+    with Session(read_engine(created_by)) as session:
+        return facets_from_counts(count_facets(session.exec(stmt).all()))
+
+def rebuild_facet_counts(bind=None, live_only: bool = True) -> None:
+    """Recompute the whole summary table from the events table (backfill / repair).
+
+    live_only=False counts every row, for databases that predate events.deleted_at.
+    """
+    stmt = select(Events.category, Events.date)
+    if live_only:
+        stmt = stmt.where(Events.deleted_at.is_(None))
+    with Session(bind or get_engine()) as session:
+        counts = count_facets(session.exec(stmt).all())
+        session.exec(delete(EventFacets))
+        for (kind, bucket), count in counts.items():
+            session.add(EventFacets(kind=kind, bucket=bucket, count=count))
+        session.commit()
+
+#________________________________________________________________________________________________________________________________________________________
+
+# ------ Rate limit buckets (backend/ratelimit.py) ------
+
+def take_rate_limit_token(key: str, capacity: float, refill_per_second: float, now: Optional[float] = None):
+    """Atomically take one token from a bucket. Returns (allowed, retry_after_seconds).
+
+    The refill and the decrement happen in one conditional UPDATE, so concurrent requests from
+    any number of processes can never take more tokens than the bucket holds.
+    """
+    now = time.time() if now is None else now
+    refilled = RateLimitBuckets.tokens + (now - RateLimitBuckets.updated_at) * refill_per_second
+    available = case((refilled > capacity, capacity), else_=refilled)
+    with engine.begin() as conn:
+        taken = conn.execute(
+            update(RateLimitBuckets)
+            .where(RateLimitBuckets.key == key, available >= 1)
+            .values(tokens=available - 1, updated_at=now)
+        ).rowcount
+    if taken:
+        return True, 0.0
+
+    # Either the bucket does not exist yet (first request for this key) or it is empty
+    try:
+        with engine.begin() as conn:
+            conn.execute(insert(RateLimitBuckets).values(key=key, tokens=capacity - 1, updated_at=now))
+        return True, 0.0
+    except IntegrityError:
+        pass
+    with engine.connect() as conn:
+        row = conn.execute(
+            select(RateLimitBuckets.tokens, RateLimitBuckets.updated_at).where(RateLimitBuckets.key == key)
+        ).first()
+    if row is None or refill_per_second <= 0:
+        return False, 0.0
+    current = min(capacity, row[0] + (now - row[1]) * refill_per_second)
+    return False, max(0.0, (1 - current) / refill_per_second)
+
+
+def delete_rate_limit_buckets(prefix: Optional[str] = None, idle_for: Optional[float] = None,
+                              limit: Optional[int] = None) -> int:
+    """Delete buckets (all, by key prefix, and/or idle for `idle_for` seconds); returns the count.
+
+    With `limit`, at most that many buckets are deleted (batched sweeps).
+    """
+    conditions = []
+    if prefix:
+        conditions.append(RateLimitBuckets.key.startswith(prefix))
+    if idle_for is not None:
+        conditions.append(RateLimitBuckets.updated_at < time.time() - idle_for)
+    with engine.begin() as conn:
+        if limit is None:
+            return conn.execute(delete(RateLimitBuckets).where(*conditions)).rowcount
+        keys = conn.execute(
+            select(RateLimitBuckets.key).where(*conditions).order_by(RateLimitBuckets.updated_at).limit(limit)
+        ).scalars().all()
+        if not keys:
+            return 0
+        return conn.execute(delete(RateLimitBuckets).where(RateLimitBuckets.key.in_(keys))).rowcount
+
+#________________________________________________________________________________________________________________________________________________________
+# ------ Data versions (DataVersions change counters) ------
+
+DATA_EVENTS = "events"
+
+def registrations_key(email: str) -> str:
+    """Name of the counter bumped when `email` registers or unregisters (backend/calendar_feed.py)."""
+    key = f"registrations:{email.lower()}"
+    if len(key) > 128:  # DataVersions.name length; long addresses are hashed
+        key = "registrations:#" + hashlib.sha256(email.lower().encode()).hexdigest()
+    return key
+
+def bump_data_version(name: str) -> int:
+    """Increment a change counter (created at 1 on first use) and return its new value."""
+    stmt = update(DataVersions).where(DataVersions.name == name).values(version=DataVersions.version + 1)
+    current = select(DataVersions.version).where(DataVersions.name == name)
+    with engine.begin() as conn:
+        if conn.execute(stmt).rowcount:
+            return conn.execute(current).scalar_one()
+    try:
+        with engine.begin() as conn:
+            conn.execute(insert(DataVersions).values(name=name, version=1))
+        return 1
+    except IntegrityError:
+        # Another writer created the counter first; fall back to the increment
+        with engine.begin() as conn:
+            conn.execute(stmt)
+            return conn.execute(current).scalar_one()
+
+def get_data_version(name: str) -> int:
+    """Current value of a change counter (0 until it is first bumped). Always read on the primary."""
+    with engine.connect() as conn:
+        version = conn.execute(select(DataVersions.version).where(DataVersions.name == name)).scalar()
+    return version or 0
+
+def get_data_versions(names: List[str]) -> dict:
+    """{name: version} for several counters in one query on the primary (0 for unknown names)."""
+    with engine.connect() as conn:
+        rows = conn.execute(select(DataVersions.name, DataVersions.version).where(DataVersions.name.in_(names)))
+        versions = dict(rows.all())
+    return {name: versions.get(name, 0) for name in names}
+
+#________________________________________________________________________________________________________________________________________________________
+# ------ Reminders (SentReminders markers, manage.py send_reminders) ------
+
+class DueReminder(NamedTuple):
+    event_id: int
+    title: str
+    date: datetime
+    location: Optional[str]
+    user_email: str
+    fullname: Optional[str]
+
+def get_due_reminders(kind: str, start: datetime, end: datetime) -> List[DueReminder]:
+    """Registrations for events starting in [start, end) without a `kind` reminder yet, in one join query.
+
+    Ordered by event (date, id), so each event's registrants come together. Read on the primary,
+    which holds the freshest markers.
+    """
+    stmt = (
+        select(Events.id, Events.title, Events.date, Events.location, Users.email, Users.fullname)
+        .join(UserEventLink, UserEventLink.event_id == Events.id)
+        .join(Users, Users.email == UserEventLink.user_email)
+        .outerjoin(SentReminders, and_(
+            SentReminders.event_id == UserEventLink.event_id,
+            SentReminders.user_email == UserEventLink.user_email,
+            SentReminders.kind == kind,
+        ))
+        .where(Events.date >= start, Events.date < end, Events.deleted_at.is_(None), SentReminders.event_id.is_(None))
+        .order_by(Events.date, Events.id, Users.email)
+    )
+    with engine.connect() as conn:
+        return [DueReminder(*row) for row in conn.execute(stmt)]
+
+def claim_reminders(kind: str, pairs: List[Tuple[int, str]], now: Optional[datetime] = None) -> bool:
+    """Insert the markers of (event_id, user_email) `pairs` in one transaction.
+
+    False (and nothing inserted) if any of them is already claimed, e.g. by an overlapping run.
+    """
+    if not pairs:
+        return True
+    now = now or datetime.utcnow()
+    try:
+        with engine.begin() as conn:
+            conn.execute(insert(SentReminders), [
+                {"event_id": event_id, "user_email": email, "kind": kind, "sent_at": now} for event_id, email in pairs
+            ])
+        return True
+    except IntegrityError:
+        return False
+
+def release_reminders(kind: str, pairs: List[Tuple[int, str]]) -> int:
+    """Delete the markers of `pairs` (their send failed), so the next run retries them."""
+    by_event: dict = {}
+    for event_id, email in pairs:
+        by_event.setdefault(event_id, []).append(email)
+    deleted = 0
+    with engine.begin() as conn:
+        for event_id, emails in by_event.items():
+            deleted += conn.execute(delete(SentReminders).where(
+                SentReminders.kind == kind, SentReminders.event_id == event_id, SentReminders.user_email.in_(emails)
+            )).rowcount
+    return deleted
+
 #________________________________________________________________________________________________________________________________________________________
 # ------ Testing functions ------
 
@@ -482,19 +1168,51 @@ def print_all_events():
             print(f"{event.id:<3} | {event.title:<50}")
 
 # List all events
-def list_events(search: Optional[str] = None) -> List[Events]:
-    """Return events; if search provided, filter by title/location/description (case-insensitive).
-    Uses SQL-level filtering when possible.
+def list_events(
+    search: Optional[str] = None,
+    created_by: Optional[str] = None,
+    category: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    has_seats: bool = False,
+    upcoming_only: bool = False,
+    speaker: Optional[str] = None,
+    organizer: Optional[str] = None,
+) -> List[Events]:
+    """Return events ordered by date; if search provided, filter by title/location/description (case-insensitive).
+    If created_by is provided, only that admin's events are returned, whatever the case of the email
+    (uses ix_events_created_by_lower).
+    category / date_from (inclusive) / date_to (exclusive) / has_seats are pushed into the WHERE clause.
+    upcoming_only restricts to `date >= event_now()`, a range scan on ix_events_date, so the cost follows
+    the number of upcoming events rather than the whole history (undated events are excluded).
+    speaker / organizer match one name exactly (case-insensitive) through the indexed side tables.
+    Soft-deleted events are never returned.
+    Uses SQL-level filtering when possible. Reads from a replica unless `created_by` wrote recently.
     """
-    with Session(get_engine()) as session:
-        if not search:
-            return session.exec(select(Events)).all()
-        pattern = f"%{search}%"
-        stmt = select(Events).where(
-            or_(
-                Events.title.ilike(pattern),
-                Events.description.ilike(pattern),
-                Events.location.ilike(pattern),
+    with Session(read_engine(created_by)) as session:
+        stmt = select(Events).where(Events.deleted_at.is_(None)).order_by(Events.date, Events.id)
+        if upcoming_only:
+            stmt = stmt.where(Events.date >= event_now())
+        if created_by:
+            stmt = stmt.where(created_by_matches(created_by))
+        if category:
+            stmt = stmt.where(Events.category == category)
+        if date_from is not None:
+            stmt = stmt.where(Events.date >= date_from)
+        if date_to is not None:
+            stmt = stmt.where(Events.date < date_to)
+        if has_seats:
+            stmt = stmt.where(Events.available_seats > 0)
+        for table, name in ((EventSpeakers, speaker), (EventOrganizers, organizer)):
+            if name:
+                stmt = stmt.where(Events.id.in_(select(table.event_id).where(table.name == name_key(name))))
+        if search:
+            pattern = f"%{search}%"
+            stmt = stmt.where(
+                or_(
+                    Events.title.ilike(pattern),
+                    Events.description.ilike(pattern),
+                    Events.location.ilike(pattern),
+                )
             )
-        )
         return session.exec(stmt).all()
@@ -0,0 +1,124 @@
+# Run the SQLModel layer on Django's database connection
+#
+# By default database/database.py owns a SQLAlchemy engine with its own connection pool, next to
+# the connection Django keeps for DATABASES['default']: two pools and two TLS sessions to MySQL per
+# worker, and no transaction can cover both stacks. With SQLMODEL_USE_DJANGO_CONNECTION=True the
+# engine is built by create_bridged_engine() instead:
+#
+#   - every engine checkout borrows the calling thread's Django connection (NullPool: SQLAlchemy
+#     keeps nothing, Django's CONN_MAX_AGE decides how long connections live)
+#   - a SQLAlchemy transaction becomes a django.db.transaction.atomic() block at its first write,
+#     so inside an outer atomic() its commit only releases a savepoint and the outer block decides
+#     what is committed. Reads before the first write run in autocommit mode (or in the outer
+#     block), which saves the BEGIN/ROLLBACK round trips on read-only requests
+#   - close/commit/rollback on the borrowed DBAPI connection are no-ops; Django owns both
+#
+# DATABASE_URL must point at the same database as DATABASES['default'] (settings.py derives both
+# from it). Threads that are not request threads get their own Django connection and should call
+# django.db.connection.close() when they finish.
+
+import weakref
+from contextlib import nullcontext
+from datetime import datetime
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.sqlite import DATETIME as SQLITE_DATETIME
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import NullPool
+from sqlalchemy.sql import sqltypes
+
+
+class BorrowedConnection:
+    """DBAPI connection handed to SQLAlchemy; the real one (and its transactions) belongs to Django."""
+
+    def __init__(self, dbapi_connection):
+        object.__setattr__(self, "_connection", dbapi_connection)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._connection, name, value)
+
+    def close(self):
+        pass
+
+    def commit(self):
+        pass  # committed by the atomic() block that wraps the SQLAlchemy transaction
+
+    def rollback(self):
+        pass
+
+
+def _borrow(alias: str):
+    from django.db import connections
+
+    connection = connections[alias]
+    connection.ensure_connection()
+    return BorrowedConnection(connection.connection)
+
+
+class _DjangoSQLiteDateTime(SQLITE_DATETIME):
+    # Django registers sqlite3 converters, so DATETIME columns already come back as datetimes
+    def result_processor(self, dialect, coltype):
+        parse = super().result_processor(dialect, coltype)
+        return lambda value: value if value is None or isinstance(value, datetime) else parse(value)
+
+
+# --- Transactions ---
+
+# Bridged engines and the Django connection alias each one borrows
+_aliases: "weakref.WeakKeyDictionary[Engine, str]" = weakref.WeakKeyDictionary()
+_ATOMIC = "django_atomic"
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    if _ATOMIC in conn.info or statement.lstrip()[:6].upper() == "SELECT":
+        return
+    from django.db import transaction
+
+    block = transaction.atomic(using=_aliases[conn.engine])
+    block.__enter__()
+    conn.info[_ATOMIC] = block
+
+
+def _commit(conn):
+    block = conn.info.pop(_ATOMIC, None)
+    if block is not None:
+        block.__exit__(None, None, None)
+
+
+def _rollback(conn):
+    block = conn.info.pop(_ATOMIC, None)
+    if block is not None:
+        error = RuntimeError("SQLAlchemy transaction rolled back")
+        block.__exit__(type(error), error, None)
+
+
+def create_bridged_engine(url: str, alias: str = "default", **kwargs) -> Engine:
+    """A SQLAlchemy engine for `url` that runs on Django's `alias` connection (see module comment)."""
+    engine = create_engine(url, creator=lambda: _borrow(alias), poolclass=NullPool, **kwargs)
+    if engine.dialect.name == "sqlite":
+        engine.dialect.colspecs = {**engine.dialect.colspecs, sqltypes.DateTime: _DjangoSQLiteDateTime}
+    _aliases[engine] = alias
+    event.listen(engine, "before_cursor_execute", _before_execute)
+    event.listen(engine, "commit", _commit)
+    event.listen(engine, "rollback", _rollback)
+    return engine
+
+
+def is_bridged(engine: Engine) -> bool:
+    return engine in _aliases
+
+
+def atomic(engine: Engine):
+    """One transaction across the SQLModel functions and the Django ORM (bridged engines only).
+
+    Without the bridge the two stacks use different connections and each SQLModel function
+    commits on its own, so this is a no-op context.
+    """
+    if not is_bridged(engine):
+        return nullcontext()
+    from django.db import transaction
+
+    return transaction.atomic(using=_aliases[engine])
@@ -0,0 +1,215 @@
+# Versioned schema migrations for the SQLModel tables
+#
+# SQLModel.metadata.create_all() only creates missing tables; it never adds columns or
+# indexes to tables that already exist. Every schema change to database/tables.py that
+# must reach an existing database gets a numbered migration here instead of an ad hoc script.
+#
+# Applied versions are recorded in the `schema_migrations` table. Migrations must be
+# idempotent (check before altering) so they are safe on a database freshly built by create_all().
+#
+# Run with:  python manage.py dbmigrate   (or --list to see what is applied)
+
+import warnings
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import SAWarning
+from sqlmodel import SQLModel
+
+import database.tables  # noqa: F401  (registers every table on SQLModel.metadata)
+from database.database import get_engine
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: int, description: str):
+    """Register the decorated function as the upgrade step for `version`."""
+    def register(func: Callable[[Connection], None]):
+        MIGRATIONS.append(Migration(version, description, func))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return func
+    return register
+
+
+# Kept outside SQLModel.metadata so create_all()/drop_all() in tests never touch it
+_version_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _version_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+# --- Helpers for writing idempotent migrations ---
+
+def column_names(conn: Connection, table: str) -> set:
+    return {c["name"] for c in inspect(conn).get_columns(table)}
+
+
+def index_names(conn: Connection, table: str) -> set:
+    with warnings.catch_warnings():
+        # SQLite reflection skips expression indexes (see create_expression_index) with a warning
+        warnings.filterwarnings("ignore", "Skipped unsupported reflection of expression-based index", SAWarning)
+        return {i["name"] for i in inspect(conn).get_indexes(table)}
+
+
+def add_column(conn: Connection, table: str, column: str, ddl_type: str):
+    if column not in column_names(conn, table):
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+
+
+def drop_column(conn: Connection, table: str, column: str):
+    # Native DROP COLUMN needs SQLite >= 3.35 (MySQL has always had it)
+    if column in column_names(conn, table):
+        conn.execute(text(f"ALTER TABLE {table} DROP COLUMN {column}"))
+
+
+def create_index(conn: Connection, table: str, name: str, *columns: str, unique: bool = False):
+    if name not in index_names(conn, table):
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        conn.execute(text(f"CREATE {kind} {name} ON {table} ({', '.join(columns)})"))
+
+
+def create_expression_index(conn: Connection, table: str, name: str, expression: str):
+    # SQLAlchemy's SQLite reflection skips expression indexes, so look the name up in sqlite_master
+    if conn.dialect.name == "sqlite":
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = :name"), {"name": name}
+        ).first() is not None
+    else:
+        exists = name in index_names(conn, table)
+    if not exists:
+        conn.execute(text(f"CREATE INDEX {name} ON {table} (({expression}))"))
+
+
+# --- Runner ---
+
+def applied_versions(engine: Optional[Engine] = None) -> set:
+    engine = engine or get_engine()
+    _version_metadata.create_all(engine)
+    with engine.connect() as conn:
+        return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def pending_migrations(engine: Optional[Engine] = None) -> List[Migration]:
+    done = applied_versions(engine)
+    return [m for m in MIGRATIONS if m.version not in done]
+
+
+def migrate(engine: Optional[Engine] = None, target: Optional[int] = None) -> List[Migration]:
+    """Create missing tables, then apply pending migrations in order (up to `target`).
+
+    Each migration runs in its own transaction together with its version row.
+    Returns the list of migrations that were applied.
+    """
+    engine = engine or get_engine()
+    SQLModel.metadata.create_all(engine)
+    applied = []
+    for m in pending_migrations(engine):
+        if target is not None and m.version > target:
+            break
+        with engine.begin() as conn:
+            m.upgrade(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=m.version, description=m.description, applied_at=datetime.utcnow()
+            ))
+        applied.append(m)
+    return applied
+
+
+# --- Migrations ---
+
+@migration(1, "Baseline columns missing from early databases")
+def _0001_baseline_columns(conn: Connection):
+    # Early databases predate these columns; image_url supersedes scripts/add_event_image_url_column.py
+    add_column(conn, "users", "fullname", "VARCHAR(255) NULL")
+    add_column(conn, "events", "category", "VARCHAR(255) NULL")
+    add_column(conn, "events", "created_by", "VARCHAR(255) NULL")
+    add_column(conn, "events", "image_url", "VARCHAR(512) NULL")
+
+
+@migration(2, "Indexes for listing, filtering, creator and registration queries")
+def _0002_hot_query_indexes(conn: Connection):
+    create_index(conn, "events", "ix_events_date", "date")
+    create_index(conn, "events", "ix_events_category_date", "category", "date")
+    create_index(conn, "events", "ix_events_created_by", "created_by")
+    create_index(conn, "usereventlink", "ix_usereventlink_user_email", "user_email")
+
+
+@migration(3, "Event facet counts summary table")
+def _0003_event_facets(conn: Connection):
+    from database.database import rebuild_facet_counts
+    SQLModel.metadata.tables["eventfacets"].create(conn, checkfirst=True)
+    rebuild_facet_counts(conn, live_only=False)  # events.deleted_at only arrives in migration 10
+
+
+@migration(4, "Add events.image_variants")
+def _0004_event_image_variants(conn: Connection):
+    add_column(conn, "events", "image_variants", "JSON NULL")
+
+
+@migration(5, "Rate limiter token buckets")
+def _0005_rate_limit_buckets(conn: Connection):
+    SQLModel.metadata.tables["ratelimitbuckets"].create(conn, checkfirst=True)
+
+
+@migration(6, "Move verification/reset codes from users to authtokens")
+def _0006_auth_tokens(conn: Connection):
+    SQLModel.metadata.tables["authtokens"].create(conn, checkfirst=True)
+    columns = column_names(conn, "users")
+    # Only codes that can still be used are carried over; a verified user's old code is dead
+    copies = [
+        ("verify", "verification_token", "verification_token_expiry", "AND is_verified = 0"),
+        ("reset", "reset_code", "reset_code_expiry", ""),
+    ]
+    for purpose, code, expiry, extra in copies:
+        if {code, expiry} <= columns:
+            conn.execute(text(
+                f"INSERT INTO authtokens (email, purpose, code, expires_at) "
+                f"SELECT email, :purpose, {code}, {expiry} FROM users "
+                f"WHERE {code} IS NOT NULL AND {expiry} IS NOT NULL {extra}"
+            ), {"purpose": purpose})
+    for column in ("verification_token", "verification_token_expiry", "reset_code", "reset_code_expiry"):
+        drop_column(conn, "users", column)
+
+
+@migration(7, "Data version counters")
+def _0007_data_versions(conn: Connection):
+    SQLModel.metadata.tables["dataversions"].create(conn, checkfirst=True)
+
+
+@migration(8, "Speaker and organizer side tables")
+def _0008_event_names(conn: Connection):
+    # Filled for existing events by `python manage.py backfilleventnames`, which batches
+    # through the events table instead of rewriting it in this one transaction
+    SQLModel.metadata.tables["event_speakers"].create(conn, checkfirst=True)
+    SQLModel.metadata.tables["event_organizers"].create(conn, checkfirst=True)
+
+
+@migration(9, "Sent reminder markers")
+def _0009_sent_reminders(conn: Connection):
+    SQLModel.metadata.tables["sentreminders"].create(conn, checkfirst=True)
+
+
+@migration(10, "Soft delete for events")
+def _0010_event_deleted_at(conn: Connection):
+    add_column(conn, "events", "deleted_at", "DATETIME NULL")
+    create_index(conn, "events", "ix_events_deleted_at", "deleted_at")
+
+
+@migration(11, "Case-insensitive index on events.created_by")
+def _0011_event_created_by_lower(conn: Connection):
+    create_expression_index(conn, "events", "ix_events_created_by_lower", "lower(created_by)")
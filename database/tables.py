@@ -1,13 +1,14 @@
 # List of tables for the database
 
 from sqlmodel import SQLModel, Field, Relationship
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
-from sqlalchemy import Column, JSON
+from sqlalchemy import Column, JSON, Index, func, text
 
 class UserEventLink(SQLModel, table=True):
     event_id: int = Field(foreign_key="events.id", primary_key=True)
-    user_email: str = Field(foreign_key="users.email", primary_key=True)
+    # The primary key leads with event_id, so "events of a user" lookups need their own index
+    user_email: str = Field(foreign_key="users.email", primary_key=True, index=True)
 
 class Users(SQLModel, table=True):
     fullname: str
@@ -17,20 +18,23 @@ class Users(SQLModel, table=True):
     is_admin: bool = Field(default=False)
 
     is_verified: bool = Field(default=False)
-    verification_token: Optional[str] = Field(default=None)
-    verification_token_expiry: Optional[datetime] = Field(default=None)
-
-    reset_code: Optional[str] = Field(default=None)
-    reset_code_expiry: Optional[datetime] = Field(default=None)
+    # Verification and reset codes live in AuthTokens, which keeps this row narrow
 
     events: List["Events"] = Relationship(back_populates="users", link_model=UserEventLink)
 
 class Events(SQLModel, table=True):
+    # Category filter + date ordering is the hot listing query (also covers category-only lookups);
+    # an admin's events are matched on lower(created_by), emails being case-insensitive
+    __table_args__ = (
+        Index("ix_events_category_date", "category", "date"),
+        Index("ix_events_created_by_lower", func.lower(text("created_by"))),
+    )
+
     id: int = Field(primary_key=True)
     title: str
     description: Optional[str] = Field(default=None)
 
-    date: Optional[datetime] = Field(default=None)
+    date: Optional[datetime] = Field(default=None, index=True)
     location: Optional[str] = Field(default=None)
 
     capacity: Optional[int] = Field(default=None)
@@ -40,7 +44,64 @@ class Events(SQLModel, table=True):
     organizers: List[str] = Field(default_factory=list, sa_column=Column(JSON))
 
     category: Optional[str] = Field(default=None)
-    created_by: Optional[str] = Field(foreign_key="users.email", default=None)
+    created_by: Optional[str] = Field(foreign_key="users.email", default=None, index=True)
     image_url: Optional[str] = Field(default=None)
+    # WebP variant URLs keyed by variant name (thumb/card/full), see backend/images.py
+    image_variants: Dict[str, str] = Field(default_factory=dict, sa_column=Column(JSON))
+    # Soft delete: set by database.delete_event, filtered out of every read; the row and its
+    # registrations are removed later by `python manage.py purgeevents`
+    deleted_at: Optional[datetime] = Field(default=None, index=True)
 
     users: List[Users] = Relationship(back_populates="events", link_model=UserEventLink)
+
+class EventSpeakers(SQLModel, table=True):
+    # Normalized copy of Events.speakers (one row per name) behind the ?speaker= filter; kept in
+    # sync by database.py whenever the JSON column is written
+    __tablename__ = "event_speakers"
+
+    event_id: int = Field(foreign_key="events.id", primary_key=True)
+    name: str = Field(primary_key=True, max_length=255, index=True)   # database.name_key(): trimmed, casefolded
+
+class EventOrganizers(SQLModel, table=True):
+    # Same as EventSpeakers for Events.organizers (?organizer=)
+    __tablename__ = "event_organizers"
+
+    event_id: int = Field(foreign_key="events.id", primary_key=True)
+    name: str = Field(primary_key=True, max_length=255, index=True)
+
+class EventFacets(SQLModel, table=True):
+    # Precomputed facet counts, kept in sync by backend/crud.py on create/update/delete
+    kind: str = Field(primary_key=True)     # 'category' or 'week'
+    bucket: str = Field(primary_key=True)   # category name, or ISO date of the week's Monday
+    count: int = Field(default=0)
+
+class RateLimitBuckets(SQLModel, table=True):
+    # Token buckets for backend/ratelimit.py; shared by every worker process through the database
+    key: str = Field(primary_key=True, max_length=128)   # "<scope>:<kind>:<hash of ip/email>"
+    tokens: float
+    updated_at: float = Field(index=True)                 # unix time of the last refill
+
+class AuthTokens(SQLModel, table=True):
+    # One live code per user and purpose ('verify' or 'reset'); expired rows are removed by
+    # `python manage.py sweeptokens`
+    __table_args__ = (Index("ix_authtokens_email_purpose", "email", "purpose", unique=True),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    email: str = Field(foreign_key="users.email", ondelete="CASCADE")
+    purpose: str = Field(max_length=16)
+    code: str = Field(max_length=64)
+    expires_at: datetime = Field(index=True)
+
+class DataVersions(SQLModel, table=True):
+    # Change counters that let every worker notice writes made by the others, e.g. "events" is
+    # bumped by backend/crud.py on each catalog write and drives backend/catalog.py
+    name: str = Field(primary_key=True, max_length=128)
+    version: int = Field(default=0)
+
+class SentReminders(SQLModel, table=True):
+    # Idempotency markers of `python manage.py send_reminders`: claimed before a reminder is sent,
+    # released again if the send fails, so repeated or overlapping runs never send one twice
+    event_id: int = Field(foreign_key="events.id", primary_key=True, ondelete="CASCADE")
+    user_email: str = Field(foreign_key="users.email", primary_key=True, ondelete="CASCADE")
+    kind: str = Field(primary_key=True, max_length=32)   # reminder window, e.g. "24h"
+    sent_at: datetime
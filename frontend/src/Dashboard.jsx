@@ -5,6 +5,14 @@ import './Dashboard.css';
 
 const CATEGORY_OPTIONS = ['Workshop', 'Concert', 'Lecture', 'Sports', 'Social', 'Career'];
 
+// Event times are wall-clock times in the event time zone, without an offset (as the admin form
+// sends them), so date filters use the same form rather than UTC from toISOString()
+const toApiTime = (date) => {
+  const pad = (n) => String(n).padStart(2, '0');
+  return `${date.getFullYear()}-${pad(date.getMonth() + 1)}-${pad(date.getDate())}`
+    + `T${pad(date.getHours())}:${pad(date.getMinutes())}:${pad(date.getSeconds())}`;
+};
+
 function useToasts(timeout = 3600) {
   const [toasts, setToasts] = useState([]);
   const timers = useRef(new Map());
@@ -188,17 +196,33 @@ function Dashboard() {
         // Reset show more state when search/tab changes
         setShowAllEvents(false);
         const q = (query || '').trim();
-        let path = activeTab === 'all' ? '/api/events' : '/api/my/events';
-        if (q) path += `?q=${encodeURIComponent(q)}`;
+        const params = new URLSearchParams();
+        if (q) params.set('q', q);
+        if (activeTab === 'all') {
+          // Push the filter panel into the SQL query instead of downloading every event
+          const category = CATEGORY_OPTIONS.find((option) => option.toLowerCase() === categoryFilter);
+          if (category) params.set('category', category);
+          if (onlyAvailable) params.set('has_seats', 'true');
+          if (withinNextWeek) {
+            const now = new Date();
+            const nextWeek = new Date(now);
+            nextWeek.setDate(now.getDate() + 7);
+            params.set('from', toApiTime(now));
+            params.set('to', toApiTime(nextWeek));
+          }
+        }
+        const search = params.toString();
+        const path = (activeTab === 'all' ? '/api/events' : '/api/my/events') + (search ? `?${search}` : '');
+        const unfiltered = !search;
         lastFetchArgs.current = { path, auth: activeTab !== 'all', q };
         const res = await api(path, { method: 'GET', auth: activeTab !== 'all' });
         if (cancelled) return;
         const fetched = res.events || [];
         setEvents(fetched);
-        if (activeTab === 'all' && !q) {
+        if (activeTab === 'all' && unfiltered) {
           setAllEvents(fetched);
         }
-        if (activeTab === 'registered' && !q) {
+        if (activeTab === 'registered' && unfiltered) {
           setRegisteredEvents(fetched);
           setMyEventIds(new Set(fetched.map((e) => e.id)));
         }
@@ -213,7 +237,7 @@ function Dashboard() {
     }, 300); // debounce
 
     return () => { cancelled = true; clearTimeout(timer); };
-  }, [query, activeTab]);
+  }, [query, activeTab, categoryFilter, onlyAvailable, withinNextWeek]);
 
   const filtered = useMemo(() => {
     const q = query.trim().toLowerCase();
@@ -673,7 +697,7 @@ function Dashboard() {
                       <div key={evt.id} className={`event-card ${myEventIds.has(evt.id) ? 'registered' : ''}`}>
                         {evt.image_url && (
                           <div className="event-card-image">
-                            <img src={evt.image_url} alt={`${evt.title || 'Event'} poster`} onError={(e) => { e.currentTarget.style.display = 'none'; }} />
+                            <img src={evt.image_variants?.card || evt.image_url} alt={`${evt.title || 'Event'} poster`} onError={(e) => { e.currentTarget.style.display = 'none'; }} />
                           </div>
                         )}
                         <div className="event-header">
@@ -1,5 +1,5 @@
 import React, { useEffect, useMemo, useRef, useState } from "react";
-import { api } from "../api";
+import { api, uploadImageDirect } from "../api";
 import "./AdminPanel.css";
 
 /**
@@ -212,9 +212,15 @@ function EventForm({ mode, eventId, initial, onCancel, onCreated, onUpdated, toa
     if (!file) return;
     setUploadingImage(true);
     try {
-      const formData = new FormData();
-      formData.append("image", file);
-      const res = await api(`/api/events/upload-image`, { method: "POST", body: formData, auth: true });
+      let res;
+      if (import.meta.env.VITE_DIRECT_IMAGE_UPLOADS === "true") {
+        // Browser -> storage via a signed URL; stored as-is, without WebP variants
+        res = await uploadImageDirect(file);
+      } else {
+        const formData = new FormData();
+        formData.append("image", file);
+        res = await api(`/api/events/upload-image`, { method: "POST", body: formData, auth: true });
+      }
       const url = res?.image_url || "";
       setField("image_url", url);
       setImagePreview(url);
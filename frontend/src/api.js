@@ -33,4 +33,28 @@ export async function api(path, { method = 'GET', body, auth = false, headers: c
   const data = await res.json().catch(() => ({}));
   if (!res.ok) throw new Error(data.error || 'Request failed');
   return data;
-}
\ No newline at end of file
+}
+
+// Upload an image straight to storage with a signed URL, so the bytes never pass through Django.
+// Returns the confirm response ({ image_url, image_variants, path, event? }).
+export async function uploadImageDirect(file, { eventId } = {}) {
+  const ticket = await api('/api/events/upload-url', {
+    method: 'POST',
+    body: { content_type: file.type },
+    auth: true,
+  });
+  if (file.size > ticket.max_bytes) throw new Error('Image exceeds 8 MB limit.');
+
+  const url = /^https?:\/\//.test(ticket.upload_url) ? ticket.upload_url : `${API_BASE}${ticket.upload_url}`;
+  const put = await fetch(url, { method: ticket.method, headers: ticket.headers, body: file });
+  if (!put.ok) {
+    const data = await put.json().catch(() => ({}));
+    throw new Error(data.error || data.message || 'Upload failed');
+  }
+
+  return api('/api/events/upload-url/confirm', {
+    method: 'POST',
+    body: { upload_token: ticket.upload_token, ...(eventId ? { event_id: eventId } : {}) },
+    auth: true,
+  });
+}
@@ -27,7 +27,7 @@ function EventCard({ event, isRegistered, onRegister, onUnregister }) {
       {event.image_url && !imageError && (
         <div className="event-image-wrapper">
           <img
-            src={event.image_url}
+            src={event.image_variants?.card || event.image_url}
             alt={`${event.title || 'Event'} poster`}
             className="event-image"
             onError={() => setImageError(true)}